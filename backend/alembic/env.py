@@ -4,13 +4,18 @@ from sqlalchemy import engine_from_config
 from sqlalchemy import pool
 
 from alembic import context
-from app.database import *
-from app.models import *
+from app.core.config import settings
+from app.database import Base
+from app.models import user, event  # registra las tablas en Base.metadata
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
 
+# La URL sale de la configuración de la aplicación (DATABASE_URL), igual que el engine
+# de los workers; el valor de alembic.ini queda solo como referencia.
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
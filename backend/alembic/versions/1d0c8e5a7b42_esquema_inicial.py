@@ -0,0 +1,100 @@
+"""Esquema inicial (tablas creadas antes de usar Alembic)
+
+Revision ID: 1d0c8e5a7b42
+Revises:
+Create Date: 2026-10-17 17:05:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1d0c8e5a7b42'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Las tablas se creaban con Base.metadata.create_all al importar la aplicación y las
+# migraciones siguientes parten de ese esquema (con los nombres de columna originales).
+# Esta revisión permite crear una base de datos nueva solo con `alembic upgrade head`.
+# Una base de datos creada antes con create_all se marca con `alembic stamp head`.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('correo', sa.String(), nullable=False),
+    sa.Column('pasword', sa.String(), nullable=False),
+    sa.Column('nombre', sa.String(), nullable=True),
+    sa.Column('role', postgresql.ENUM('ADMIN', 'ORGANIZADOR', 'ASISTENTE', name='roles'), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('creado', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('modificado', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id', name='users_pkey')
+    )
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_correo'), 'users', ['correo'], unique=True)
+    op.create_table('eventos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('titulo', sa.String(), nullable=False),
+    sa.Column('descripcion', sa.Text(), nullable=False),
+    sa.Column('fecha_inicio', sa.DateTime(), nullable=False),
+    sa.Column('fecha_fin', sa.DateTime(), nullable=False),
+    sa.Column('lugar', sa.String(), nullable=True),
+    sa.Column('capacidad', sa.Integer(), nullable=False),
+    sa.Column('registrado', sa.Integer(), nullable=False),
+    sa.Column('estado', postgresql.ENUM('PENDIENTE', 'EN_CURSO', 'FINALIZADO', 'CANCELADO', name='estadosevento'), nullable=True),
+    sa.Column('creado', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('modificado', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('creador_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['creador_id'], ['users.id'], name='eventos_creador_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='eventos_pkey')
+    )
+    op.create_index(op.f('ix_eventos_id'), 'eventos', ['id'], unique=False)
+    op.create_table('registro_eventos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('evento_id', sa.Integer(), nullable=False),
+    sa.Column('registrado_en', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('confirmado', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['evento_id'], ['eventos.id'], name='registro_eventos_evento_id_fkey'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='registro_eventos_user_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='registro_eventos_pkey')
+    )
+    op.create_index(op.f('ix_registro_eventos_id'), 'registro_eventos', ['id'], unique=False)
+    op.create_table('sesiones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('titulo', sa.String(), nullable=False),
+    sa.Column('descripcion', sa.Text(), nullable=True),
+    sa.Column('fecha_inicio', sa.DateTime(), nullable=False),
+    sa.Column('fecha_fin', sa.DateTime(), nullable=False),
+    sa.Column('nombre_orador', sa.String(), nullable=False),
+    sa.Column('biografia_orador', sa.Text(), nullable=True),
+    sa.Column('capacidad', sa.Integer(), nullable=False),
+    sa.Column('creado', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('modificado', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('evento_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['evento_id'], ['eventos.id'], name='sesiones_evento_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='sesiones_pkey')
+    )
+    op.create_index(op.f('ix_sesiones_id'), 'sesiones', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_sesiones_id'), table_name='sesiones')
+    op.drop_table('sesiones')
+    op.drop_index(op.f('ix_registro_eventos_id'), table_name='registro_eventos')
+    op.drop_table('registro_eventos')
+    op.drop_index(op.f('ix_eventos_id'), table_name='eventos')
+    op.drop_table('eventos')
+    op.drop_index(op.f('ix_users_correo'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_table('users')
+    sa.Enum(name='estadosevento').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='roles').drop(op.get_bind(), checkfirst=True)
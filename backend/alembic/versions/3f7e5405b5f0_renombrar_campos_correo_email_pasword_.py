@@ -0,0 +1,29 @@
+"""Renombrar campos correo → email, pasword → password
+
+Revision ID: 3f7e5405b5f0
+Revises: 1d0c8e5a7b42
+Create Date: 2025-07-29 17:15:09.167972
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f7e5405b5f0'
+down_revision: Union[str, Sequence[str], None] = '1d0c8e5a7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('users', 'correo', new_column_name='email')
+    op.alter_column('users', 'pasword', new_column_name='password')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('users', 'password', new_column_name='pasword')
+    op.alter_column('users', 'email', new_column_name='correo')
@@ -0,0 +1,47 @@
+"""Índices de las claves foráneas usadas en las rutas más consultadas
+
+Revision ID: 5c1e8a7d3f20
+Revises: d42a9e61c8b5
+Create Date: 2026-10-17 14:05:37.642190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8a7d3f20'
+down_revision: Union[str, Sequence[str], None] = 'd42a9e61c8b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columnas). Las búsquedas de registros por usuario ya las cubre
+# la restricción única (user_id, evento_id).
+INDICES = [
+    ('ix_registro_eventos_evento_id_id', 'registro_eventos', ['evento_id', 'id']),
+    ('ix_sesiones_evento_id_fecha_inicio', 'sesiones', ['evento_id', 'fecha_inicio']),
+    ('ix_eventos_creador_id_fecha_inicio', 'eventos', ['creador_id', 'fecha_inicio']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY evita bloquear las escrituras mientras se construyen
+    with op.get_context().autocommit_block():
+        for nombre, tabla, columnas in INDICES:
+            op.create_index(
+                nombre, tabla, columnas,
+                unique=False, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nombre, tabla, _ in INDICES:
+            op.drop_index(
+                nombre, table_name=tabla,
+                postgresql_concurrently=True, if_exists=True
+            )
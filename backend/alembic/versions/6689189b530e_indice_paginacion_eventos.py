@@ -0,0 +1,37 @@
+"""Índice compuesto para la paginación por cursor de eventos
+
+Revision ID: 6689189b530e
+Revises: 3f7e5405b5f0
+Create Date: 2026-10-17 09:12:41.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6689189b530e'
+down_revision: Union[str, Sequence[str], None] = '3f7e5405b5f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY evita bloquear las escrituras sobre eventos mientras se construye
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_eventos_fecha_inicio_id', 'eventos', ['fecha_inicio', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_eventos_fecha_inicio_id', table_name='eventos',
+            postgresql_concurrently=True, if_exists=True
+        )
@@ -0,0 +1,49 @@
+"""Índices para los filtros y ordenamientos del listado de eventos
+
+Revision ID: 8e3b6f14c2a7
+Revises: 5c1e8a7d3f20
+Create Date: 2026-10-17 15:22:48.317904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3b6f14c2a7'
+down_revision: Union[str, Sequence[str], None] = '5c1e8a7d3f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, columnas, opciones)
+INDICES = [
+    ('ix_eventos_estado_fecha_inicio_id', ['estado', 'fecha_inicio', 'id'], {}),
+    ('ix_eventos_creado_id', ['creado', 'id'], {}),
+    ('ix_eventos_lugar_fecha_inicio', [sa.text('lower(lugar)'), 'fecha_inicio'], {}),
+    # Índice parcial: solo los eventos con cupo disponible (has_capacity=true)
+    ('ix_eventos_con_cupo_fecha_inicio', ['fecha_inicio', 'id'],
+     {'postgresql_where': sa.text('registrado < capacidad')}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY evita bloquear las escrituras sobre eventos mientras se construyen
+    with op.get_context().autocommit_block():
+        for nombre, columnas, opciones in INDICES:
+            op.create_index(
+                nombre, 'eventos', columnas,
+                unique=False, postgresql_concurrently=True, if_not_exists=True, **opciones
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nombre, _, _ in INDICES:
+            op.drop_index(
+                nombre, table_name='eventos',
+                postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,45 @@
+"""Índices de búsqueda por prefijo en el directorio de usuarios
+
+Revision ID: a9d27c5e4b13
+Revises: 8e3b6f14c2a7
+Create Date: 2026-10-17 16:10:09.554312
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d27c5e4b13'
+down_revision: Union[str, Sequence[str], None] = '8e3b6f14c2a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# text_pattern_ops permite usar el índice con LIKE 'prefijo%' con cualquier collation
+INDICES = [
+    ('ix_users_email_prefijo', 'lower(email) text_pattern_ops'),
+    ('ix_users_nombre_prefijo', 'lower(nombre) text_pattern_ops'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY evita bloquear las escrituras sobre users mientras se construyen
+    with op.get_context().autocommit_block():
+        for nombre, expresion in INDICES:
+            op.create_index(
+                nombre, 'users', [sa.text(expresion)],
+                unique=False, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for nombre, _ in INDICES:
+            op.drop_index(
+                nombre, table_name='users',
+                postgresql_concurrently=True, if_exists=True
+            )
@@ -0,0 +1,70 @@
+"""Búsqueda de texto completo en eventos (tsvector + GIN)
+
+Revision ID: b71e4c2f9a03
+Revises: 6689189b530e
+Create Date: 2026-10-17 10:03:18.547120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e4c2f9a03'
+down_revision: Union[str, Sequence[str], None] = '6689189b530e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Configuración en español sin acentos; si unaccent no está disponible
+    # se conserva solo la lematización en español.
+    op.execute("""
+    DO $$
+    BEGIN
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS unaccent;
+        EXCEPTION WHEN OTHERS THEN
+            RAISE NOTICE 'Extension unaccent no disponible';
+        END;
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'es_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION es_unaccent (COPY = pg_catalog.spanish);
+            IF EXISTS (SELECT 1 FROM pg_ts_dict WHERE dictname = 'unaccent') THEN
+                ALTER TEXT SEARCH CONFIGURATION es_unaccent
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+            END IF;
+        END IF;
+    END
+    $$;
+    """)
+    # Columna generada: al añadirla Postgres la calcula para todas las filas existentes
+    op.add_column('eventos', sa.Column(
+        'busqueda', postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('es_unaccent', coalesce(titulo, '')), 'A') || "
+            "setweight(to_tsvector('es_unaccent', coalesce(descripcion, '')), 'B')",
+            persisted=True
+        ),
+        nullable=True
+    ))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_eventos_busqueda', 'eventos', ['busqueda'],
+            unique=False, postgresql_using='gin', postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_eventos_busqueda', table_name='eventos',
+            postgresql_concurrently=True, if_exists=True
+        )
+    op.drop_column('eventos', 'busqueda')
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS es_unaccent")
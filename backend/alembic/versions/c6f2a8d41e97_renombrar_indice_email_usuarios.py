@@ -0,0 +1,30 @@
+"""Renombrar el índice ix_users_correo → ix_users_email
+
+Revision ID: c6f2a8d41e97
+Revises: a9d27c5e4b13
+Create Date: 2026-10-17 17:12:26.730514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f2a8d41e97'
+down_revision: Union[str, Sequence[str], None] = 'a9d27c5e4b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # La migración que renombró correo → email conservó el nombre del índice único.
+    # Las bases creadas con create_all ya tienen ix_users_email.
+    op.execute("ALTER INDEX IF EXISTS ix_users_correo RENAME TO ix_users_email")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER INDEX IF EXISTS ix_users_email RENAME TO ix_users_correo")
@@ -0,0 +1,58 @@
+"""Restricción única (user_id, evento_id) en registro_eventos
+
+Revision ID: d42a9e61c8b5
+Revises: b71e4c2f9a03
+Create Date: 2026-10-17 11:26:05.913482
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd42a9e61c8b5'
+down_revision: Union[str, Sequence[str], None] = 'b71e4c2f9a03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Eliminar registros duplicados conservando el más antiguo y
+    # sincronizar el contador registrado con los registros reales.
+    op.execute("""
+    DELETE FROM registro_eventos r
+    USING registro_eventos original
+    WHERE r.user_id = original.user_id
+      AND r.evento_id = original.evento_id
+      AND r.id > original.id
+    """)
+    # Se recorren todos los eventos (LEFT JOIN): uno sin registros queda en 0
+    op.execute("""
+    UPDATE eventos e
+    SET registrado = conteo.total
+    FROM (
+        SELECT ev.id, count(r.id) AS total
+        FROM eventos ev
+        LEFT JOIN registro_eventos r ON r.evento_id = ev.id
+        GROUP BY ev.id
+    ) conteo
+    WHERE conteo.id = e.id AND e.registrado IS DISTINCT FROM conteo.total
+    """)
+    # El índice se construye sin bloquear escrituras y luego respalda la restricción
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_registro_eventos_user_evento', 'registro_eventos', ['user_id', 'evento_id'],
+            unique=True, postgresql_concurrently=True, if_not_exists=True
+        )
+    op.execute(
+        "ALTER TABLE registro_eventos ADD CONSTRAINT uq_registro_eventos_user_evento "
+        "UNIQUE USING INDEX uq_registro_eventos_user_evento"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_registro_eventos_user_evento', 'registro_eventos', type_='unique')
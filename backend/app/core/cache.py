@@ -0,0 +1,118 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Optional
+from app.core.config import settings
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # redis (en requirements.txt) solo se usa con CACHE_URL
+    redis_asyncio = None
+
+# Cachés con expiración (TTL). Los valores deben ser serializables a JSON para
+# que el backend en memoria y el compartido (Redis) sean intercambiables.
+
+class CacheBackend(ABC):
+    """Interfaz común de los backends de caché"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        """Incrementar un contador sin expiración y devolver su nuevo valor"""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        ...
+
+class MemoryCache(CacheBackend):
+    """Caché LRU acotada por proceso, con expiración por entrada"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key):
+        with self._lock:
+            entrada = self._datos.get(key)
+            if entrada is None:
+                return None
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._datos[key]
+                return None
+            self._datos.move_to_end(key)
+            return valor
+
+    async def set(self, key, value, ttl):
+        with self._lock:
+            self._datos[key] = (time.monotonic() + ttl, value)
+            self._datos.move_to_end(key)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    async def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._datos.pop(key, None)
+
+    async def incr(self, key):
+        with self._lock:
+            entrada = self._datos.get(key)
+            valor = (entrada[1] if entrada is not None else 0) + 1
+            self._datos[key] = (float("inf"), valor)
+            self._datos.move_to_end(key)
+            return valor
+
+    async def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+class RedisCache(CacheBackend):
+    """Caché compartida entre workers; las invalidaciones llegan a todos los procesos"""
+
+    def __init__(self, url: str, prefix: str):
+        if redis_asyncio is None:
+            raise RuntimeError("CACHE_URL requiere el paquete redis instalado")
+        self.prefix = prefix
+        self._cliente = redis_asyncio.from_url(url)
+
+    async def get(self, key):
+        valor = await self._cliente.get(self.prefix + key)
+        return json.loads(valor) if valor is not None else None
+
+    async def set(self, key, value, ttl):
+        await self._cliente.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+
+    async def delete(self, *keys):
+        if keys:
+            await self._cliente.delete(*(self.prefix + key for key in keys))
+
+    async def incr(self, key):
+        return await self._cliente.incr(self.prefix + key)
+
+    async def clear(self):
+        async for key in self._cliente.scan_iter(match=self.prefix + "*"):
+            await self._cliente.delete(key)
+
+def build_cache(namespace: str, maxsize: int) -> CacheBackend:
+    """Crear la caché de un espacio de nombres según CACHE_URL"""
+    if settings.CACHE_URL:
+        return RedisCache(settings.CACHE_URL, prefix=f"miseventos:{namespace}:")
+    return MemoryCache(maxsize=maxsize)
+
+# Usuarios autenticados, indexados por el subject (email) del token
+principal_cache = build_cache("principal", maxsize=settings.PRINCIPAL_CACHE_SIZE)
@@ -1,18 +1,93 @@
 from decouple import config
 from typing import Optional
 
+def _async_url(url: str) -> str:
+    """Derivar la URL con el driver asyncpg a partir de la URL síncrona"""
+    esquema, _, resto = url.partition("://")
+    if esquema.split("+")[0] in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{resto}"
+    return url
+
 class Settings:
     DATABASE_URL: str = config("DATABASE_URL")
+    # Ruta de acceso a datos asíncrona (AsyncEngine + asyncpg)
+    DB_ASYNC: bool = config("DB_ASYNC", default=False, cast=bool)
+    ASYNC_DATABASE_URL: str = config("ASYNC_DATABASE_URL", default=_async_url(DATABASE_URL))
+    # Pool de conexiones (se aplica tanto al engine síncrono como al asíncrono)
+    DB_POOL_SIZE: int = config("DB_POOL_SIZE", default=5, cast=int)
+    DB_MAX_OVERFLOW: int = config("DB_MAX_OVERFLOW", default=10, cast=int)
+    DB_POOL_TIMEOUT: float = config("DB_POOL_TIMEOUT", default=30, cast=float)
+    DB_POOL_RECYCLE: int = config("DB_POOL_RECYCLE", default=1800, cast=int)
+    DB_POOL_PRE_PING: bool = config("DB_POOL_PRE_PING", default=True, cast=bool)
+    # Conexiones que cada worker abre al arrancar, antes de reportarse listo en /ready
+    DB_POOL_WARMUP: int = config("DB_POOL_WARMUP", default=DB_POOL_SIZE, cast=int)
     
     SECRET_KEY: str = config("SECRET_KEY")
     ALGORITHM: str = config("ALGORITHM", default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = config("ACCESS_TOKEN_EXPIRE_MINUTES", default=30, cast=int)
+
+    # Caché de usuarios autenticados (get_current_user). Con CACHE_URL (redis://...)
+    # la caché se comparte entre workers; si no, es local a cada proceso.
+    CACHE_URL: str = config("CACHE_URL", default="")
+    PRINCIPAL_CACHE_TTL: float = config("PRINCIPAL_CACHE_TTL", default=60, cast=float)
+    PRINCIPAL_CACHE_SIZE: int = config("PRINCIPAL_CACHE_SIZE", default=10000, cast=int)
+
+    # Hash de contraseñas: costo de bcrypt y pool de procesos dedicado.
+    # Con BCRYPT_WORKERS=0 el hash se calcula en el threadpool.
+    BCRYPT_ROUNDS: int = config("BCRYPT_ROUNDS", default=12, cast=int)
+    BCRYPT_WORKERS: int = config("BCRYPT_WORKERS", default=2, cast=int)
+    BCRYPT_MAX_QUEUE: int = config("BCRYPT_MAX_QUEUE", default=64, cast=int)
+
+    # Caché HTTP de las lecturas públicas de eventos (max-age de Cache-Control, en segundos).
+    # Con 0 los clientes y proxies guardan la respuesta pero la revalidan con ETag en cada uso.
+    EVENTS_CACHE_MAX_AGE: int = config("EVENTS_CACHE_MAX_AGE", default=0, cast=int)
+
+    # Serialización rápida de listas de eventos: columnas como tuplas serializadas
+    # directamente a JSON, sin instancias ORM ni validación con response_model
+    FAST_JSON: bool = config("FAST_JSON", default=False, cast=bool)
+
+    # Registro de consultas lentas (0 = desactivado): umbral en milisegundos, fracción
+    # de las consultas lentas que se registra y máximo de registros por minuto por proceso
+    SLOW_QUERY_MS: float = config("SLOW_QUERY_MS", default=0, cast=float)
+    SLOW_QUERY_SAMPLE_RATE: float = config("SLOW_QUERY_SAMPLE_RATE", default=1.0, cast=float)
+    SLOW_QUERY_MAX_PER_MINUTE: int = config("SLOW_QUERY_MAX_PER_MINUTE", default=10, cast=int)
+    # Incluir la salida de EXPLAIN (ANALYZE, BUFFERS); vuelve a ejecutar la consulta
+    SLOW_QUERY_EXPLAIN: bool = config("SLOW_QUERY_EXPLAIN", default=True, cast=bool)
+
+    # Perfilado bajo demanda: una petición con un token firmado (X-Profile) devuelve su perfil.
+    # Desactivado por defecto; activarlo solo mientras se investiga un problema
+    PROFILING_ENABLED: bool = config("PROFILING_ENABLED", default=False, cast=bool)
+    # Minutos de validez de un token de perfilado
+    PROFILING_TOKEN_EXPIRE_MINUTES: int = config("PROFILING_TOKEN_EXPIRE_MINUTES", default=15, cast=int)
+    # Intervalo de muestreo de pyinstrument en ms
+    PROFILING_INTERVAL_MS: float = config("PROFILING_INTERVAL_MS", default=1, cast=float)
+    # Directorio donde guardar también los informes (vacío = solo se devuelven)
+    PROFILE_DIR: str = config("PROFILE_DIR", default="")
+
+    # Cola de admisión: agrupar las inscripciones concurrentes a un evento en un solo commit
+    REGISTRATION_BATCHING: bool = config("REGISTRATION_BATCHING", default=False, cast=bool)
+    # Milisegundos que el primer inscrito de un lote espera a los siguientes
+    REGISTRATION_BATCH_WINDOW_MS: float = config("REGISTRATION_BATCH_WINDOW_MS", default=5, cast=float)
+    # Tamaño máximo de un lote; al alcanzarlo se registra sin esperar la ventana
+    REGISTRATION_BATCH_MAX: int = config("REGISTRATION_BATCH_MAX", default=500, cast=int)
+    # Segundos que se confía en los cupos libres anotados para rechazar sin consultar la base de datos
+    REGISTRATION_CAPACITY_TTL: float = config("REGISTRATION_CAPACITY_TTL", default=1, cast=float)
+
+    # Estadísticas de ocupación: segundos que se reutiliza un resultado en caché
+    STATS_CACHE_TTL: float = config("STATS_CACHE_TTL", default=30, cast=float)
+
+    # Importación masiva de asistentes: correos procesados por transacción
+    IMPORT_BATCH_SIZE: int = config("IMPORT_BATCH_SIZE", default=1000, cast=int)
+    # Exportaciones en streaming: filas leídas del cursor del servidor por bloque
+    EXPORT_BATCH_SIZE: int = config("EXPORT_BATCH_SIZE", default=1000, cast=int)
     
     
     PROJECT_NAME: str = "Mis Eventos API"
     VERSION: str = "1.0.0"
     ENVIRONMENT: str = config("ENVIRONMENT", default="development")
     DEBUG: bool = config("DEBUG", default=False, cast=bool)
+    # Lanza un error si una respuesta dispara una carga perezosa (útil en desarrollo y pruebas)
+    RAISE_ON_LAZY_LOAD: bool = config("RAISE_ON_LAZY_LOAD", default=False, cast=bool)
     
     
     ALLOWED_ORIGINS: list = [
@@ -0,0 +1,103 @@
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Métricas del pool de conexiones: conexiones en uso, libres y de desborde,
+# y tiempo de espera de los checkouts. Permite distinguir la latencia propia
+# de la base de datos de la espera por una conexión libre.
+
+class PoolStats:
+    """Contadores acumulados de un pool, seguros entre hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidated = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, segundos: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += segundos
+            if segundos > self.wait_max:
+                self.wait_max = segundos
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidate(self):
+        with self._lock:
+            self.invalidated += 1
+
+def _timed_do_get(pool_cls):
+    """Crear una subclase del pool que mide el tiempo de espera en cada checkout"""
+    class InstrumentedPool(pool_cls):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.stats = PoolStats()
+
+        def _do_get(self):
+            inicio = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                self.stats.record_timeout()
+                raise
+            finally:
+                self.stats.record_wait(time.perf_counter() - inicio)
+
+        def recreate(self):
+            nuevo = super().recreate()
+            nuevo.stats = self.stats
+            return nuevo
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_cls.__name__}"
+    return InstrumentedPool
+
+InstrumentedQueuePool = _timed_do_get(QueuePool)
+InstrumentedAsyncAdaptedQueuePool = _timed_do_get(AsyncAdaptedQueuePool)
+
+def instrument_engine(engine):
+    """Registrar los eventos del pool de un engine para contar conexiones nuevas e invalidadas"""
+    pool = engine.pool
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        pool.stats.record_connect()
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        pool.stats.record_invalidate()
+
+def pool_status(pool) -> dict:
+    """Estado actual y acumulado de un pool instrumentado"""
+    stats = pool.stats
+    with stats._lock:
+        checkouts = stats.checkouts
+        wait_total = stats.wait_total
+        wait_max = stats.wait_max
+        timeouts = stats.timeouts
+        connects = stats.connects
+        invalidated = stats.invalidated
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "checkouts": checkouts,
+        "checkout_wait_avg_ms": round(wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+        "checkout_wait_max_ms": round(wait_max * 1000, 3),
+        "checkout_timeouts": timeouts,
+        "connections_opened": connects,
+        "connections_invalidated": invalidated,
+    }
@@ -0,0 +1,189 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import GaugeMetricFamily, HistogramMetricFamily, SummaryMetricFamily
+from sqlalchemy import event
+from starlette.routing import Route
+
+# Métricas de Prometheus expuestas en /metrics.
+# La latencia se mide envolviendo la aplicación ASGI de cada ruta, así la plantilla
+# de la ruta (/api/events/{evento_id}) se conoce sin buscarla en cada petición.
+# Las métricas por ruta se acumulan en estructuras simples sin locks (solo se
+# actualizan desde el event loop) y se convierten al formato de Prometheus al
+# momento del scrape: medir una petición cuesta unos 3 µs, frente a ~10 µs con los
+# tipos de prometheus_client. Las consultas SQL se cuentan con eventos del engine y
+# se acumulan por petición en una ContextVar, que se copia a los hilos del threadpool.
+# Las métricas son por proceso: con varios workers cada uno se consulta por separado.
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+SQL_STATEMENTS_TOTAL = Counter(
+    "db_statements_total", "Sentencias SQL ejecutadas (incluidas las de fuera de una petición)",
+)
+BCRYPT_DURATION = Histogram(
+    "bcrypt_duration_seconds", "Duración de hash/verificación de contraseñas, incluida la espera en cola",
+    ["operation"], buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0),
+)
+BCRYPT_QUEUE = Gauge("bcrypt_pending_operations", "Operaciones de bcrypt en curso o en cola")
+THREADPOOL_IN_USE = Gauge("threadpool_threads_in_use", "Hilos del threadpool ocupados")
+THREADPOOL_LIMIT = Gauge("threadpool_threads_limit", "Tamaño máximo del threadpool")
+THREADPOOL_WAITING = Gauge("threadpool_tasks_waiting", "Tareas esperando un hilo libre del threadpool")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_connections_in_use", "Conexiones del pool en uso")
+DB_POOL_WAIT_MAX = Gauge("db_pool_checkout_wait_max_seconds", "Mayor espera por una conexión libre")
+
+# [sentencias, segundos, plantilla de la ruta] de la petición en curso
+_sql_peticion: ContextVar[Optional[list]] = ContextVar("sql_peticion", default=None)
+
+def current_route() -> Optional[str]:
+    """Plantilla de la ruta que atiende la petición en curso (None fuera de una petición)"""
+    acumulado = _sql_peticion.get()
+    return acumulado[2] if acumulado is not None else None
+
+class _Histograma:
+    """Histograma sin locks; las cubetas no son acumuladas hasta el scrape"""
+    __slots__ = ("cubetas", "suma")
+
+    def __init__(self):
+        self.cubetas = [0] * (len(BUCKETS_LATENCIA) + 1)
+        self.suma = 0.0
+
+    def observe(self, valor: float):
+        self.cubetas[bisect_left(BUCKETS_LATENCIA, valor)] += 1
+        self.suma += valor
+
+class _MetricasRuta:
+    """Contadores de una ruta: peticiones en curso, latencias por (método, estado) y SQL"""
+    __slots__ = ("en_curso", "latencias", "peticiones", "sql_sentencias", "sql_segundos")
+
+    def __init__(self):
+        self.en_curso = {}
+        self.latencias = {}
+        self.peticiones = 0
+        self.sql_sentencias = 0
+        self.sql_segundos = 0.0
+
+_rutas: dict = {}
+
+class RouteCollector:
+    """Exportar las métricas por ruta en el formato de Prometheus"""
+
+    def collect(self):
+        latencia = HistogramMetricFamily(
+            "http_request_duration_seconds", "Duración de las peticiones por ruta",
+            labels=["method", "route", "status"],
+        )
+        en_curso = GaugeMetricFamily(
+            "http_requests_in_progress", "Peticiones en curso por ruta", labels=["method", "route"]
+        )
+        sentencias = SummaryMetricFamily(
+            "http_request_sql_statements", "Sentencias SQL ejecutadas por petición", labels=["route"]
+        )
+        segundos = SummaryMetricFamily(
+            "http_request_sql_duration_seconds", "Tiempo total en sentencias SQL por petición", labels=["route"]
+        )
+        for plantilla, ruta in list(_rutas.items()):
+            for metodo, valor in list(ruta.en_curso.items()):
+                en_curso.add_metric([metodo, plantilla], valor)
+            for (metodo, estado), histograma in list(ruta.latencias.items()):
+                acumulado, cubetas = 0, []
+                for limite, cantidad in zip(BUCKETS_LATENCIA + (float("inf"),), histograma.cubetas):
+                    acumulado += cantidad
+                    cubetas.append(("+Inf" if limite == float("inf") else str(limite), acumulado))
+                latencia.add_metric([metodo, plantilla, str(estado)], cubetas, histograma.suma)
+            if ruta.peticiones:
+                sentencias.add_metric([plantilla], ruta.peticiones, ruta.sql_sentencias)
+                segundos.add_metric([plantilla], ruta.peticiones, ruta.sql_segundos)
+        return [latencia, en_curso, sentencias, segundos]
+
+REGISTRY.register(RouteCollector())
+
+def _marcar_inicio(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._inicio_sentencia = time.perf_counter()
+
+def track_statement_start(engine):
+    """
+    Anotar el inicio de cada sentencia en su contexto de ejecución (una sola vez por
+    engine). Se guarda en el contexto y no en conn.info porque after_cursor_execute
+    no se emite si la sentencia falla, y conn.info vive tanto como la conexión del pool.
+    """
+    if not event.contains(engine, "before_cursor_execute", _marcar_inicio):
+        event.listen(engine, "before_cursor_execute", _marcar_inicio)
+
+def statement_duration(context) -> Optional[float]:
+    """Segundos desde el inicio de la sentencia (None si no se anotó)"""
+    inicio = getattr(context, "_inicio_sentencia", None)
+    return time.perf_counter() - inicio if inicio is not None else None
+
+def instrument_sql(engine):
+    """Contar y cronometrar las sentencias de un engine (síncrono o sync_engine)"""
+    track_statement_start(engine)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        duracion = statement_duration(context)
+        SQL_STATEMENTS_TOTAL.inc()
+        acumulado = _sql_peticion.get()
+        if acumulado is not None and duracion is not None:
+            acumulado[0] += 1
+            acumulado[1] += duracion
+
+def _medir_ruta(app, plantilla: str):
+    """Envolver la aplicación ASGI de una ruta para medir latencia, concurrencia y SQL"""
+    ruta = _rutas.setdefault(plantilla, _MetricasRuta())
+    en_curso = ruta.en_curso
+    latencias = ruta.latencias
+
+    async def medida(scope, receive, send):
+        metodo = scope["method"]
+        estado = 500
+
+        async def send_con_estado(message):
+            nonlocal estado
+            if message["type"] == "http.response.start":
+                estado = message["status"]
+            await send(message)
+
+        acumulado = [0, 0.0, plantilla]
+        token = _sql_peticion.set(acumulado)
+        en_curso[metodo] = en_curso.get(metodo, 0) + 1
+        inicio = time.perf_counter()
+        try:
+            await app(scope, receive, send_con_estado)
+        finally:
+            duracion = time.perf_counter() - inicio
+            en_curso[metodo] -= 1
+            _sql_peticion.reset(token)
+            histograma = latencias.get((metodo, estado))
+            if histograma is None:
+                histograma = latencias[(metodo, estado)] = _Histograma()
+            histograma.observe(duracion)
+            ruta.peticiones += 1
+            ruta.sql_sentencias += acumulado[0]
+            ruta.sql_segundos += acumulado[1]
+
+    return medida
+
+def instrument_routes(app):
+    """Instrumentar todas las rutas HTTP ya registradas en la aplicación"""
+    for route in app.routes:
+        if isinstance(route, Route) and route.path != "/metrics":
+            route.app = _medir_ruta(route.app, route.path)
+
+def observe_bcrypt(operacion: str, inicio: float):
+    BCRYPT_DURATION.labels(operacion).observe(time.perf_counter() - inicio)
+
+def render_metrics(bcrypt_pendientes: int, pool: dict, limitador) -> tuple:
+    """
+    Actualizar los indicadores de saturación, que se leen al momento del scrape, y
+    devolver (cuerpo, content-type) con todas las métricas.
+    """
+    BCRYPT_QUEUE.set(bcrypt_pendientes)
+    THREADPOOL_IN_USE.set(limitador.borrowed_tokens)
+    THREADPOOL_LIMIT.set(limitador.total_tokens)
+    THREADPOOL_WAITING.set(limitador.statistics().tasks_waiting)
+    DB_POOL_CHECKED_OUT.set(pool["checked_out"])
+    DB_POOL_WAIT_MAX.set(pool["checkout_wait_max_ms"] / 1000)
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
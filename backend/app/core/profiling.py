@@ -0,0 +1,175 @@
+import hashlib
+import hmac
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from anyio.to_thread import run_sync
+from pyinstrument import Profiler
+from app.core.config import settings
+
+# Perfilado bajo demanda de una petición concreta (PROFILING_ENABLED).
+# Un administrador obtiene un token firmado (POST /api/auth/profiling/token) y lo
+# envía en la cabecera X-Profile (nunca en la URL, que queda en los logs de acceso y
+# en el historial del navegador); esa petición se ejecuta bajo pyinstrument y su respuesta se sustituye por el informe (HTML si el
+# cliente acepta text/html, texto en otro caso), que también se guarda en
+# PROFILE_DIR si está configurado. El estado y el cuerpo originales no se envían;
+# el estado va en X-Profiled-Status.
+# pyinstrument muestrea siguiendo a las corrutinas: las esperas al threadpool (SQL),
+# a los procesos de bcrypt o a la red se atribuyen a la línea que hace el await, y
+# las corrutinas de otras peticiones concurrentes no entran en el informe. Las
+# peticiones sin el token solo pagan la búsqueda de la cabecera.
+
+logger = logging.getLogger("app.profiling")
+
+CABECERA = b"x-profile"
+
+# Categorías del desglose: fragmentos de "<archivo>:<función>". A cada muestra se le
+# asigna la del marco más profundo de su pila que coincida con alguna.
+CATEGORIAS = (
+    ("pydantic", ("/pydantic/", "/pydantic_core/")),
+    ("sqlalchemy", ("/sqlalchemy/", "/psycopg2/", "/asyncpg/", "/app/database.py:")),
+    ("bcrypt", ("/passlib/", "/bcrypt/", "/app/core/security.py:hash_password_async",
+                "/app/core/security.py:verify_password_async", "/app/core/security.py:run")),
+    ("json", ("/json/", "orjson", "/app/services/json_rapido.py:")),
+    ("fastapi", ("/fastapi/", "/starlette/")),
+)
+
+def _clave() -> bytes:
+    # Clave propia, derivada de SECRET_KEY: un token de perfilado no sirve como JWT
+    return hashlib.sha256(b"profiling:" + settings.SECRET_KEY.encode()).digest()
+
+def _firmar(expira: int) -> str:
+    return hmac.new(_clave(), str(expira).encode(), hashlib.sha256).hexdigest()
+
+def create_profiling_token(minutos: Optional[int] = None) -> tuple:
+    """Token "<expiración>.<firma>" y su expiración (timestamp Unix)"""
+    expira = int(time.time()) + 60 * (minutos or settings.PROFILING_TOKEN_EXPIRE_MINUTES)
+    return f"{expira}.{_firmar(expira)}", expira
+
+def verify_profiling_token(token: str) -> bool:
+    expira, _, firma = token.partition(".")
+    if not expira.isdigit() or int(expira) < time.time():
+        return False
+    return hmac.compare_digest(firma, _firmar(int(expira)))
+
+def categoria(ubicacion: str) -> Optional[str]:
+    for nombre, fragmentos in CATEGORIAS:
+        if any(fragmento in ubicacion for fragmento in fragmentos):
+            return nombre
+    return None
+
+def _desglose_pyinstrument(raiz) -> dict:
+    """Tiempo de cada muestra (hojas del árbol) por categoría del marco más profundo"""
+    tiempos = {}
+    # Una petición más corta que el intervalo de muestreo no deja muestras (raiz None)
+    pendientes = [(raiz, "otros")] if raiz is not None else []
+    while pendientes:
+        marco, actual = pendientes.pop()
+        if not marco.is_synthetic:
+            actual = categoria(f"{marco.file_path}:{marco.function}") or actual
+        if not marco.children:
+            tiempos[actual] = tiempos.get(actual, 0.0) + marco.time
+        pendientes.extend((hijo, actual) for hijo in marco.children)
+    return tiempos
+
+def formatear_desglose(tiempos: dict) -> str:
+    total = sum(tiempos.values()) or 1.0
+    lineas = ["Tiempo por componente:"]
+    for nombre, segundos in sorted(tiempos.items(), key=lambda item: -item[1]):
+        lineas.append(f"  {nombre:<11}{segundos * 1000:9.1f} ms {100 * segundos / total:5.1f} %")
+    return "\n".join(lineas)
+
+class ProfilingMiddleware:
+    """Middleware ASGI que perfila las peticiones con un token de perfilado válido"""
+
+    def __init__(self, app):
+        self.app = app
+        # pyinstrument no admite dos perfiles a la vez en el mismo hilo
+        self.ocupado = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = self._token(scope)
+        if token is None:
+            return await self.app(scope, receive, send)
+        if not verify_profiling_token(token):
+            logger.warning("Token de perfilado inválido o expirado en %s", scope["path"])
+            return await self.app(scope, receive, send)
+        if self.ocupado:
+            return await self.app(scope, receive, self._marcar(send, b"busy"))
+        self.ocupado = True
+        try:
+            await self._perfilar(scope, receive, send)
+        finally:
+            self.ocupado = False
+
+    @staticmethod
+    def _token(scope) -> Optional[str]:
+        for nombre, valor in scope["headers"]:
+            if nombre == CABECERA:
+                return valor.decode("latin-1")
+        return None
+
+    @staticmethod
+    def _marcar(send, estado: bytes):
+        async def send_marcado(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile", estado)]
+            await send(message)
+        return send_marcado
+
+    async def _perfilar(self, scope, receive, send):
+        estado = 500
+
+        async def descartar(message):
+            # El cuerpo original se descarta; solo interesa el estado
+            nonlocal estado
+            if message["type"] == "http.response.start":
+                estado = message["status"]
+
+        html = any(b"text/html" in valor for nombre, valor in scope["headers"] if nombre == b"accept")
+        inicio = time.perf_counter()
+        profiler = Profiler(interval=settings.PROFILING_INTERVAL_MS / 1000, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, descartar)
+        finally:
+            profiler.stop()
+        desglose = formatear_desglose(_desglose_pyinstrument(profiler.last_session.root_frame()))
+        if html:
+            informe = profiler.output_html()
+        else:
+            informe = f"{desglose}\n\n{profiler.output_text(unicode=True, show_all=False)}"
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+        logger.info("Petición perfilada: %s %s (%d) en %.1f ms\n%s",
+                    scope["method"], scope["path"], estado, duracion_ms, desglose)
+
+        cuerpo = informe.encode()
+        if settings.PROFILE_DIR:
+            await run_sync(self._guardar, scope, cuerpo, "html" if html else "txt")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/html; charset=utf-8" if html else b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(cuerpo)).encode()),
+                (b"x-profile", b"pyinstrument"),
+                (b"x-profiled-status", str(estado).encode()),
+                (b"x-profiled-duration-ms", f"{duracion_ms:.1f}".encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": cuerpo})
+
+    @staticmethod
+    def _guardar(scope, cuerpo: bytes, extension: str):
+        directorio = Path(settings.PROFILE_DIR)
+        directorio.mkdir(parents=True, exist_ok=True)
+        ruta = re.sub(r"[^A-Za-z0-9_-]+", "_", scope["path"]).strip("_") or "raiz"
+        marca = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        archivo = directorio / f"{marca}-{scope['method']}-{ruta}.{extension}"
+        archivo.write_bytes(cuerpo)
+        logger.info("Informe de perfilado guardado en %s", archivo)
@@ -1,21 +1,117 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.core.metrics import observe_bcrypt
 
-# Configuración para el hash de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Configuración para el hash de contraseñas.
+# Los hashes con un costo distinto de BCRYPT_ROUNDS se marcan como obsoletos
+# y se recalculan en el siguiente login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verificar si la contraseña coincide con el hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    """Verificar la contraseña y devolver un hash nuevo si el actual está obsoleto"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     """Crear hash de la contraseña"""
     return pwd_context.hash(password)
 
+class HashingPool:
+    """
+    Ejecuta bcrypt en un pool de procesos acotado para no consumir el CPU ni el
+    threadpool de los workers que atienden peticiones. Si hay demasiadas
+    operaciones en espera responde 503 en lugar de encolar sin límite.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pendientes = 0
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.pendientes >= self.max_queue:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio saturado, intenta de nuevo en unos segundos",
+                headers={"Retry-After": "1"},
+            )
+        self.pendientes += 1
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        except BrokenProcessPool:
+            # Un proceso murió: se descarta el pool para recrearlo en la siguiente llamada
+            self._executor = None
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio saturado, intenta de nuevo en unos segundos",
+                headers={"Retry-After": "1"},
+            )
+        finally:
+            self.pendientes -= 1
+
+    async def warm_up(self):
+        """Arrancar los procesos del pool antes de la primera petición (spawn es lento)"""
+        if self.workers <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, os.getpid) for _ in range(self.workers)))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+hashing_pool = HashingPool(settings.BCRYPT_WORKERS, settings.BCRYPT_MAX_QUEUE)
+
+async def hash_password_async(password: str) -> str:
+    """Crear hash de la contraseña fuera del proceso que atiende la petición"""
+    inicio = time.perf_counter()
+    try:
+        return await hashing_pool.run(get_password_hash, password)
+    finally:
+        observe_bcrypt("hash", inicio)
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    """Verificar la contraseña fuera del proceso; devuelve (válida, hash_nuevo_o_None)"""
+    inicio = time.perf_counter()
+    try:
+        return await hashing_pool.run(verify_and_update_password, plain_password, hashed_password)
+    finally:
+        observe_bcrypt("verify", inicio)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crear token JWT"""
     to_encode = data.copy()
@@ -0,0 +1,101 @@
+import logging
+import random
+import threading
+import time
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.metrics import current_route, statement_duration, track_statement_start
+
+# Registro de consultas lentas (SLOW_QUERY_MS > 0).
+# Cada sentencia se cronometra con eventos del engine; las que superan el umbral se
+# registran con sus parámetros, la ruta que las originó y, opcionalmente, la salida
+# de EXPLAIN (ANALYZE, BUFFERS). Se muestrea una fracción (SLOW_QUERY_SAMPLE_RATE) y
+# se limita la cantidad por minuto para que sea seguro dejarlo activo en producción.
+
+logger = logging.getLogger("app.slow_queries")
+
+# Sentencias que admiten EXPLAIN (el resto, como DDL o SAVEPOINT, se registra sin plan)
+EXPLICABLES = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "VALUES")
+
+# Longitud máxima de la sentencia y de los parámetros en el registro
+MAX_TEXTO = 2000
+
+class RateLimiter:
+    """Cubeta de fichas: como máximo `por_minuto` eventos, repuestos de forma continua"""
+
+    def __init__(self, por_minuto: int):
+        self.capacidad = float(por_minuto)
+        self.fichas = float(por_minuto)
+        self.actualizado = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            ahora = time.monotonic()
+            self.fichas = min(self.capacidad, self.fichas + (ahora - self.actualizado) * self.capacidad / 60)
+            self.actualizado = ahora
+            if self.fichas < 1:
+                return False
+            self.fichas -= 1
+            return True
+
+def _recortar(valor) -> str:
+    texto = valor if isinstance(valor, str) else repr(valor)
+    return texto if len(texto) <= MAX_TEXTO else texto[:MAX_TEXTO] + "…"
+
+class SlowQueryLog:
+    """Listeners de un engine que registran las sentencias lentas"""
+
+    def __init__(self):
+        self.limitador = RateLimiter(settings.SLOW_QUERY_MAX_PER_MINUTE)
+        self.omitidas = 0
+
+    def install(self, engine):
+        # El inicio de cada sentencia lo anota el mismo listener que usan las métricas
+        track_statement_start(engine)
+        event.listen(engine, "after_cursor_execute", self._despues)
+
+    def uninstall(self, engine):
+        event.remove(engine, "after_cursor_execute", self._despues)
+
+    def _despues(self, conn, cursor, statement, parameters, context, executemany):
+        duracion = statement_duration(context)
+        if duracion is None or duracion * 1000 < settings.SLOW_QUERY_MS:
+            return
+        duracion_ms = duracion * 1000
+        if random.random() >= settings.SLOW_QUERY_SAMPLE_RATE or not self.limitador.allow():
+            self.omitidas += 1
+            return
+        omitidas, self.omitidas = self.omitidas, 0
+        plan = None
+        if settings.SLOW_QUERY_EXPLAIN and not executemany and statement.lstrip().upper().startswith(EXPLICABLES):
+            plan = self._explicar(conn, statement, parameters)
+        logger.warning(
+            "Consulta lenta: %.1f ms en %s%s\n%s\nParámetros: %s%s",
+            duracion_ms, current_route() or "(fuera de una petición)",
+            f" ({omitidas} omitidas desde el último registro)" if omitidas else "",
+            _recortar(statement), _recortar(parameters),
+            f"\n{plan}" if plan else "",
+        )
+
+    def _explicar(self, conn, statement, parameters):
+        """
+        EXPLAIN (ANALYZE, BUFFERS) en la misma conexión y transacción, con un cursor
+        aparte y dentro de un savepoint que siempre se revierte: ANALYZE vuelve a
+        ejecutar la sentencia, y así una escritura o un error no afectan a la
+        transacción de la petición.
+        """
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT explicar_consulta_lenta")
+            try:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+                return "\n".join(fila[0] for fila in cursor.fetchall())
+            except Exception as error:
+                return f"EXPLAIN falló: {error}"
+            finally:
+                cursor.execute("ROLLBACK TO SAVEPOINT explicar_consulta_lenta")
+        except Exception as error:
+            return f"EXPLAIN no disponible: {error}"
+        finally:
+            cursor.close()
@@ -1,17 +1,230 @@
-from sqlalchemy import create_engine
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, raiseload
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.core.metrics import instrument_sql
+from app.core.slow_queries import SlowQueryLog
+from app.core.db_pool import (
+    InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool, instrument_engine
+)
 
-engine = create_engine(settings.DATABASE_URL)
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Los engines se crean en el primer uso y no al importar el módulo: importar la
+# aplicación (pruebas, alembic, herramientas) no requiere la base de datos, y con
+# varios workers cada proceso crea su propio pool después del fork.
+_engine = None
+_async_engine = None
+_engine_lock = threading.Lock()
+slow_query_log = SlowQueryLog()
+
+def get_engine():
+    """Engine síncrono (psycopg2), creado en el primer uso"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_engine(settings.DATABASE_URL, poolclass=InstrumentedQueuePool, **POOL_OPTIONS)
+            instrument_engine(_engine)
+            instrument_sql(_engine)
+            if settings.SLOW_QUERY_MS > 0:
+                slow_query_log.install(_engine)
+    return _engine
+
+def get_async_engine():
+    """Engine asíncrono (asyncpg) de la ruta DB_ASYNC, creado en el primer uso"""
+    global _async_engine
+    with _engine_lock:
+        if _async_engine is None:
+            _async_engine = create_async_engine(
+                settings.ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncAdaptedQueuePool, **POOL_OPTIONS
+            )
+            instrument_engine(_async_engine.sync_engine)
+            instrument_sql(_async_engine.sync_engine)
+            if settings.SLOW_QUERY_MS > 0:
+                slow_query_log.install(_async_engine.sync_engine)
+    return _async_engine
+
+def active_engine():
+    """Engine (síncrono) cuyo pool atiende las peticiones, según DB_ASYNC"""
+    return get_async_engine().sync_engine if settings.DB_ASYNC else get_engine()
+
+async def dispose_engines():
+    """Cerrar las conexiones de los pools; el siguiente uso crea engines nuevos"""
+    global _engine, _async_engine
+    engine, async_engine = _engine, _async_engine
+    _engine = _async_engine = None
+    if async_engine is not None:
+        await async_engine.dispose()
+    if engine is not None:
+        await run_in_threadpool(engine.dispose)
+
+# Las sesiones se enlazan al engine al abrirse (new_session, get_db).
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+# Ruta asíncrona nativa (asyncpg), activada con DB_ASYNC.
+# expire_on_commit=False evita recargas implícitas (IO) al serializar tras un commit.
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+def install_lazy_load_guard(session_factory):
+    """
+    Hacer que cualquier carga perezosa de relaciones que emita SQL lance un error.
+    Obliga a declarar selectinload/joinedload en las consultas de los endpoints.
+    """
+    @event.listens_for(session_factory, "do_orm_execute")
+    def _raise_on_lazy_load(orm_execute_state):
+        if (orm_execute_state.is_select
+                and not orm_execute_state.is_column_load
+                and not orm_execute_state.is_relationship_load):
+            orm_execute_state.statement = orm_execute_state.statement.options(
+                raiseload("*", sql_only=True)
+            )
+
+if settings.RAISE_ON_LAZY_LOAD:
+    install_lazy_load_guard(SessionLocal)
+
+class ThreadedSession:
+    """
+    Envuelve una Session síncrona con la misma interfaz awaitable que AsyncSession.
+    Cada operación con IO se ejecuta en el threadpool, de modo que los endpoints
+    async funcionan igual con DB_ASYNC activado o desactivado.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, params=None, **kwargs):
+        def _execute():
+            result = self.sync_session.execute(statement, params, **kwargs)
+            # Igual que AsyncSession: las filas se leen completas dentro del hilo
+            if isinstance(result, CursorResult) and not result.returns_rows:
+                return result
+            return result.freeze()()
+        return await run_in_threadpool(_execute)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return (await self.execute(statement, params, **kwargs)).scalars()
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.sync_session, *args, **kwargs)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+async def warm_up_pool(conexiones: int) -> int:
+    """
+    Abrir `conexiones` conexiones del pool activo a la vez y devolverlas libres, para
+    que las primeras peticiones no paguen el costo de conectarse (TCP, TLS, autenticación).
+    """
+    conexiones = min(conexiones, settings.DB_POOL_SIZE)
+    if conexiones <= 0:
+        return 0
+    if settings.DB_ASYNC:
+        engine = get_async_engine()
+
+        async def abrir():
+            conexion = await engine.connect()
+            await conexion.exec_driver_sql("SELECT 1")
+            return conexion
+
+        abiertas = await asyncio.gather(*(abrir() for _ in range(conexiones)))
+        for conexion in abiertas:
+            await conexion.close()
+    else:
+        engine = get_engine()
+
+        def abrir():
+            conexion = engine.connect()
+            conexion.exec_driver_sql("SELECT 1")
+            return conexion
+
+        abiertas = await asyncio.gather(*(run_in_threadpool(abrir) for _ in range(conexiones)))
+        for conexion in abiertas:
+            conexion.close()
+    return conexiones
+
+def new_session():
+    """Sesión síncrona enlazada al engine de la aplicación"""
+    return SessionLocal(bind=get_engine())
+
+@asynccontextmanager
+async def open_session():
+    """
+    Sesión awaitable según DB_ASYNC (AsyncSession o ThreadedSession), para trabajo
+    que no debe depender de la sesión de una petición
+    """
+    if settings.DB_ASYNC:
+        async with AsyncSessionLocal(bind=get_async_engine()) as db:
+            yield db
+    else:
+        db = ThreadedSession(new_session())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+async def get_db():
+    async with open_session() as db:
         yield db
+
+async def stream_partitions(statement, size: int = 1000):
+    """
+    Recorrer el resultado de una consulta en bloques de `size` filas con un cursor
+    del lado del servidor. Abre su propia sesión, independiente de la petición, para
+    poder alimentar un StreamingResponse después de que el endpoint haya retornado.
+    """
+    statement = statement.execution_options(yield_per=size)
+    if settings.DB_ASYNC:
+        async with AsyncSessionLocal(bind=get_async_engine()) as db:
+            result = await db.stream(statement)
+            async for filas in result.mappings().partitions():
+                yield filas
+        return
+    db = new_session()
+    try:
+        result = await run_in_threadpool(db.execute, statement)
+        particiones = result.mappings().partitions()
+        while (filas := await run_in_threadpool(next, particiones, None)) is not None:
+            yield filas
     finally:
-        db.close()
\ No newline at end of file
+        await run_in_threadpool(db.close)
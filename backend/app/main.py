@@ -1,19 +1,55 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from anyio.to_thread import current_default_thread_limiter
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.database import engine, Base
+from app.database import active_engine, warm_up_pool, dispose_engines
+from app.core.db_pool import pool_status
+from app.core.metrics import instrument_routes, render_metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.security import hashing_pool
 from app.routers import auth, eventos
 
-# Crear las tablas
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
+# El esquema lo gestiona solo Alembic (`alembic upgrade head`, una vez por despliegue).
+# Los workers no crean tablas ni se conectan al importar la aplicación: al arrancar
+# calientan el pool y los procesos de bcrypt, y /ready responde 200 cuando terminan.
+
+async def calentar(app: FastAPI) -> bool:
+    """Abrir las conexiones iniciales del pool; False si la base de datos no responde"""
+    try:
+        await warm_up_pool(settings.DB_POOL_WARMUP)
+    except Exception:
+        logger.exception("No se pudo calentar el pool de conexiones")
+        return False
+    app.state.listo = True
+    return True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.listo = False
+    await hashing_pool.warm_up()
+    await calentar(app)
+    yield
+    # Terminar los procesos de hash de contraseñas y cerrar las conexiones
+    hashing_pool.shutdown()
+    await dispose_engines()
 
 # Crear la aplicación
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
+# Perfilado bajo demanda; se añade antes que CORS para que CORS lo envuelva y el
+# informe lleve las cabeceras Access-Control-* (y las X-Profiled-* expuestas)
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +57,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Last-Modified",
+                    "X-Profiled-Status", "X-Profiled-Duration-Ms"],
 )
 
 # Incluir routers
@@ -33,4 +71,37 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "environment": settings.ENVIRONMENT}
\ No newline at end of file
+    return {"status": "healthy", "environment": settings.ENVIRONMENT}
+
+@app.get("/ready")
+async def readiness(response: Response):
+    """
+    Listo para recibir tráfico cuando el pool está caliente. Si el calentamiento
+    falló al arrancar (base de datos no disponible) se reintenta en cada consulta.
+    """
+    if not app.state.listo:
+        await calentar(app)
+    if not app.state.listo:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    pool = pool_status(active_engine().pool)
+    return {
+        "status": "ready" if app.state.listo else "starting",
+        "pool": {"size": pool["size"], "idle": pool["idle"], "checked_out": pool["checked_out"]},
+    }
+
+@app.get("/health/pool")
+async def pool_health():
+    """Estado del pool de conexiones: en uso, libres, desborde y tiempo de espera"""
+    activo = active_engine()
+    return {"driver": activo.dialect.driver, "pool": pool_status(activo.pool)}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas en formato de Prometheus"""
+    cuerpo, content_type = render_metrics(
+        hashing_pool.pendientes, pool_status(active_engine().pool), current_default_thread_limiter()
+    )
+    return Response(cuerpo, media_type=content_type)
+
+# Debe ir después de registrar todas las rutas
+instrument_routes(app)
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Enum, Index, Computed, DDL, UniqueConstraint, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -11,6 +12,9 @@ class EstadosEvento(enum.Enum):
     FINALIZADO = "Finalizado"
     CANCELADO = "Cancelado"
 
+# Configuración de búsqueda de texto: español con lematización y sin acentos.
+CONFIG_BUSQUEDA = "es_unaccent"
+
 # Clase que representa la tabla de eventos en la base de datos.
 class Evento(Base):
     __tablename__ = "eventos"
@@ -25,13 +29,57 @@ class Evento(Base):
     registrado = Column(Integer, default=0, nullable=False)
     estado = Column(Enum(EstadosEvento), default=EstadosEvento.PENDIENTE)
     creado = Column(DateTime(timezone=True), server_default=func.now())
-    modificado = Column(DateTime(timezone=True), server_default=func.now())
+    modificado = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     # Relaciones con  usuarios y sesiones
     creador_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Vector de búsqueda calculado por Postgres; el título pesa más que la descripción
+    busqueda = deferred(Column(TSVECTOR, Computed(
+        f"setweight(to_tsvector('{CONFIG_BUSQUEDA}', coalesce(titulo, '')), 'A') || "
+        f"setweight(to_tsvector('{CONFIG_BUSQUEDA}', coalesce(descripcion, '')), 'B')",
+        persisted=True
+    )))
     creador = relationship("User", back_populates="eventos_creados")
     sesiones = relationship("Sesion", back_populates="evento")
     inscripciones = relationship("RegistroEvento", back_populates="evento")
 
+    __table_args__ = (
+        # Índice para la paginación por cursor sobre (fecha_inicio, id)
+        Index("ix_eventos_fecha_inicio_id", "fecha_inicio", "id"),
+        Index("ix_eventos_busqueda", "busqueda", postgresql_using="gin"),
+        # Eventos creados por un usuario, en orden cronológico
+        Index("ix_eventos_creador_id_fecha_inicio", "creador_id", "fecha_inicio"),
+        # Filtros y ordenamientos del listado
+        Index("ix_eventos_estado_fecha_inicio_id", "estado", "fecha_inicio", "id"),
+        Index("ix_eventos_creado_id", "creado", "id"),
+    )
+
+# Eventos con cupo disponible; el listado usa este mismo predicado para que
+# Postgres pueda elegir el índice parcial.
+CON_CUPO = Evento.registrado < Evento.capacidad
+Index("ix_eventos_con_cupo_fecha_inicio", Evento.fecha_inicio, Evento.id, postgresql_where=CON_CUPO)
+Index("ix_eventos_lugar_fecha_inicio", func.lower(Evento.lugar), Evento.fecha_inicio)
+
+# La configuración de búsqueda debe existir antes de crear la tabla.
+# Si la extensión unaccent no está disponible se usa solo la lematización en español.
+event.listen(Evento.__table__, "before_create", DDL(f"""
+DO $$
+BEGIN
+    BEGIN
+        CREATE EXTENSION IF NOT EXISTS unaccent;
+    EXCEPTION WHEN OTHERS THEN
+        RAISE NOTICE 'Extension unaccent no disponible';
+    END;
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{CONFIG_BUSQUEDA}') THEN
+        CREATE TEXT SEARCH CONFIGURATION {CONFIG_BUSQUEDA} (COPY = pg_catalog.spanish);
+        IF EXISTS (SELECT 1 FROM pg_ts_dict WHERE dictname = 'unaccent') THEN
+            ALTER TEXT SEARCH CONFIGURATION {CONFIG_BUSQUEDA}
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+        END IF;
+    END IF;
+END
+$$;
+""").execute_if(dialect="postgresql"))
+
 # Clase que representa las sesiones de un evento.
 class Sesion(Base):
     __tablename__ = "sesiones"
@@ -45,11 +93,16 @@ class Sesion(Base):
     biografia_orador = Column(Text)
     capacidad = Column(Integer, default=50, nullable=False)
     creado = Column(DateTime(timezone=True), server_default=func.now())
-    modificado = Column(DateTime(timezone=True), server_default=func.now())
+    modificado = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     # Relaciones con eventos
     evento_id = Column(Integer, ForeignKey("eventos.id"), nullable=False)
     evento = relationship("Evento", back_populates="sesiones")
 
+    __table_args__ = (
+        # Sesiones de un evento en orden cronológico
+        Index("ix_sesiones_evento_id_fecha_inicio", "evento_id", "fecha_inicio"),
+    )
+
 # Clase que representa el registro de usuarios en eventos.
 class RegistroEvento(Base):
     __tablename__ = "registro_eventos"
@@ -61,4 +114,11 @@ class RegistroEvento(Base):
     confirmado = Column(Boolean, default=False)
 
     usuario = relationship("User", back_populates="inscripciones")
-    evento = relationship("Evento", back_populates="inscripciones")
\ No newline at end of file
+    evento = relationship("Evento", back_populates="inscripciones")
+
+    __table_args__ = (
+        # Un usuario solo puede registrarse una vez en cada evento
+        UniqueConstraint("user_id", "evento_id", name="uq_registro_eventos_user_evento"),
+        # Asistentes de un evento; la restricción única ya cubre las búsquedas por usuario
+        Index("ix_registro_eventos_evento_id_id", "evento_id", "id"),
+    )
\ No newline at end of file
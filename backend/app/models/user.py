@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -21,7 +21,14 @@ class User(Base):
     role = Column(Enum(Roles), default=Roles.ASISTENTE)
     is_active = Column(Boolean, default=True)
     creado = Column(DateTime(timezone=True), server_default=func.now())
-    modificado = Column(DateTime(timezone=True), server_default=func.now())
+    modificado = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     eventos_creados = relationship("Evento", back_populates="creador")
     inscripciones = relationship("RegistroEvento", back_populates="usuario")
+
+# Búsqueda por prefijo (LIKE 'texto%') sin distinguir mayúsculas en el directorio de usuarios.
+# text_pattern_ops permite usar el índice con LIKE sin importar la collation de la base de datos.
+Index("ix_users_email_prefijo", func.lower(User.email).label("email_prefijo"),
+      postgresql_ops={"email_prefijo": "text_pattern_ops"})
+Index("ix_users_nombre_prefijo", func.lower(User.nombre).label("nombre_prefijo"),
+      postgresql_ops={"nombre_prefijo": "text_pattern_ops"})
@@ -1,12 +1,19 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from app.models.user import User
+from app.models.user import User, Roles
 from app.schemas.user import *
 from app.core.security import *
 from app.core.config import settings
+from app.core.cache import principal_cache
+from app.core.profiling import create_profiling_token
+from app.services.exportacion import exportar
+from app.services.paginacion import encode_cursor, decode_cursor
+from app.services.consultas import consulta_usuarios, conteo_usuarios
 from passlib.context import CryptContext
 
 router = APIRouter()
@@ -15,19 +22,26 @@ router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-def get_user_by_email(db: Session, email: str):
+async def get_user_by_email(db: AsyncSession, email: str):
     """Obtener usuario por correo"""
-    return db.query(User).filter(User.email == email).first()
+    return await db.scalar(select(User).where(User.email == email))
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.email == username).first()  
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_email(db, email=username)
     if not user:
         return False
-    if not verify_password(password, user.password):
+    # bcrypt es costoso en CPU: se ejecuta en el pool de procesos dedicado
+    valida, nuevo_hash = await verify_password_async(password, user.password)
+    if not valida:
         return False
+    if nuevo_hash:
+        # El costo de bcrypt cambió: se guarda el hash recalculado
+        user.password = nuevo_hash
+        await db.commit()
+        await db.refresh(user)
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     """Obtener usuario actual desde el token"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,24 +56,97 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except:
         raise credentials_exception
     
-    user = get_user_by_email(db, email=email)
-    if user is None:
+    # El usuario resuelto se guarda en caché para no consultar la base de datos en cada petición
+    datos = await principal_cache.get(email)
+    if datos is None:
+        user = await get_user_by_email(db, email=email)
+        if user is None:
+            raise credentials_exception
+        principal = UserResponse.model_validate(user)
+        await principal_cache.set(email, principal.model_dump(mode="json"), settings.PRINCIPAL_CACHE_TTL)
+    else:
+        principal = UserResponse.model_validate(datos)
+
+    if not principal.is_active:
         raise credentials_exception
-    return user
+    return principal
+
+async def invalidate_principal(*emails: str):
+    """Quitar de la caché a los usuarios modificados o eliminados"""
+    await principal_cache.delete(*emails)
 
 @router.get("/users/", response_model=list[UserResponse],
-        summary="Obtener lista de todos los usuarios",
-        description="Recupera una lista de todos los usuarios registrados en el sistema.",
+        summary="Obtener lista de usuarios",
+        description="Recupera una página del directorio de usuarios ordenada por id. Si hay más resultados se devuelve "
+                    "la cabecera X-Next-Cursor, cuyo valor se envía en el parámetro cursor para pedir la siguiente página. "
+                    "Con include_total se devuelve además el total de usuarios que cumplen los filtros en X-Total-Count.",
         response_description="Lista de objetos UserResponse.",
         responses={
             status.HTTP_200_OK: {"description": "Lista de usuarios recuperada exitosamente."},
+            status.HTTP_400_BAD_REQUEST: {"description": "El cursor enviado no es válido."},
             status.HTTP_401_UNAUTHORIZED: {"description": "No autenticado. Se requiere un token de acceso válido."},
             status.HTTP_403_FORBIDDEN: {"description": "No autorizado. El usuario no tiene permisos para ver esta lista."}})
-def obtener_usuarios(db: Session = Depends(get_db)):
-    """Obtener lista de usuarios"""
-    usuarios = db.query(User).all()
+async def obtener_usuarios(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de la cabecera X-Next-Cursor"),
+    role: Optional[Roles] = Query(None, description="Rol del usuario"),
+    is_active: Optional[bool] = Query(None, description="Usuarios activos o inactivos"),
+    q: Optional[str] = Query(None, min_length=1, description="Prefijo del email o del nombre, sin distinguir mayúsculas"),
+    include_total: bool = Query(True, description="Calcular el total en X-Total-Count (desactivar en directorios grandes)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Obtener lista de usuarios paginada"""
+    filtros = dict(role=role, is_active=is_active, q=q)
+    despues_de = decode_cursor(cursor, int)[0] if cursor else None
+    usuarios = (await db.scalars(consulta_usuarios(limit, despues_de, **filtros))).all()
+    if len(usuarios) > limit:
+        usuarios = usuarios[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(usuarios[-1].id)
+    if include_total:
+        response.headers["X-Total-Count"] = str(await db.scalar(conteo_usuarios(**filtros)))
     return usuarios
 
+@router.get("/users/exportar",
+        summary="Exportar la lista de usuarios",
+        description="Descarga todos los usuarios en NDJSON o CSV, en streaming y sin contraseñas. Requiere permisos de administrador.",
+        response_description="Archivo NDJSON o CSV con un usuario por fila.",
+        responses={
+            status.HTTP_200_OK: {"description": "Exportación iniciada.", "content": {
+                "application/x-ndjson": {}, "text/csv": {}}},
+            status.HTTP_401_UNAUTHORIZED: {"description": "No autenticado. Se requiere un token de acceso válido."},
+            status.HTTP_403_FORBIDDEN: {"description": "No autorizado. Se requieren permisos de administrador."}})
+async def exportar_usuarios(
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson o csv"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Exportar usuarios en streaming"""
+    if current_user.role != Roles.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Se requieren permisos de administrador")
+    return exportar(select(
+        User.id, User.email, User.nombre, User.role, User.is_active, User.creado, User.modificado
+    ).order_by(User.id), formato, "usuarios")
+
+@router.post("/profiling/token", response_model=dict,
+        summary="Obtener un token de perfilado",
+        description="Genera un token firmado de corta duración. Una petición que lo envíe en la cabecera X-Profile se ejecuta bajo un profiler y devuelve el informe en lugar de su respuesta. Requiere permisos de administrador.",
+        response_description="Token, cabecera a usar y expiración.",
+        responses={
+            status.HTTP_401_UNAUTHORIZED: {"description": "No autenticado. Se requiere un token de acceso válido."},
+            status.HTTP_403_FORBIDDEN: {"description": "No autorizado. Se requieren permisos de administrador."},
+            status.HTTP_404_NOT_FOUND: {"description": "El perfilado no está habilitado (PROFILING_ENABLED)."}})
+async def token_perfilado(
+    minutos: Optional[int] = Query(None, ge=1, le=120, description="Validez en minutos"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Token de perfilado para administradores"""
+    if current_user.role != Roles.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Se requieren permisos de administrador")
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="El perfilado no está habilitado")
+    token, expira = create_profiling_token(minutos)
+    return {"token": token, "header": "X-Profile", "expira": expira}
+
 @router.post("/registrar/", response_model=UserResponse,
         summary="Registrar un nuevo usuario",
         description="Permite crear una nueva cuenta de usuario en el sistema con un email, nombre, contraseña y rol.",
@@ -70,10 +157,10 @@ def obtener_usuarios(db: Session = Depends(get_db)):
             status.HTTP_422_UNPROCESSABLE_ENTITY: {"description": "Error de validación de datos de entrada (ej. formato de email inválido, contraseña débil)."},
             status.HTTP_500_INTERNAL_SERVER_ERROR: {"description": "Error interno del servidor durante el registro."}
         } )
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Registrar nuevo usuario"""
     # Verificar si el usuario ya existe
-    db_user = get_user_by_email(db, email=user.email)
+    db_user = await get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=400,
@@ -81,7 +168,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Crear nuevo usuario
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password_async(user.password)
     db_user = User(
         email=user.email,
         password=hashed_password,
@@ -91,14 +178,14 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     
     try:
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         print("Usuario creado exitosamente:", db_user.email)
         
         return UserResponse.model_validate(db_user)
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print("Error creando usuario:", str(e))
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
 
@@ -114,11 +201,12 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
             status.HTTP_422_UNPROCESSABLE_ENTITY: {"description": "Error de validación de datos de entrada."},
             status.HTTP_500_INTERNAL_SERVER_ERROR: {"description": "Error interno del servidor durante la actualización."}
         })
-def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
+async def update_user(user_id: int, user: UserUpdate, db: AsyncSession = Depends(get_db)):
     """Actualizar usuario"""
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    email_anterior = db_user.email
     
     if user.email:
         db_user.email = user.email
@@ -130,12 +218,13 @@ def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
         db_user.is_active = user.is_active
     
     try:
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await invalidate_principal(email_anterior, db_user.email)
+        await db.refresh(db_user)
         return UserResponse.model_validate(db_user)
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
 
 @router.delete("/eliminar/{user_id}", response_model=UserResponse, 
@@ -149,19 +238,21 @@ def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db)):
                 status.HTTP_404_NOT_FOUND: {"description": "Usuario no encontrado."},
                 status.HTTP_500_INTERNAL_SERVER_ERROR: {"description": "Error interno del servidor durante la eliminación."}
             })
-def delete_user(user_id: int, db: Session = Depends(get_db)):
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
     """Eliminar usuario"""
-    db_user = db.query(User).filter(User.id == user_id).first()
+    db_user = await db.get(User, user_id)
     if not db_user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     
     try:
-        db.delete(db_user)
-        db.commit()
-        return UserResponse.model_validate(db_user)
+        usuario_eliminado = UserResponse.model_validate(db_user)
+        await db.delete(db_user)
+        await db.commit()
+        await invalidate_principal(usuario_eliminado.email)
+        return usuario_eliminado
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
 
 @router.post("/login", response_model=dict,
@@ -172,9 +263,9 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
             status.HTTP_200_OK: {"description": "Inicio de sesión exitoso, token de acceso generado."},
             status.HTTP_401_UNAUTHORIZED: {"description": "Correo o contraseña incorrectos, o credenciales inválidas."}
         })
-def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """Login de usuario con correo y contraseña"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
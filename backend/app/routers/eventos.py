@@ -1,59 +1,218 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
+from datetime import datetime
 from app.database import get_db
 from app.models.event import Evento, RegistroEvento, EstadosEvento, Sesion
-from app.models.user import User
+from app.models.user import Roles, User
+from app.schemas.user import UserResponse
 from app.routers.auth import get_current_user
+from app.services.paginacion import encode_cursor, decode_cursor_para, huella_filtros
+from app.services.busqueda import build_search_query
+from app.services.consultas import (
+    ORDENES_EVENTOS, consulta_eventos, clave_orden, consulta_mis_eventos, consulta_mis_registros,
+    consulta_sesiones_evento, consulta_registros_evento
+)
+from app.services.registros import reservar_cupo
+from app.services.admision import admision_registros
+from app.services.lotes import crear_eventos_lote, crear_sesiones_lote
+from app.services.importacion import importar_asistentes
+from app.services.exportacion import exportar
+from app.services.estadisticas import calcular_estadisticas, invalidar_estadisticas
+from app.services.json_rapido import proyectar_eventos, evento_a_dict, fast_json_response
+from app.services.campos import parse_fields, opciones_carga, respuesta_parcial
+from app.core.config import settings
+from app.services.cache_http import compute_etag, cache_headers, is_not_modified, not_modified_response
 from app.schemas.event import (
     EventoCreate, EventoUpdate, EventoResponse, EventoCompleto,
-    SesionCreate, SesionUpdate, SesionResponse, RegistroEventoResponse
+    SesionCreate, SesionUpdate, SesionResponse, RegistroEventoResponse,
+    EventosLoteCreate, SesionesLoteCreate, ImportacionResumen, EstadisticasEventos
 )
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 
 router = APIRouter()
 
+# Nombre y última modificación del creador de cada evento, para los validadores de
+# caché: la respuesta incluye el nombre, así que editar al creador cambia ETag y Last-Modified
+NOMBRE_CREADOR = select(User.nombre).where(User.id == Evento.creador_id).scalar_subquery()
+MODIFICADO_CREADOR = (
+    select(User.modificado).where(User.id == Evento.creador_id).scalar_subquery().label("creador_modificado")
+)
+
+async def get_evento_con_creador(db: AsyncSession, evento_id: int):
+    """Recargar un evento junto con su creador en una sola consulta tras una escritura"""
+    return await db.scalar(select(Evento).options(
+        joinedload(Evento.creador)
+    ).where(Evento.id == evento_id).execution_options(populate_existing=True))
+
 """Endpoins para todos los modelos de eventos."""
 # ENPOINS PARA LOS EVENTOS. 
 @router.get("/", response_model=List[EventoResponse], 
             summary="Obtener Lista de eventos", 
-            description="Lista todos los eventos registrados independientes del usuario.",
+            description="Lista todos los eventos registrados independientes del usuario. "
+                        "Admite paginación por cursor: si hay más resultados se devuelve la cabecera "
+                        "X-Next-Cursor, cuyo valor se envía en el parámetro cursor para pedir la siguiente página. "
+                        "Con search se usa búsqueda de texto completo y, si no se indica sort, los resultados se ordenan por relevancia. "
+                        "Admite filtros por rango de fecha de inicio, estado, lugar, creador y cupo disponible. "
+                        "Con fields se devuelven solo los campos indicados (por ejemplo fields=id,titulo,fecha_inicio). "
+                        "Responde 304 si el ETag enviado en If-None-Match sigue vigente.",
             responses= {
                 status.HTTP_200_OK: {"description": "Lista de eventos recuperada exitosamente."},
+                status.HTTP_304_NOT_MODIFIED: {"description": "La página no ha cambiado desde la versión que tiene el cliente."},
+                status.HTTP_400_BAD_REQUEST: {"description": "El cursor o los campos enviados no son válidos."},
                 status.HTTP_404_NOT_FOUND: {"description": "No se encontraron eventos en el sistema."}
             })
-def get_eventos(
-    skip: int = 0, 
-    limit: int = 10,
-    search: Optional[str] = Query(None, description="Buscar por título"),
-    db: Session = Depends(get_db)
+async def get_eventos(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de la cabecera X-Next-Cursor (reemplaza a skip)"),
+    search: Optional[str] = Query(None, description="Buscar por título y descripción"),
+    fecha_inicio_desde: Optional[datetime] = Query(None, description="Eventos que empiezan en esta fecha o después"),
+    fecha_inicio_hasta: Optional[datetime] = Query(None, description="Eventos que empiezan antes de esta fecha"),
+    estado: Optional[EstadosEvento] = Query(None, description="Estado del evento"),
+    lugar: Optional[str] = Query(None, description="Lugar exacto, sin distinguir mayúsculas"),
+    creador_id: Optional[int] = Query(None, description="Id del creador del evento"),
+    has_capacity: Optional[bool] = Query(None, description="true: solo eventos con cupo; false: solo eventos llenos"),
+    sort: Optional[str] = Query(None, pattern="^-?(fecha_inicio|creado)$",
+                                description="fecha_inicio, -fecha_inicio, creado o -creado (por defecto fecha_inicio, o relevancia con search)"),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (por defecto todos)"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Obtener lista de eventos con paginación y búsqueda"""
-    query = db.query(Evento)
-    if search:
-        query = query.filter(
-            or_(
-                Evento.titulo.ilike(f"%{search}%"),
-                Evento.descripcion.ilike(f"%{search}%")
-            )
-        )
-    eventos = query.offset(skip).limit(limit).all()
+    """Obtener lista de eventos con paginación, búsqueda y filtros"""
+    campos = parse_fields(fields, EventoResponse)
+    tsquery = build_search_query(search) if search else None
+    orden = sort or "fecha_inicio"
+    # Columnas que se leen aunque no se pidan: la clave del cursor
+    obligatorias = ("id", ORDENES_EVENTOS[orden][0].key)
+    # El cursor solo vale para el mismo orden y los mismos filtros con que se generó
+    etiqueta = f"{orden}:" + huella_filtros(
+        search, fecha_inicio_desde, fecha_inicio_hasta, estado, lugar, creador_id, has_capacity
+    )
+    despues_de = decode_cursor_para(cursor, etiqueta, datetime, int) if cursor else None
+    query = consulta_eventos(
+        limit, skip, despues_de, tsquery, sort,
+        fecha_inicio_desde=fecha_inicio_desde, fecha_inicio_hasta=fecha_inicio_hasta,
+        estado=estado, lugar=lugar, creador_id=creador_id, has_capacity=has_capacity,
+    )
+
+    # Validador de la página: mismas filas, solo las columnas que cambian con una escritura
+    # (incluido el nombre del creador, que se devuelve y cambia al editar el usuario)
+    versiones = (await db.execute(query.with_only_columns(
+        Evento.id, Evento.modificado, Evento.registrado, Evento.creador_id, NOMBRE_CREADOR, MODIFICADO_CREADOR
+    ))).all()
+    ultima_modificacion = max(
+        (v for fila in versiones for v in (fila.modificado, fila.creador_modificado) if v), default=None
+    )
+    # FAST_JSON produce otros bytes para los mismos datos: la representación forma parte del ETag
+    representacion = "fast_json" if settings.FAST_JSON else "response_model"
+    headers = cache_headers(
+        compute_etag("eventos", representacion, campos, *map(tuple, versiones)), ultima_modificacion
+    )
+    # Una página puede cambiar por filas nuevas o borradas, así que solo se valida por ETag
+    if is_not_modified(request, headers["ETag"]):
+        return not_modified_response(headers)
+    response.headers.update(headers)
+
+    if settings.FAST_JSON:
+        eventos = (await db.execute(proyectar_eventos(query, campos, obligatorias))).all()
+    elif campos:
+        eventos = (await db.scalars(query.options(*opciones_carga(campos, obligatorias)))).all()
+    else:
+        eventos = (await db.scalars(query.options(joinedload(Evento.creador)))).all()
+    if len(eventos) > limit:
+        eventos = eventos[:limit]
+        ultimo = eventos[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(etiqueta, *clave_orden(ultimo, orden))
+    if settings.FAST_JSON:
+        return fast_json_response([evento_a_dict(fila, campos) for fila in eventos], response)
+    if campos:
+        return respuesta_parcial(eventos, EventoResponse, campos, response)
     return eventos
 
+@router.get("/exportar/eventos",
+            summary="Exportar el catálogo de eventos",
+            description="Descarga todos los eventos en NDJSON o CSV. Las filas se envían a medida que se leen "
+                        "de la base de datos, sin construir la lista completa en memoria.",
+            response_description="Archivo NDJSON o CSV con un evento por fila.",
+            responses={
+                status.HTTP_200_OK: {"description": "Exportación iniciada.", "content": {
+                    "application/x-ndjson": {}, "text/csv": {}}}
+            })
+async def exportar_eventos(
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson o csv")
+):
+    """Exportar eventos en streaming"""
+    return exportar(select(
+        Evento.id, Evento.titulo, Evento.descripcion, Evento.fecha_inicio, Evento.fecha_fin,
+        Evento.lugar, Evento.capacidad, Evento.registrado, Evento.estado,
+        Evento.creador_id, Evento.creado, Evento.modificado
+    ).order_by(Evento.fecha_inicio, Evento.id), formato, "eventos")
+
+@router.get("/estadisticas", response_model=EstadisticasEventos,
+            summary="Estadísticas de ocupación de eventos",
+            description="Totales de eventos, capacidad, registrados y ocupación: globales, por estado, por organizador "
+                        "y los eventos con más registros. Se calculan en una sola consulta y se guardan en caché por unos segundos.",
+            response_description="Objeto EstadisticasEventos.",
+            responses={
+                status.HTTP_200_OK: {"description": "Estadísticas calculadas exitosamente."}
+            })
+async def get_estadisticas(
+    creador_id: Optional[int] = Query(None, description="Limitar a los eventos de un organizador"),
+    top: int = Query(5, ge=1, le=50, description="Cantidad de eventos con más registros"),
+    db: AsyncSession = Depends(get_db)
+):
+    """Obtener estadísticas de ocupación"""
+    return await calcular_estadisticas(db, creador_id, top)
+
 @router.get("/{evento_id}", response_model=EventoCompleto, 
             summary="Obtener detalles de un evento por ID",
-            description="Recupera los detalles completos de un evento específico, incluyendo sus sesiones asociadas y la información del creador.",
+            description="Recupera los detalles completos de un evento específico, incluyendo sus sesiones asociadas y la información del creador. "
+                        "Con fields se devuelven solo los campos indicados (por ejemplo fields=titulo,sesiones). "
+                        "Responde 304 si el ETag o la fecha de If-Modified-Since siguen vigentes.",
             response_description="Objeto EventoCompleto con todos los detalles del evento.",
             responses={
                 status.HTTP_200_OK: {"description": "Detalles del evento recuperados exitosamente."},
+                status.HTTP_304_NOT_MODIFIED: {"description": "El evento no ha cambiado desde la versión que tiene el cliente."},
+                status.HTTP_400_BAD_REQUEST: {"description": "Los campos enviados no son válidos."},
                 status.HTTP_404_NOT_FOUND: {"description": "El evento con el ID especificado no fue encontrado."}
             })
-def get_evento(evento_id: int, db: Session = Depends(get_db)):
+async def get_evento(
+    evento_id: int,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por comas (por defecto todos)"),
+    db: AsyncSession = Depends(get_db)
+):
     """Obtener evento por ID con sus sesiones"""
-    evento = db.query(Evento).filter(Evento.id == evento_id).first()
+    campos = parse_fields(fields, EventoCompleto)
+    # Validador: versión del evento y de sus sesiones en una sola consulta ligera
+    de_sesiones = Sesion.evento_id == Evento.id
+    version = (await db.execute(select(
+        Evento.modificado, Evento.registrado, Evento.creador_id, NOMBRE_CREADOR,
+        select(func.count(Sesion.id)).where(de_sesiones).scalar_subquery(),
+        select(func.max(Sesion.modificado)).where(de_sesiones).scalar_subquery(),
+        MODIFICADO_CREADOR,
+    ).where(Evento.id == evento_id))).first()
+    if not version:
+        raise HTTPException(status_code=404, detail="Evento no encontrado")
+    ultima_modificacion = max((v for v in (version[0], version[5], version[6]) if v), default=None)
+    headers = cache_headers(compute_etag("evento", evento_id, campos, *version), ultima_modificacion)
+    if is_not_modified(request, headers["ETag"], ultima_modificacion):
+        return not_modified_response(headers)
+    response.headers.update(headers)
+
+    if campos:
+        opciones = opciones_carga(campos)
+    else:
+        opciones = [joinedload(Evento.creador), selectinload(Evento.sesiones)]
+    evento = await db.scalar(select(Evento).options(*opciones).where(Evento.id == evento_id))
     if not evento:
         raise HTTPException(status_code=404, detail="Evento no encontrado")
+    if campos:
+        return respuesta_parcial(evento, EventoCompleto, campos, response, lista=False)
     return evento
 
 @router.post("/registrar/", response_model=EventoResponse, 
@@ -66,10 +225,10 @@ def get_evento(evento_id: int, db: Session = Depends(get_db)):
                 status.HTTP_401_UNAUTHORIZED: {"description": "No autenticado. Se requiere un token de acceso válido."},
                 status.HTTP_422_UNPROCESSABLE_ENTITY: {"description": "Error de validación de datos de entrada."}
             })
-def crear_evento(
+async def crear_evento(
     evento: EventoCreate, 
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Crear nuevo evento"""
     # Validar fechas
@@ -84,9 +243,34 @@ def crear_evento(
         creador_id=current_user.id
     )
     db.add(db_evento)
-    db.commit()
-    db.refresh(db_evento)
-    return db_evento
+    await db.flush()
+    evento_id = db_evento.id
+    await db.commit()
+    await invalidar_estadisticas()
+    return await get_evento_con_creador(db, evento_id)
+
+@router.post("/registrar/lote", response_model=List[EventoCompleto],
+            status_code=status.HTTP_201_CREATED,
+            summary="Crear varios eventos con sus sesiones",
+            description="Crea uno o varios eventos, cada uno con sus sesiones, en una sola transacción. "
+                        "Se validan todas las fechas antes de insertar; si algún elemento es inválido no se crea nada "
+                        "y se devuelve la lista de errores con la ubicación de cada elemento.",
+            response_description="Lista de objetos EventoCompleto en el mismo orden del lote.",
+            responses={
+                status.HTTP_201_CREATED: {"description": "Eventos y sesiones creados exitosamente."},
+                status.HTTP_400_BAD_REQUEST: {"description": "Uno o más eventos o sesiones tienen fechas inválidas."},
+                status.HTTP_401_UNAUTHORIZED: {"description": "No autenticado. Se requiere un token de acceso válido."},
+                status.HTTP_422_UNPROCESSABLE_ENTITY: {"description": "Error de validación de datos de entrada."}
+            })
+async def crear_eventos_en_lote(
+    lote: EventosLoteCreate,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Crear eventos y sesiones por lotes"""
+    eventos = await crear_eventos_lote(db, lote.eventos, current_user)
+    await invalidar_estadisticas()
+    return eventos
 
 @router.put("/actualizar/{evento_id}", response_model=EventoResponse, 
             summary="Actualizar un evento existente",
@@ -100,14 +284,14 @@ def crear_evento(
                 status.HTTP_404_NOT_FOUND: {"description": "El evento no fue encontrado."},
                 status.HTTP_422_UNPROCESSABLE_ENTITY: {"description": "Error de validación de datos de entrada."}
             })
-def update_evento(
+async def update_evento(
     evento_id: int,
     evento_update: EventoUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Actualizar evento"""
-    db_evento = db.query(Evento).filter(Evento.id == evento_id).first()
+    db_evento = await db.get(Evento, evento_id)
     if not db_evento:
         raise HTTPException(status_code=404, detail="Evento no encontrado")
     
@@ -120,13 +304,10 @@ def update_evento(
     for field, value in update_data.items():
         setattr(db_evento, field, value)
     
-    # Actualizar fecha de modificación
-    from sqlalchemy.sql import func
-    db_evento.modificado = func.now()
-    
-    db.commit()
-    db.refresh(db_evento)
-    return db_evento
+    # La fecha de modificación la actualiza el onupdate del modelo
+    await db.commit()
+    await invalidar_estadisticas()
+    return await get_evento_con_creador(db, evento_id)
 
 @router.delete("/eliminar/{evento_id}", 
             summary="Eliminar un evento",
@@ -138,13 +319,13 @@ def update_evento(
                 status.HTTP_403_FORBIDDEN: {"description": "No tienes permisos para eliminar este evento."},
                 status.HTTP_404_NOT_FOUND: {"description": "El evento no fue encontrado."}
             })
-def eliminar_evento(
+async def eliminar_evento(
     evento_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Eliminar evento"""
-    db_evento = db.query(Evento).filter(Evento.id == evento_id).first()
+    db_evento = await db.get(Evento, evento_id)
     if not db_evento:
         raise HTTPException(status_code=404, detail="Evento no encontrado")
     
@@ -152,29 +333,44 @@ def eliminar_evento(
     if db_evento.creador_id != current_user.id:
         raise HTTPException(status_code=403, detail="No tienes permisos para eliminar este evento")
     
-    db.delete(db_evento)
-    db.commit()
+    await db.delete(db_evento)
+    await db.commit()
+    await invalidar_estadisticas()
     return {"message": "Evento eliminado exitosamente"}
 
 
 @router.get("/mis/eventos", response_model=List[EventoResponse], 
             summary="Obtener eventos en los que el usuario está registrado",
-            description="Recupera una lista de eventos en los que el usuario autenticado se ha registrado.",
+            description="Recupera una lista de eventos en los que el usuario autenticado se ha registrado, ordenados por fecha de inicio. "
+                        "Admite paginación por cursor (cabecera X-Next-Cursor) y el filtro periodo.",
             response_description="Lista de objetos EventoResponse de los eventos registrados.",
             responses={
                 status.HTTP_200_OK: {"description": "Lista de eventos registrados recuperada exitosamente."},
                 status.HTTP_401_UNAUTHORIZED: {"description": "No autenticado."}
             })
-def get_mis_eventos(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_mis_eventos(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de la cabecera X-Next-Cursor"),
+    periodo: Optional[str] = Query(None, pattern="^(proximos|pasados)$",
+                                   description="proximos: eventos que aún no empiezan; pasados: los que ya empezaron"),
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Obtener eventos en los que estoy registrado"""
-    registros = db.query(RegistroEvento).filter(
-        RegistroEvento.user_id == current_user.id
-    ).all()
-    
-    eventos = [registro.evento for registro in registros]
+    etiqueta = periodo or "todos"
+    despues_de = decode_cursor_para(cursor, etiqueta, datetime, int) if cursor else None
+    query = consulta_mis_eventos(current_user.id, limit, despues_de, periodo)
+    if settings.FAST_JSON:
+        eventos = (await db.execute(proyectar_eventos(query))).all()
+    else:
+        eventos = (await db.scalars(query)).all()
+    if len(eventos) > limit:
+        eventos = eventos[:limit]
+        ultimo = eventos[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(etiqueta, ultimo.fecha_inicio, ultimo.id)
+    if settings.FAST_JSON:
+        return fast_json_response([evento_a_dict(fila) for fila in eventos], response)
     return eventos
 
 # ENDPOINTS PARA SESIONES
@@ -190,15 +386,15 @@ def get_mis_eventos(
                 status.HTTP_404_NOT_FOUND: {"description": "El evento principal no fue encontrado."},
                 status.HTTP_422_UNPROCESSABLE_ENTITY: {"description": "Error de validación de datos de entrada."}
             })
-def crear_sesion(
+async def crear_sesion(
     evento_id: int,
     sesion: SesionCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Crear nueva sesión para un evento"""
     # Verificar que el evento existe
-    evento = db.query(Evento).filter(Evento.id == evento_id).first()
+    evento = await db.get(Evento, evento_id)
     if not evento:
         raise HTTPException(status_code=404, detail="Evento no encontrado")
     
@@ -218,10 +414,37 @@ def crear_sesion(
         **sesion.dict()
     )
     db.add(db_sesion)
-    db.commit()
-    db.refresh(db_sesion)
+    await db.commit()
+    await db.refresh(db_sesion)
     return db_sesion
 
+@router.post("/{evento_id}/sesiones/lote", response_model=List[SesionResponse],
+            status_code=status.HTTP_201_CREATED,
+            summary="Crear varias sesiones para un evento",
+            description="Agrega varias sesiones a un evento existente en una sola transacción. "
+                        "Si alguna sesión es inválida no se crea ninguna.",
+            response_description="Lista de objetos SesionResponse en el mismo orden del lote.",
+            responses={
+                status.HTTP_201_CREATED: {"description": "Sesiones creadas exitosamente."},
+                status.HTTP_400_BAD_REQUEST: {"description": "Una o más sesiones tienen fechas inválidas."},
+                status.HTTP_401_UNAUTHORIZED: {"description": "No autenticado."},
+                status.HTTP_403_FORBIDDEN: {"description": "No tienes permisos para crear sesiones en este evento."},
+                status.HTTP_404_NOT_FOUND: {"description": "El evento principal no fue encontrado."}
+            })
+async def crear_sesiones_en_lote(
+    evento_id: int,
+    lote: SesionesLoteCreate,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Crear varias sesiones para un evento"""
+    evento = await db.get(Evento, evento_id)
+    if not evento:
+        raise HTTPException(status_code=404, detail="Evento no encontrado")
+    if evento.creador_id != current_user.id:
+        raise HTTPException(status_code=403, detail="No tienes permisos para crear sesiones en este evento")
+    return await crear_sesiones_lote(db, evento, lote.sesiones)
+
 @router.get("/{evento_id}/sesiones/", response_model=List[SesionResponse], 
         summary="Obtener sesiones de un evento",
         description="Recupera una lista de todas las sesiones asociadas a un evento específico.",
@@ -230,21 +453,21 @@ def crear_sesion(
             status.HTTP_200_OK: {"description": "Sesiones recuperadas exitosamente."},
             status.HTTP_404_NOT_FOUND: {"description": "El evento no fue encontrado (aunque el endpoint devuelve una lista vacía si no hay sesiones)."}
         })
-def get_sesiones_evento(
+async def get_sesiones_evento(
     evento_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Obtener todas las sesiones de un evento"""
-    sesiones = db.query(Sesion).filter(Sesion.evento_id == evento_id).all()
+    sesiones = (await db.scalars(consulta_sesiones_evento(evento_id))).all()
     return sesiones
 
 # ENDPOINTS PARA REGISTROS A EVENTOS
 @router.get("/registros/{registro_id}", response_model=RegistroEventoResponse)
-def get_registro(registro_id: int, db: Session = Depends(get_db)):
-    registro = db.query(RegistroEvento).options(
-        joinedload(RegistroEvento.user),
+async def get_registro(registro_id: int, db: AsyncSession = Depends(get_db)):
+    registro = await db.scalar(select(RegistroEvento).options(
+        joinedload(RegistroEvento.usuario),
         joinedload(RegistroEvento.evento)
-    ).filter(RegistroEvento.id == registro_id).first()
+    ).where(RegistroEvento.id == registro_id))
     if not registro:
         raise HTTPException(status_code=404, detail="Registro no encontrado")
     return registro
@@ -261,62 +484,112 @@ def get_registro(registro_id: int, db: Session = Depends(get_db)):
                 status.HTTP_404_NOT_FOUND: {"description": "El evento no fue encontrado."},
                 status.HTTP_409_CONFLICT: {"description": "El usuario ya está registrado en este evento."}
             })
-def evento_usuario(
+async def evento_usuario(
     event_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Registra al usuario autenticado en un evento específico.
+    El cupo se reserva de forma atómica en la base de datos; con REGISTRATION_BATCHING
+    las inscripciones concurrentes al mismo evento se registran por lotes.
     """
-    event = db.query(Evento).filter(Evento.id == event_id).first()
-    if not event:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento no encontrado")
-
-    existing_registration = db.query(RegistroEvento).filter(
-        RegistroEvento.user_id == current_user.id,
-        RegistroEvento.evento_id == event_id
-    ).first()
-    if existing_registration:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya estás registrado en este evento")
-    
-    if event.registrado >= event.capacidad:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El evento ha alcanzado su capacidad máxima")
+    if settings.REGISTRATION_BATCHING:
+        registro = await admision_registros.reservar(event_id, current_user)
+    else:
+        registro = await reservar_cupo(db, event_id, current_user)
+    await invalidar_estadisticas()
+    return registro
 
-    new_registration = RegistroEvento(
-        user_id=current_user.id,
-        evento_id=event_id,
-        confirmado=True 
-    )
-    db.add(new_registration)
-    
-    event.registrado += 1
+@router.post("/{evento_id}/registros/importar", response_model=ImportacionResumen,
+            summary="Importar asistentes a un evento",
+            description="Registra en el evento a los usuarios listados en un archivo CSV (columna email o primera columna) "
+                        "o NDJSON (objetos con la clave email), enviado como cuerpo de la petición. El archivo se procesa "
+                        "por lotes sin cargarlo completo en memoria; cada lote se confirma por separado. "
+                        "Solo el creador del evento o un administrador pueden importar.",
+            response_description="Conteo de filas aceptadas, duplicadas, sin cupo, no encontradas e inválidas.",
+            openapi_extra={"requestBody": {"required": True, "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            }}},
+            responses={
+                status.HTTP_200_OK: {"description": "Importación procesada."},
+                status.HTTP_401_UNAUTHORIZED: {"description": "No autenticado."},
+                status.HTTP_403_FORBIDDEN: {"description": "No tienes permisos para importar asistentes a este evento."},
+                status.HTTP_404_NOT_FOUND: {"description": "El evento no fue encontrado."}
+            })
+async def importar_registros(
+    evento_id: int,
+    request: Request,
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Importar asistentes desde un CSV o NDJSON en streaming"""
+    evento = await db.get(Evento, evento_id)
+    if not evento:
+        raise HTTPException(status_code=404, detail="Evento no encontrado")
+    if evento.creador_id != current_user.id and current_user.role != Roles.ADMIN:
+        raise HTTPException(status_code=403, detail="No tienes permisos para importar asistentes a este evento")
+    content_type = request.headers.get("content-type", "")
+    formato = "ndjson" if "json" in content_type else "csv"
+    try:
+        return await importar_asistentes(db, evento_id, request.stream(), formato)
+    finally:
+        # Cada lote se confirma por separado: se invalida aunque la importación falle a medias
+        await invalidar_estadisticas()
 
-    db.commit()
-    db.refresh(new_registration)
-    db.refresh(event)
-    db_registration_with_details = db.query(RegistroEvento).options(
-        joinedload(RegistroEvento.user),
-        joinedload(RegistroEvento.evento)
-    ).filter(RegistroEvento.id == new_registration.id).first()
-    
-    return db_registration_with_details
+@router.get("/{evento_id}/registros/exportar",
+            summary="Exportar los registros de un evento",
+            description="Descarga los asistentes registrados en el evento en NDJSON o CSV, en streaming. "
+                        "Solo el creador del evento o un administrador pueden exportar.",
+            response_description="Archivo NDJSON o CSV con un registro por fila.",
+            responses={
+                status.HTTP_200_OK: {"description": "Exportación iniciada.", "content": {
+                    "application/x-ndjson": {}, "text/csv": {}}},
+                status.HTTP_401_UNAUTHORIZED: {"description": "No autenticado."},
+                status.HTTP_403_FORBIDDEN: {"description": "No tienes permisos para exportar los registros de este evento."},
+                status.HTTP_404_NOT_FOUND: {"description": "El evento no fue encontrado."}
+            })
+async def exportar_registros(
+    evento_id: int,
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson o csv"),
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Exportar registros de un evento en streaming"""
+    creador_id = await db.scalar(select(Evento.creador_id).where(Evento.id == evento_id))
+    if creador_id is None:
+        raise HTTPException(status_code=404, detail="Evento no encontrado")
+    if creador_id != current_user.id and current_user.role != Roles.ADMIN:
+        raise HTTPException(status_code=403, detail="No tienes permisos para exportar los registros de este evento")
+    return exportar(consulta_registros_evento(evento_id), formato, f"registros_evento_{evento_id}")
 
 @router.get("/mis/registros", response_model=List[RegistroEventoResponse], 
             summary="Obtener registros de eventos del usuario",
-            description="Recupera una lista de todos los eventos en los que el usuario autenticado está registrado.",
+            description="Recupera una lista de todos los eventos en los que el usuario autenticado está registrado, ordenados por la fecha de inicio del evento. "
+                        "Admite paginación por cursor (cabecera X-Next-Cursor) y el filtro periodo.",
             response_description="Lista de objetos RegistroEventoResponse de los registros del usuario.",
             responses={
                 status.HTTP_200_OK: {"description": "Registros recuperados exitosamente."},
                 status.HTTP_401_UNAUTHORIZED: {"description": "No autenticado."}
             })
-def get_mis_registros(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_mis_registros(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor opaco de la cabecera X-Next-Cursor"),
+    periodo: Optional[str] = Query(None, pattern="^(proximos|pasados)$",
+                                   description="proximos: eventos que aún no empiezan; pasados: los que ya empezaron"),
+    current_user: UserResponse = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Obtener registros de eventos del usuario autenticado"""
-    registros = db.query(RegistroEvento).options(
-        joinedload(RegistroEvento.evento)
-    ).filter(RegistroEvento.user_id == current_user.id).all()
-    
-    return registros
\ No newline at end of file
+    etiqueta = periodo or "todos"
+    despues_de = decode_cursor_para(cursor, etiqueta, datetime, int) if cursor else None
+    registros = (await db.scalars(
+        consulta_mis_registros(current_user.id, limit, despues_de, periodo)
+    )).all()
+    if len(registros) > limit:
+        registros = registros[:limit]
+        ultimo = registros[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(etiqueta, ultimo.evento.fecha_inicio, ultimo.id)
+    return registros
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 from app.models.event import EstadosEvento
@@ -72,10 +72,59 @@ class SesionResponse(SesionBase):
     class Config:
         from_attributes = True
 
+# Esquemas para creación por lotes (importación de agendas)
+MAX_EVENTOS_LOTE = 500
+MAX_SESIONES_LOTE = 1000
+
+class SesionLote(SesionBase):
+    """Sesión dentro de un lote; el evento lo determina el lote"""
+    pass
+
+class EventoLote(EventoCreate):
+    sesiones: List[SesionLote] = Field(default=[], max_length=MAX_SESIONES_LOTE)
+
+class EventosLoteCreate(BaseModel):
+    eventos: List[EventoLote] = Field(min_length=1, max_length=MAX_EVENTOS_LOTE)
+
+class SesionesLoteCreate(BaseModel):
+    sesiones: List[SesionLote] = Field(min_length=1, max_length=MAX_SESIONES_LOTE)
+
+# Resumen de la importación masiva de asistentes
+class ImportacionResumen(BaseModel):
+    procesadas: int
+    aceptadas: int
+    duplicadas: int
+    sin_cupo: int
+    no_encontradas: int
+    invalidas: int
+
+# Estadísticas de ocupación
+class EstadisticasTotales(BaseModel):
+    eventos: int
+    capacidad: int
+    registrado: int
+    ocupacion: float
+
+class EstadisticasEstado(EstadisticasTotales):
+    estado: Optional[EstadosEvento] = None
+
+class EstadisticasOrganizador(EstadisticasTotales):
+    creador: UserForEvent
+
+class EstadisticasEvento(EstadisticasTotales):
+    id: int
+    titulo: str
+
+class EstadisticasEventos(BaseModel):
+    total: EstadisticasTotales
+    por_estado: List[EstadisticasEstado]
+    por_organizador: List[EstadisticasOrganizador]
+    top_eventos: List[EstadisticasEvento]
+
 # Esquemas para Registros
 class RegistroEventoResponse(BaseModel):
     id: int
-    user: UserForEvent
+    user: UserForEvent = Field(validation_alias="usuario")
     evento: EventoBase
     registrado_en: datetime
     confirmado: bool
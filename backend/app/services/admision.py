@@ -0,0 +1,166 @@
+import asyncio
+import time
+from typing import Optional
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.database import open_session
+from app.services.registros import error_duplicado, error_sin_cupo, reservar_cupos_lote, usuario_inscrito
+
+# Cola de admisión de inscripciones por evento (REGISTRATION_BATCHING).
+# Cuando muchos usuarios se inscriben a la vez en el mismo evento, cada reserva
+# individual espera el bloqueo de la fila del evento y el throughput queda limitado
+# por esa serialización. Con la cola, las solicitudes de un evento que llegan dentro
+# de una ventana de unos milisegundos se registran juntas: la primera solicitud del
+# lote (líder) espera la ventana y ejecuta reservar_cupos_lote en una sesión propia
+# del lote (no la de su petición, que puede cerrarse antes), y el resultado de cada
+# usuario se entrega a su petición. Mientras un lote está en la base de datos se
+# acumula el siguiente.
+# Cada lote deja anotados los cupos libres del evento durante
+# REGISTRATION_CAPACITY_TTL segundos; descontando las solicitudes de los lotes en
+# curso, las que ya no caben se rechazan sin bloquear la fila del evento: solo se
+# busca a ese usuario en el índice único de registros para responder 409 si ya estaba
+# inscrito (y 400 si no). Un usuario de un lote en curso que termina rechazado
+# (duplicado) puede hacer que otro se rechace de más, hasta que el lote anota los
+# cupos reales. La cola es por proceso; con varios workers la fila del evento sigue
+# garantizando que no se sobrevenda.
+
+class _Lote:
+    """Solicitudes pendientes de un evento: user_id -> (datos del usuario, futuro)"""
+    __slots__ = ("solicitudes", "lleno")
+
+    def __init__(self):
+        self.solicitudes = {}
+        self.lleno = asyncio.Event()
+
+class ColaAdmision:
+    """Cola de admisión de un evento"""
+
+    def __init__(self, evento_id: int, abrir_sesion=open_session):
+        self.evento_id = evento_id
+        self.abrir_sesion = abrir_sesion
+        self.lote: Optional[_Lote] = None
+        # Solicitudes de lotes que ya están en la base de datos
+        self.en_curso = 0
+        # Cupos libres según el último lote, válidos hasta `vigencia` (time.monotonic)
+        self.libres: Optional[int] = None
+        self.vigencia = 0.0
+        self.expiracion: Optional[asyncio.TimerHandle] = None
+
+    def cupos_conocidos(self) -> Optional[int]:
+        return self.libres if time.monotonic() < self.vigencia else None
+
+    def inactiva(self) -> bool:
+        return self.lote is None and self.en_curso == 0
+
+    async def reservar(self, usuario) -> dict:
+        datos_usuario = {"id": usuario.id, "nombre": usuario.nombre}
+        lote = self.lote
+        if lote is not None and datos_usuario["id"] in lote.solicitudes:
+            raise error_duplicado()
+        libres = self.cupos_conocidos()
+        pendientes = len(lote.solicitudes) if lote is not None else 0
+        if libres is not None and libres - self.en_curso - pendientes <= 0:
+            async with self.abrir_sesion() as db:
+                inscrito = await usuario_inscrito(db, self.evento_id, datos_usuario["id"])
+            raise error_duplicado() if inscrito else error_sin_cupo()
+
+        futuro = asyncio.get_running_loop().create_future()
+        if lote is None:
+            lote = self.lote = _Lote()
+            lote.solicitudes[datos_usuario["id"]] = (datos_usuario, futuro)
+            await self._liderar(lote)
+        else:
+            lote.solicitudes[datos_usuario["id"]] = (datos_usuario, futuro)
+            if len(lote.solicitudes) >= settings.REGISTRATION_BATCH_MAX:
+                lote.lleno.set()
+        return await futuro
+
+    async def _liderar(self, lote: _Lote):
+        """Esperar la ventana (o a que el lote se llene) y registrar el lote completo"""
+        try:
+            try:
+                await asyncio.wait_for(lote.lleno.wait(), settings.REGISTRATION_BATCH_WINDOW_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+        except asyncio.CancelledError:
+            # El líder se canceló antes de ejecutar el lote: las demás solicitudes se rechazan
+            self._cerrar(lote)
+            error = HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                  detail="No se pudo procesar la inscripción, intente de nuevo")
+            for _, futuro in lote.solicitudes.values():
+                if not futuro.done():
+                    futuro.set_exception(error)
+            raise
+        self._cerrar(lote)
+        solicitudes = list(lote.solicitudes.values())
+        self.en_curso += len(solicitudes)
+        # Protegido de la cancelación del líder: el resto del lote espera este resultado,
+        # y la sesión es del lote, así que cerrar la de la petición no lo afecta
+        await asyncio.shield(self._registrar(solicitudes))
+
+    async def _registrar(self, solicitudes: list):
+        try:
+            async with self.abrir_sesion() as db:
+                resultados, libres = await reservar_cupos_lote(
+                    db, self.evento_id, [datos for datos, _ in solicitudes]
+                )
+        except Exception as error:
+            resultados, libres = [error] * len(solicitudes), None
+        finally:
+            self.en_curso -= len(solicitudes)
+        self.libres = libres
+        self.vigencia = time.monotonic() + settings.REGISTRATION_CAPACITY_TTL if libres is not None else 0.0
+        for (_, futuro), resultado in zip(solicitudes, resultados):
+            # Una petición cancelada mientras esperaba ya no recibe su resultado
+            if futuro.done():
+                continue
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+
+    def _cerrar(self, lote: _Lote):
+        # Las solicitudes que lleguen desde ahora forman el siguiente lote
+        if self.lote is lote:
+            self.lote = None
+
+class AdmisionRegistros:
+    """Colas de admisión por evento del proceso"""
+
+    def __init__(self, abrir_sesion=open_session):
+        self.abrir_sesion = abrir_sesion
+        self.colas: dict = {}
+
+    async def reservar(self, evento_id: int, usuario) -> dict:
+        cola = self.colas.get(evento_id)
+        if cola is None:
+            cola = self.colas[evento_id] = ColaAdmision(evento_id, self.abrir_sesion)
+        try:
+            return await cola.reservar(usuario)
+        finally:
+            self._liberar(evento_id, cola)
+
+    def _liberar(self, evento_id: int, cola: ColaAdmision):
+        """
+        Quitar la cola cuando queda inactiva y sin cupos anotados vigentes; si aún los
+        tiene, se vuelve a revisar cuando venzan
+        """
+        if self.colas.get(evento_id) is not cola or not cola.inactiva() or cola.expiracion is not None:
+            return
+        restante = cola.vigencia - time.monotonic()
+        if restante <= 0:
+            del self.colas[evento_id]
+        else:
+            cola.expiracion = asyncio.get_running_loop().call_later(restante, self._expirar, evento_id, cola)
+
+    def _expirar(self, evento_id: int, cola: ColaAdmision):
+        cola.expiracion = None
+        self._liberar(evento_id, cola)
+
+    def clear(self):
+        for cola in self.colas.values():
+            if cola.expiracion is not None:
+                cola.expiracion.cancel()
+        self.colas.clear()
+
+admision_registros = AdmisionRegistros()
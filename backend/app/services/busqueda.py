@@ -0,0 +1,29 @@
+import re
+from sqlalchemy import func, literal_column
+from app.models.event import Evento, CONFIG_BUSQUEDA
+
+# Búsqueda de texto completo sobre eventos usando el índice GIN de Evento.busqueda.
+
+_TERMINO = re.compile(r"\w+", re.UNICODE)
+# La configuración va en línea para que el planner pueda usar el índice sin depender del tipo del parámetro
+_CONFIG = literal_column(f"'{CONFIG_BUSQUEDA}'::regconfig")
+
+def build_search_query(texto: str):
+    """
+    Convertir el texto del usuario en un tsquery donde todos los términos
+    deben aparecer y el último admite prefijos (búsqueda mientras se escribe).
+    Devuelve None si el texto no contiene términos buscables.
+    """
+    terminos = _TERMINO.findall(texto)
+    if not terminos:
+        return None
+    consulta = " & ".join(terminos) + ":*"
+    return func.to_tsquery(_CONFIG, consulta)
+
+def search_filter(tsquery):
+    """Condición que usa el índice GIN sobre el vector de búsqueda"""
+    return Evento.busqueda.op("@@")(tsquery)
+
+def search_rank(tsquery):
+    """Relevancia del evento para la consulta (mayor es mejor)"""
+    return func.ts_rank_cd(Evento.busqueda, tsquery)
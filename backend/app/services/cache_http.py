@@ -0,0 +1,60 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response, status
+from app.core.config import settings
+
+# Caché HTTP condicional (ETag / Last-Modified) para lecturas de eventos.
+# Los validadores se calculan con consultas ligeras; si el cliente ya tiene la
+# versión vigente se responde 304 sin construir ni serializar el cuerpo.
+
+def compute_etag(*partes) -> str:
+    """ETag fuerte a partir de los valores que determinan la respuesta"""
+    resumen = hashlib.sha1(repr(partes).encode()).hexdigest()
+    return f'"{resumen}"'
+
+def format_http_date(valor: datetime) -> str:
+    if valor.tzinfo is None:
+        valor = valor.replace(tzinfo=timezone.utc)
+    return format_datetime(valor.astimezone(timezone.utc), usegmt=True)
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    """Cabeceras de validación y Cache-Control que pueden respetar un CDN o nginx"""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.EVENTS_CACHE_MAX_AGE}, must-revalidate",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_http_date(last_modified)
+    return headers
+
+def _etag_coincide(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Comparación débil, como indica RFC 9110 para If-None-Match
+    candidatos = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return etag in candidatos
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """Evaluar If-None-Match (prioritario) o If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_coincide(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            desde = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # La forma asctime y la zona -0000 se interpretan sin zona horaria: son UTC
+        if desde.tzinfo is None:
+            desde = desde.replace(tzinfo=timezone.utc)
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # Las fechas HTTP tienen resolución de segundos
+        return last_modified.replace(microsecond=0) <= desde
+    return False
+
+def not_modified_response(headers: dict) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,67 @@
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy.orm import load_only, joinedload, selectinload
+from app.models.event import Evento
+from app.models.user import User
+from app.services.json_rapido import con_cabeceras
+
+# Proyección de campos (sparse fieldsets) en los endpoints de eventos.
+# Con fields=titulo,fecha_inicio solo se leen de la base de datos esas columnas
+# (load_only) y la respuesta se valida y serializa con un modelo que solo tiene
+# esos campos, construido a partir del esquema completo.
+
+# Campos del esquema que son relaciones y no columnas de Evento
+RELACIONES = ("creador", "sesiones")
+
+def parse_fields(fields: Optional[str], modelo: type[BaseModel]) -> Optional[tuple]:
+    """Campos pedidos en el orden del esquema, o None si no se indicó fields"""
+    if fields is None:
+        return None
+    pedidos = {campo.strip() for campo in fields.split(",") if campo.strip()}
+    if not pedidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Debe indicar al menos un campo en fields"
+        )
+    desconocidos = pedidos - modelo.model_fields.keys()
+    if desconocidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos no válidos: {', '.join(sorted(desconocidos))}"
+        )
+    return tuple(campo for campo in modelo.model_fields if campo in pedidos)
+
+@lru_cache(maxsize=256)
+def modelo_parcial(modelo: type[BaseModel], campos: tuple) -> type[BaseModel]:
+    """Modelo con solo los campos indicados, con los mismos tipos que el esquema"""
+    return create_model(
+        f"{modelo.__name__}Parcial",
+        __config__=ConfigDict(from_attributes=True),
+        **{campo: (modelo.model_fields[campo].annotation, modelo.model_fields[campo]) for campo in campos}
+    )
+
+@lru_cache(maxsize=256)
+def _adaptador(modelo: type[BaseModel], campos: tuple, lista: bool) -> TypeAdapter:
+    parcial = modelo_parcial(modelo, campos)
+    return TypeAdapter(List[parcial] if lista else parcial)
+
+def opciones_carga(campos: Sequence[str], obligatorias: Sequence[str] = ("id",)) -> list:
+    """
+    Opciones de carga de Evento para los campos pedidos. obligatorias son columnas
+    que se leen aunque no se devuelvan, como la clave del cursor.
+    """
+    columnas = dict.fromkeys([c for c in campos if c not in RELACIONES] + list(obligatorias))
+    opciones = [load_only(*(getattr(Evento, columna) for columna in columnas))]
+    if "creador" in campos:
+        opciones.append(joinedload(Evento.creador).load_only(User.id, User.nombre))
+    if "sesiones" in campos:
+        opciones.append(selectinload(Evento.sesiones))
+    return opciones
+
+def respuesta_parcial(contenido: Any, modelo: type[BaseModel], campos: tuple, response: Response, lista: bool = True) -> Response:
+    """Serializar objetos ORM con el modelo parcial, conservando las cabeceras de response"""
+    adaptador = _adaptador(modelo, campos, lista)
+    cuerpo = adaptador.dump_json(adaptador.validate_python(contenido, from_attributes=True))
+    return con_cabeceras(Response(cuerpo, media_type="application/json"), response)
@@ -0,0 +1,186 @@
+from datetime import datetime
+from typing import Optional, Sequence
+from sqlalchemy import select, tuple_, exists, func, or_
+from sqlalchemy.orm import joinedload, contains_eager
+from app.models.event import Evento, RegistroEvento, Sesion, EstadosEvento, CON_CUPO
+from app.models.user import User, Roles
+from app.services.busqueda import search_filter, search_rank
+
+# Consultas de las rutas más usadas.
+# Se construyen aquí para que los endpoints y las pruebas de planes de ejecución
+# (app/tests/test_query_plans.py) usen exactamente las mismas sentencias.
+
+# Ordenamientos del listado: nombre -> (columna, descendente). El id desempata y
+# completa la clave del cursor; cada orden está respaldado por un índice.
+ORDENES_EVENTOS = {
+    "fecha_inicio": (Evento.fecha_inicio, False),
+    "-fecha_inicio": (Evento.fecha_inicio, True),
+    "creado": (Evento.creado, False),
+    "-creado": (Evento.creado, True),
+}
+
+def filtrar_eventos(
+    query,
+    fecha_inicio_desde: Optional[datetime] = None,
+    fecha_inicio_hasta: Optional[datetime] = None,
+    estado: Optional[EstadosEvento] = None,
+    lugar: Optional[str] = None,
+    creador_id: Optional[int] = None,
+    has_capacity: Optional[bool] = None,
+):
+    """Aplicar los filtros del listado de eventos"""
+    if fecha_inicio_desde is not None:
+        query = query.where(Evento.fecha_inicio >= fecha_inicio_desde)
+    if fecha_inicio_hasta is not None:
+        query = query.where(Evento.fecha_inicio < fecha_inicio_hasta)
+    if estado is not None:
+        query = query.where(Evento.estado == estado)
+    if lugar:
+        query = query.where(func.lower(Evento.lugar) == lugar.lower())
+    if creador_id is not None:
+        query = query.where(Evento.creador_id == creador_id)
+    if has_capacity is True:
+        # Mismo predicado que el índice parcial ix_eventos_con_cupo_fecha_inicio
+        query = query.where(CON_CUPO)
+    elif has_capacity is False:
+        query = query.where(Evento.registrado >= Evento.capacidad)
+    return query
+
+def clave_orden(evento: Evento, orden: str) -> tuple:
+    """Valores de la clave de ordenamiento de un evento, para construir el cursor"""
+    columna, _ = ORDENES_EVENTOS[orden]
+    return getattr(evento, columna.key), evento.id
+
+def consulta_eventos(
+    limit: int,
+    skip: int = 0,
+    despues_de: Optional[tuple] = None,
+    tsquery=None,
+    orden: Optional[str] = None,
+    **filtros
+):
+    """
+    Página del listado de eventos. Con tsquery y sin orden ni cursor se ordena por
+    relevancia; en otro caso por (columna de orden, id) y se pide una fila extra
+    para saber si hay una página siguiente.
+    """
+    query = filtrar_eventos(select(Evento), **filtros)
+    if tsquery is not None:
+        query = query.where(search_filter(tsquery))
+    if tsquery is not None and orden is None and despues_de is None:
+        return query.order_by(
+            search_rank(tsquery).desc(), Evento.fecha_inicio, Evento.id
+        ).offset(skip).limit(limit)
+    # Orden estable por (columna, id), respaldado por un índice compuesto
+    columna, descendente = ORDENES_EVENTOS[orden or "fecha_inicio"]
+    clave = tuple_(columna, Evento.id)
+    if descendente:
+        query = query.order_by(columna.desc(), Evento.id.desc())
+    else:
+        query = query.order_by(columna, Evento.id)
+    if despues_de is not None:
+        valores = tuple_(*despues_de)
+        query = query.where(clave < valores if descendente else clave > valores)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+def pagina_por_fecha(query, columna_id, limit: int, despues_de: Optional[tuple] = None, periodo: Optional[str] = None):
+    """
+    Paginar por (fecha_inicio del evento, id) con una fila extra. periodo="proximos"
+    deja los eventos que aún no empiezan (del más cercano al más lejano) y
+    periodo="pasados" los que ya empezaron (del más reciente al más antiguo).
+    """
+    ahora = func.localtimestamp()
+    if periodo == "proximos":
+        query = query.where(Evento.fecha_inicio >= ahora)
+    elif periodo == "pasados":
+        query = query.where(Evento.fecha_inicio < ahora)
+    clave = tuple_(Evento.fecha_inicio, columna_id)
+    if periodo == "pasados":
+        query = query.order_by(Evento.fecha_inicio.desc(), columna_id.desc())
+        if despues_de is not None:
+            query = query.where(clave < tuple_(*despues_de))
+    else:
+        query = query.order_by(Evento.fecha_inicio, columna_id)
+        if despues_de is not None:
+            query = query.where(clave > tuple_(*despues_de))
+    return query.limit(limit + 1)
+
+def consulta_mis_eventos(user_id: int, limit: int = 50, despues_de: Optional[tuple] = None, periodo: Optional[str] = None):
+    """Eventos en los que el usuario está registrado, con su creador, en una consulta"""
+    query = select(Evento).join(
+        RegistroEvento, RegistroEvento.evento_id == Evento.id
+    ).options(
+        joinedload(Evento.creador)
+    ).where(RegistroEvento.user_id == user_id)
+    return pagina_por_fecha(query, Evento.id, limit, despues_de, periodo)
+
+def consulta_mis_registros(user_id: int, limit: int = 50, despues_de: Optional[tuple] = None, periodo: Optional[str] = None):
+    """Registros del usuario con el usuario y el evento, en una consulta"""
+    query = select(RegistroEvento).join(RegistroEvento.evento).options(
+        contains_eager(RegistroEvento.evento),
+        joinedload(RegistroEvento.usuario)
+    ).where(RegistroEvento.user_id == user_id)
+    return pagina_por_fecha(query, RegistroEvento.id, limit, despues_de, periodo)
+
+def consulta_sesiones_evento(evento_id: int):
+    """Sesiones de un evento en orden cronológico"""
+    return select(Sesion).where(
+        Sesion.evento_id == evento_id
+    ).order_by(Sesion.fecha_inicio, Sesion.id)
+
+def consulta_motivo_rechazo(evento_id: int, user_id: int):
+    """Existencia del evento y del registro del usuario en él"""
+    return select(
+        Evento.id,
+        exists().where(
+            RegistroEvento.user_id == user_id,
+            RegistroEvento.evento_id == evento_id
+        )
+    ).where(Evento.id == evento_id)
+
+def consulta_registros_evento(evento_id: int):
+    """Asistentes de un evento con sus datos de contacto (exportación)"""
+    return select(
+        RegistroEvento.id, RegistroEvento.registrado_en, RegistroEvento.confirmado,
+        User.id.label("user_id"), User.nombre, User.email
+    ).join(User, User.id == RegistroEvento.user_id).where(
+        RegistroEvento.evento_id == evento_id
+    ).order_by(RegistroEvento.id)
+
+def consulta_usuarios_por_email(emails: Sequence[str]):
+    """Ids de los usuarios activos con esos correos (importación)"""
+    return select(User.email, User.id).where(User.email.in_(emails), User.is_active.is_(True))
+
+def consulta_ya_registrados(evento_id: int, user_ids: Sequence[int]):
+    """Usuarios de la lista que ya están registrados en el evento (importación)"""
+    return select(RegistroEvento.user_id).where(
+        RegistroEvento.evento_id == evento_id,
+        RegistroEvento.user_id.in_(user_ids)
+    )
+
+def filtrar_usuarios(query, role: Optional[Roles] = None, is_active: Optional[bool] = None, q: Optional[str] = None):
+    """Filtros del directorio de usuarios; q busca por prefijo en email y nombre"""
+    if role is not None:
+        query = query.where(User.role == role)
+    if is_active is not None:
+        query = query.where(User.is_active.is_(is_active))
+    if q:
+        prefijo = q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        query = query.where(or_(
+            func.lower(User.email).like(prefijo, escape="\\"),
+            func.lower(User.nombre).like(prefijo, escape="\\"),
+        ))
+    return query
+
+def consulta_usuarios(limit: int, despues_de: Optional[int] = None, **filtros):
+    """Página del directorio de usuarios ordenada por id, con una fila extra"""
+    query = filtrar_usuarios(select(User), **filtros).order_by(User.id)
+    if despues_de is not None:
+        query = query.where(User.id > despues_de)
+    return query.limit(limit + 1)
+
+def conteo_usuarios(**filtros):
+    """Total de usuarios que cumplen los filtros"""
+    return filtrar_usuarios(select(func.count()).select_from(User), **filtros)
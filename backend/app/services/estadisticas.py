@@ -0,0 +1,90 @@
+from typing import Optional
+from sqlalchemy import select, func, tuple_, or_
+from app.core.cache import build_cache
+from app.core.config import settings
+from app.models.event import Evento
+from app.models.user import User
+
+# Estadísticas de ocupación de eventos.
+# Todos los agregados salen de una sola consulta con GROUPING SETS: por estado,
+# por organizador, por evento y el total. Los resultados se guardan en caché por
+# STATS_CACHE_TTL segundos y se invalidan en cada escritura sobre eventos o registros.
+# Invalidar no borra entradas: incrementa una generación que forma parte de la clave
+# (un solo INCR con Redis, aunque se inscriba mucha gente a la vez), y las entradas
+# de generaciones anteriores dejan de usarse y expiran con su TTL.
+
+estadisticas_cache = build_cache("estadisticas", maxsize=1000)
+CLAVE_GENERACION = "generacion"
+
+# Valor de GROUPING(estado, creador_id, id) para cada nivel de agregación:
+# cada bit encendido indica una columna que no forma parte del grupo.
+NIVEL_ESTADO = 0b011
+NIVEL_ORGANIZADOR = 0b101
+NIVEL_EVENTO = 0b110
+NIVEL_TOTAL = 0b111
+
+def consulta_estadisticas(creador_id: Optional[int], top: int):
+    nivel = func.grouping(Evento.estado, Evento.creador_id, Evento.id)
+    registrado = func.sum(Evento.registrado)
+    agregados = select(
+        nivel.label("nivel"), Evento.estado, Evento.creador_id, Evento.id,
+        func.max(Evento.titulo).label("titulo"),
+        func.max(User.nombre).label("nombre"),
+        func.count().label("eventos"),
+        func.sum(Evento.capacidad).label("capacidad"),
+        registrado.label("registrado"),
+        func.row_number().over(
+            partition_by=nivel, order_by=(registrado.desc(), Evento.id)
+        ).label("puesto"),
+    ).join(User, User.id == Evento.creador_id).group_by(func.grouping_sets(
+        tuple_(Evento.estado), tuple_(Evento.creador_id), tuple_(Evento.id), tuple_()
+    ))
+    if creador_id is not None:
+        agregados = agregados.where(Evento.creador_id == creador_id)
+    agregados = agregados.subquery()
+    # De los eventos individuales solo se devuelven los `top` con más registros
+    return select(agregados).where(or_(
+        agregados.c.nivel != NIVEL_EVENTO, agregados.c.puesto <= top
+    )).order_by(agregados.c.nivel, agregados.c.puesto)
+
+def _totales(fila) -> dict:
+    capacidad = fila.capacidad or 0
+    registrado = fila.registrado or 0
+    return {
+        "eventos": fila.eventos,
+        "capacidad": capacidad,
+        "registrado": registrado,
+        "ocupacion": round(registrado / capacidad, 4) if capacidad else 0.0,
+    }
+
+async def calcular_estadisticas(db, creador_id: Optional[int] = None, top: int = 5) -> dict:
+    """Estadísticas con la forma de EstadisticasEventos, servidas desde la caché si es posible"""
+    generacion = await estadisticas_cache.get(CLAVE_GENERACION) or 0
+    clave = f"{generacion}:{creador_id}:{top}"
+    datos = await estadisticas_cache.get(clave)
+    if datos is not None:
+        return datos
+
+    datos = {
+        "total": {"eventos": 0, "capacidad": 0, "registrado": 0, "ocupacion": 0.0},
+        "por_estado": [],
+        "por_organizador": [],
+        "top_eventos": [],
+    }
+    for fila in (await db.execute(consulta_estadisticas(creador_id, top))).all():
+        if fila.nivel == NIVEL_TOTAL:
+            datos["total"] = _totales(fila)
+        elif fila.nivel == NIVEL_ESTADO:
+            datos["por_estado"].append({"estado": fila.estado.value if fila.estado else None, **_totales(fila)})
+        elif fila.nivel == NIVEL_ORGANIZADOR:
+            datos["por_organizador"].append({
+                "creador": {"id": fila.creador_id, "nombre": fila.nombre}, **_totales(fila)
+            })
+        else:
+            datos["top_eventos"].append({"id": fila.id, "titulo": fila.titulo, **_totales(fila)})
+    await estadisticas_cache.set(clave, datos, settings.STATS_CACHE_TTL)
+    return datos
+
+async def invalidar_estadisticas():
+    """Descartar las estadísticas en caché tras una escritura sobre eventos o registros"""
+    await estadisticas_cache.incr(CLAVE_GENERACION)
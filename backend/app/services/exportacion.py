@@ -0,0 +1,59 @@
+import csv
+import enum
+import io
+import json
+from datetime import date
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.database import stream_partitions
+
+# Exportaciones en streaming (NDJSON o CSV).
+# Las filas se leen con un cursor del lado del servidor en bloques de
+# EXPORT_BATCH_SIZE y cada bloque se serializa y envía antes de leer el
+# siguiente, así que la memoria no crece con el número de filas.
+
+FORMATOS_EXPORTACION = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def _valor(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    return valor
+
+async def _ndjson(particiones):
+    async for filas in particiones:
+        yield "".join(
+            json.dumps({k: _valor(v) for k, v in fila.items()}, ensure_ascii=False) + "\n"
+            for fila in filas
+        )
+
+async def _csv(particiones, columnas):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columnas)
+    async for filas in particiones:
+        writer.writerows([_valor(fila[c]) for c in columnas] for fila in filas)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Cabecera de una exportación vacía
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def exportar(statement, formato: str, nombre: str) -> StreamingResponse:
+    """Respuesta en streaming con las filas de una consulta de columnas"""
+    particiones = stream_partitions(statement, settings.EXPORT_BATCH_SIZE)
+    if formato == "csv":
+        columnas = [columna.name for columna in statement.selected_columns]
+        contenido = _csv(particiones, columnas)
+    else:
+        contenido = _ndjson(particiones)
+    return StreamingResponse(
+        contenido,
+        media_type=FORMATOS_EXPORTACION[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'},
+    )
@@ -0,0 +1,128 @@
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Optional
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from app.core.config import settings
+from app.models.event import Evento, RegistroEvento
+from app.services.consultas import consulta_usuarios_por_email, consulta_ya_registrados
+
+# Importación masiva de asistentes a un evento.
+# El archivo (CSV o NDJSON) se lee por fragmentos y se procesa en lotes de
+# IMPORT_BATCH_SIZE correos: cada lote resuelve los usuarios con una consulta,
+# bloquea la fila del evento para comprobar el cupo una sola vez, inserta los
+# registros con un INSERT y actualiza el contador con un UPDATE.
+
+async def leer_lineas(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Separar en líneas un flujo de bytes UTF-8 sin cargarlo completo en memoria"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pendiente = ""
+    async for fragmento in stream:
+        pendiente += decoder.decode(fragmento)
+        *lineas, pendiente = pendiente.split("\n")
+        for linea in lineas:
+            yield linea.rstrip("\r")
+    pendiente += decoder.decode(b"", final=True)
+    if pendiente.strip():
+        yield pendiente.rstrip("\r")
+
+def _email_csv(linea: str, columna: int) -> Optional[str]:
+    campos = next(csv.reader([linea]), [])
+    return campos[columna] if columna < len(campos) else None
+
+def _email_ndjson(linea: str) -> Optional[str]:
+    try:
+        valor = json.loads(linea)
+    except ValueError:
+        return None
+    if isinstance(valor, dict):
+        valor = valor.get("email")
+    return valor if isinstance(valor, str) else None
+
+async def leer_emails(lineas: AsyncIterator[str], formato: str) -> AsyncIterator[Optional[str]]:
+    """
+    Extraer el correo de cada fila. En CSV la primera fila puede ser una cabecera
+    con una columna "email"; si no la hay se usa la primera columna.
+    Las filas sin un correo válido se devuelven como None.
+    """
+    columna = None
+    async for linea in lineas:
+        if not linea.strip():
+            continue
+        if formato == "ndjson":
+            email = _email_ndjson(linea)
+        else:
+            if columna is None:
+                cabecera = [c.strip().lower() for c in next(csv.reader([linea]), [])]
+                columna = cabecera.index("email") if "email" in cabecera else 0
+                if "email" in cabecera:
+                    continue
+            email = _email_csv(linea, columna)
+        email = email.strip() if email else None
+        yield email if email and "@" in email else None
+
+CATEGORIAS_RESUMEN = ("procesadas", "aceptadas", "duplicadas", "sin_cupo", "no_encontradas", "invalidas")
+
+async def _procesar_lote(db, evento_id: int, emails: list, resumen: dict):
+    unicos = list(dict.fromkeys(emails))
+    resumen["duplicadas"] += len(emails) - len(unicos)
+    ids = dict((await db.execute(consulta_usuarios_por_email(unicos))).all())
+    resumen["no_encontradas"] += len(unicos) - len(ids)
+    if not ids:
+        return
+
+    # El bloqueo de la fila serializa el lote con las reservas individuales,
+    # que también actualizan la fila del evento antes de insertar su registro
+    evento = (await db.execute(
+        select(Evento.capacidad, Evento.registrado)
+        .where(Evento.id == evento_id).with_for_update()
+    )).one()
+    existentes = set((await db.scalars(
+        consulta_ya_registrados(evento_id, list(ids.values()))
+    )).all())
+    nuevos = [user_id for user_id in ids.values() if user_id not in existentes]
+    disponibles = max(evento.capacidad - evento.registrado, 0)
+    resumen["duplicadas"] += len(existentes)
+    resumen["sin_cupo"] += max(len(nuevos) - disponibles, 0)
+    nuevos = nuevos[:disponibles]
+    if not nuevos:
+        await db.rollback()
+        return
+
+    insertados = (await db.scalars(
+        insert(RegistroEvento)
+        .values([{"user_id": user_id, "evento_id": evento_id, "confirmado": True} for user_id in nuevos])
+        .on_conflict_do_nothing(index_elements=["user_id", "evento_id"])
+        .returning(RegistroEvento.id)
+    )).all()
+    await db.execute(
+        update(Evento)
+        .where(Evento.id == evento_id)
+        .values(registrado=Evento.registrado + len(insertados))
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    resumen["aceptadas"] += len(insertados)
+    resumen["duplicadas"] += len(nuevos) - len(insertados)
+
+async def importar_asistentes(db, evento_id: int, stream: AsyncIterator[bytes], formato: str) -> dict:
+    """Registrar en el evento a los usuarios del archivo; devuelve el resumen por categoría"""
+    resumen = dict.fromkeys(CATEGORIAS_RESUMEN, 0)
+    lote = []
+    try:
+        async for email in leer_emails(leer_lineas(stream), formato):
+            resumen["procesadas"] += 1
+            if email is None:
+                resumen["invalidas"] += 1
+                continue
+            lote.append(email)
+            if len(lote) >= settings.IMPORT_BATCH_SIZE:
+                await _procesar_lote(db, evento_id, lote, resumen)
+                lote = []
+        if lote:
+            await _procesar_lote(db, evento_id, lote, resumen)
+    except Exception:
+        await db.rollback()
+        raise
+    return resumen
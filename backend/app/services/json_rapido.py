@@ -0,0 +1,71 @@
+from typing import Any, Optional, Sequence
+from fastapi.responses import Response
+from pydantic_core import to_json
+from sqlalchemy import Select
+from app.models.event import Evento
+from app.models.user import User
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa el serializador de pydantic-core
+    orjson = None
+
+# Serialización rápida de listas de eventos (FAST_JSON).
+# En lugar de construir instancias ORM, validarlas contra EventoResponse y pasarlas
+# por jsonable_encoder, se seleccionan solo las columnas de la respuesta como
+# tuplas (Row) y se serializan directamente a bytes.
+
+# Columnas de EventoResponse, en el orden del esquema
+COLUMNAS_EVENTO = (
+    Evento.titulo, Evento.descripcion, Evento.fecha_inicio, Evento.fecha_fin,
+    Evento.lugar, Evento.capacidad, Evento.id, Evento.estado, Evento.registrado,
+    Evento.creado, Evento.modificado,
+)
+
+def dumps(contenido: Any) -> bytes:
+    """JSON compacto en UTF-8, con el mismo formato de fechas y enums que pydantic"""
+    if orjson is not None:
+        return orjson.dumps(contenido, option=orjson.OPT_UTC_Z)
+    return to_json(contenido)
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def con_cabeceras(respuesta: Response, response: Response) -> Response:
+    """
+    FastAPI no copia las cabeceras del parámetro `response` cuando el endpoint
+    devuelve un Response, así que se copian aquí.
+    """
+    respuesta.headers.raw.extend(response.headers.raw)
+    return respuesta
+
+def fast_json_response(contenido: Any, response: Response) -> FastJSONResponse:
+    """Respuesta ya serializada, con las cabeceras de response"""
+    return con_cabeceras(FastJSONResponse(contenido), response)
+
+def proyectar_eventos(query: Select, campos: Optional[Sequence[str]] = None, obligatorias: Sequence[str] = ("id",)) -> Select:
+    """
+    Convertir una consulta de Evento en una de columnas, con el creador por join.
+    Con campos solo se seleccionan esas columnas y las obligatorias (clave del cursor).
+    """
+    columnas = [
+        columna for columna in COLUMNAS_EVENTO
+        if campos is None or columna.key in campos or columna.key in obligatorias
+    ]
+    if campos is not None and "creador" not in campos:
+        return query.with_only_columns(*columnas)
+    return query.with_only_columns(
+        *columnas, User.id.label("creador_id"), User.nombre.label("creador_nombre")
+    ).join(User, User.id == Evento.creador_id)
+
+def evento_a_dict(fila, campos: Optional[Sequence[str]] = None) -> dict:
+    """Fila de proyectar_eventos con la forma de EventoResponse (o solo de los campos pedidos)"""
+    datos = fila._asdict()
+    if "creador_id" in datos:
+        datos["creador"] = {"id": datos.pop("creador_id"), "nombre": datos.pop("creador_nombre")}
+    if campos is not None:
+        return {campo: datos[campo] for campo in campos}
+    return datos
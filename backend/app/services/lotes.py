@@ -0,0 +1,98 @@
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+from app.models.event import Evento, Sesion
+
+# Creación de eventos y sesiones por lotes.
+# Se validan todas las fechas en una pasada y, si no hay errores, se insertan los
+# eventos y las sesiones con dos INSERT ... RETURNING en una única transacción.
+
+COLUMNAS_EVENTO = (Evento.id, Evento.estado, Evento.registrado, Evento.creado, Evento.modificado)
+COLUMNAS_SESION = (Sesion.id, Sesion.evento_id, Sesion.creado, Sesion.modificado)
+
+def _error(loc: list, msg: str) -> dict:
+    return {"loc": ["body", *loc], "msg": msg}
+
+def _validar_sesiones(sesiones, inicio, fin, loc: list) -> list:
+    errores = []
+    for j, sesion in enumerate(sesiones):
+        if sesion.fecha_inicio >= sesion.fecha_fin:
+            errores.append(_error([*loc, j], "La fecha de inicio debe ser anterior a la fecha de fin"))
+        elif sesion.fecha_inicio < inicio or sesion.fecha_fin > fin:
+            errores.append(_error([*loc, j], "La sesión debe estar dentro del rango de fechas del evento"))
+    return errores
+
+def validar_eventos(eventos) -> list:
+    """Errores de fechas de todos los eventos y sesiones del lote"""
+    errores = []
+    for i, evento in enumerate(eventos):
+        if evento.fecha_inicio >= evento.fecha_fin:
+            errores.append(_error(["eventos", i], "La fecha de inicio debe ser anterior a la fecha de fin"))
+            continue
+        errores += _validar_sesiones(
+            evento.sesiones, evento.fecha_inicio, evento.fecha_fin, ["eventos", i, "sesiones"]
+        )
+    return errores
+
+def _rechazar(errores: list):
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errores)
+
+async def _insertar_sesiones(db, filas: list) -> list:
+    if not filas:
+        return []
+    creadas = (await db.execute(
+        insert(Sesion).returning(*COLUMNAS_SESION, sort_by_parameter_order=True), filas
+    )).mappings().all()
+    return [{**fila, **creada} for fila, creada in zip(filas, creadas)]
+
+async def crear_eventos_lote(db, eventos, creador) -> list:
+    """
+    Crear los eventos con sus sesiones en una transacción (todo o nada).
+    Devuelve los datos con la forma de EventoCompleto.
+    """
+    errores = validar_eventos(eventos)
+    if errores:
+        _rechazar(errores)
+    datos_creador = {"id": creador.id, "nombre": creador.nombre}
+
+    filas_eventos = [
+        {**evento.model_dump(exclude={"sesiones"}), "creador_id": datos_creador["id"]}
+        for evento in eventos
+    ]
+    try:
+        creados = (await db.execute(
+            insert(Evento).returning(*COLUMNAS_EVENTO, sort_by_parameter_order=True), filas_eventos
+        )).mappings().all()
+        filas_sesiones = [
+            {**sesion.model_dump(), "evento_id": creado["id"]}
+            for evento, creado in zip(eventos, creados)
+            for sesion in evento.sesiones
+        ]
+        sesiones = await _insertar_sesiones(db, filas_sesiones)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    por_evento = {}
+    for sesion in sesiones:
+        por_evento.setdefault(sesion["evento_id"], []).append(sesion)
+    return [
+        {**fila, **creado, "creador": datos_creador, "sesiones": por_evento.get(creado["id"], [])}
+        for fila, creado in zip(filas_eventos, creados)
+    ]
+
+async def crear_sesiones_lote(db, evento: Evento, sesiones) -> list:
+    """Agregar varias sesiones a un evento existente con un solo INSERT"""
+    errores = _validar_sesiones(sesiones, evento.fecha_inicio, evento.fecha_fin, ["sesiones"])
+    if errores:
+        _rechazar(errores)
+    evento_id = evento.id
+    try:
+        creadas = await _insertar_sesiones(
+            db, [{**sesion.model_dump(), "evento_id": evento_id} for sesion in sesiones]
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return creadas
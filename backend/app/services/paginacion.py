@@ -0,0 +1,53 @@
+import base64
+import hashlib
+import json
+from datetime import datetime
+from fastapi import HTTPException, status
+
+# Utilidades para la paginación por cursor (keyset).
+# El cursor es opaco para el cliente: codifica en base64 los valores de la
+# clave de ordenamiento de la última fila devuelta.
+
+def encode_cursor(*valores) -> str:
+    """Codificar los valores de la clave de ordenamiento en un cursor opaco"""
+    datos = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    crudo = json.dumps(datos, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(crudo).decode().rstrip("=")
+
+def decode_cursor(cursor: str, *tipos) -> tuple:
+    """Decodificar un cursor y convertir cada valor al tipo esperado"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(datos, list) or len(datos) != len(tipos):
+            raise ValueError("Cursor con formato inesperado")
+        return tuple(
+            datetime.fromisoformat(v) if tipo is datetime else tipo(v)
+            for tipo, v in zip(tipos, datos)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+def huella_filtros(*filtros) -> str:
+    """
+    Resumen corto de los filtros de una consulta, para incluirlo en la etiqueta del
+    cursor: un cursor de una página filtrada no es válido con otros filtros
+    """
+    crudo = json.dumps(filtros, default=str, separators=(",", ":")).encode()
+    return hashlib.sha1(crudo).hexdigest()[:12]
+
+def decode_cursor_para(cursor: str, etiqueta: str, *tipos) -> tuple:
+    """
+    Decodificar un cursor generado con encode_cursor(etiqueta, ...). La etiqueta
+    identifica el orden o filtro de la página: un cursor no es válido con otro.
+    """
+    recibida, *valores = decode_cursor(cursor, str, *tipos)
+    if recibida != etiqueta:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+    return tuple(valores)
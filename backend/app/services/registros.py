@@ -0,0 +1,137 @@
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from app.models.event import Evento, RegistroEvento
+from app.services.consultas import consulta_motivo_rechazo, consulta_ya_registrados
+
+# Reserva de cupos en eventos.
+# El cupo se descuenta con un UPDATE condicional (registrado < capacidad), por lo que
+# dos solicitudes concurrentes nunca pueden sobrevender un evento, y los registros
+# duplicados los rechaza la restricción única (user_id, evento_id).
+# reservar_cupos_lote registra a varios usuarios en una sola transacción (la usa la
+# cola de admisión de app.services.admision).
+
+COLUMNAS_EVENTO = (
+    Evento.titulo, Evento.descripcion, Evento.fecha_inicio,
+    Evento.fecha_fin, Evento.lugar, Evento.capacidad,
+)
+
+def error_sin_cupo() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El evento ha alcanzado su capacidad máxima")
+
+def error_duplicado() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ya estás registrado en este evento")
+
+async def _motivo_rechazo(db, evento_id: int, user_id: int) -> HTTPException:
+    """Determinar por qué no se pudo reservar: evento inexistente, duplicado o sin cupo"""
+    fila = (await db.execute(consulta_motivo_rechazo(evento_id, user_id))).first()
+    if fila is None:
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento no encontrado")
+    if fila[1]:
+        return error_duplicado()
+    return error_sin_cupo()
+
+async def reservar_cupo(db, evento_id: int, usuario) -> dict:
+    """
+    Registrar al usuario en el evento con dos sentencias y un commit.
+    Devuelve los datos con la forma de RegistroEventoResponse.
+    """
+    # Se copian antes del commit, que expira los objetos de la sesión
+    datos_usuario = {"id": usuario.id, "nombre": usuario.nombre}
+    evento = (await db.execute(
+        update(Evento)
+        .where(Evento.id == evento_id, Evento.registrado < Evento.capacidad)
+        .values(registrado=Evento.registrado + 1)
+        .returning(*COLUMNAS_EVENTO)
+        .execution_options(synchronize_session=False)
+    )).mappings().first()
+    if evento is None:
+        error = await _motivo_rechazo(db, evento_id, datos_usuario["id"])
+        await db.rollback()
+        raise error
+
+    registro = (await db.execute(
+        insert(RegistroEvento)
+        .values(user_id=datos_usuario["id"], evento_id=evento_id, confirmado=True)
+        .on_conflict_do_nothing(index_elements=["user_id", "evento_id"])
+        .returning(RegistroEvento.id, RegistroEvento.registrado_en, RegistroEvento.confirmado)
+    )).mappings().first()
+    if registro is None:
+        # Registro duplicado: se deshace también el cupo descontado
+        await db.rollback()
+        raise error_duplicado()
+
+    await db.commit()
+    return {
+        **registro,
+        "usuario": datos_usuario,
+        "evento": dict(evento),
+    }
+
+async def usuario_inscrito(db, evento_id: int, user_id: int) -> bool:
+    """Si el usuario ya está registrado en el evento (búsqueda por la restricción única)"""
+    return (await db.scalar(consulta_ya_registrados(evento_id, [user_id]))) is not None
+
+async def reservar_cupos_lote(db, evento_id: int, usuarios: list) -> tuple:
+    """
+    Registrar a varios usuarios (dicts con id y nombre, sin repetir) en el evento con
+    un INSERT de varias filas y un único descuento del cupo. Los cupos se asignan en
+    el orden de la lista. Devuelve (resultados, cupos libres tras el lote): cada
+    resultado tiene la forma de RegistroEventoResponse o es la HTTPException que
+    corresponde a ese usuario.
+    """
+    # El bloqueo de la fila serializa el lote con las reservas individuales y con
+    # otros lotes (de otros workers), igual que en la importación de asistentes
+    evento = (await db.execute(
+        select(*COLUMNAS_EVENTO, Evento.registrado)
+        .where(Evento.id == evento_id).with_for_update()
+    )).mappings().first()
+    if evento is None:
+        await db.rollback()
+        error = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Evento no encontrado")
+        return [error] * len(usuarios), None
+
+    existentes = set((await db.scalars(
+        consulta_ya_registrados(evento_id, [usuario["id"] for usuario in usuarios])
+    )).all())
+    disponibles = max(evento["capacidad"] - evento["registrado"], 0)
+    admitidos = [usuario["id"] for usuario in usuarios if usuario["id"] not in existentes][:disponibles]
+    registros = {}
+    if admitidos:
+        registros = {fila["user_id"]: fila for fila in (await db.execute(
+            insert(RegistroEvento)
+            .values([{"user_id": user_id, "evento_id": evento_id, "confirmado": True} for user_id in admitidos])
+            .on_conflict_do_nothing(index_elements=["user_id", "evento_id"])
+            .returning(RegistroEvento.user_id, RegistroEvento.id, RegistroEvento.registrado_en, RegistroEvento.confirmado)
+        )).mappings().all()}
+    libres = disponibles - len(registros)
+    if registros:
+        await db.execute(
+            update(Evento)
+            .where(Evento.id == evento_id)
+            .values(registrado=Evento.registrado + len(registros))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+    else:
+        await db.rollback()
+
+    datos_evento = {columna.key: evento[columna.key] for columna in COLUMNAS_EVENTO}
+    admitidos = set(admitidos)
+    resultados = []
+    for usuario in usuarios:
+        registro = registros.get(usuario["id"])
+        if registro is not None:
+            resultados.append({
+                "id": registro["id"],
+                "registrado_en": registro["registrado_en"],
+                "confirmado": registro["confirmado"],
+                "usuario": usuario,
+                "evento": datos_evento,
+            })
+        elif usuario["id"] in existentes or usuario["id"] in admitidos:
+            # En admitidos pero sin fila: otra transacción lo registró antes (ON CONFLICT)
+            resultados.append(error_duplicado())
+        else:
+            resultados.append(error_sin_cupo())
+    return resultados, libres
@@ -1,12 +1,18 @@
+import asyncio
 import pytest
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 from app.main import app
-from app.database import Base, get_db
+from app import database
+from app.database import Base, get_db, install_lazy_load_guard, ThreadedSession
 from app.models.user import User
 from app.models.event import Evento, RegistroEvento, Sesion
 from app.core.security import get_password_hash
+from app.core.cache import principal_cache
+from app.core.config import settings, _async_url
+from app.core.metrics import instrument_sql
+from app.services.estadisticas import estadisticas_cache
 
 DB_USER = "miseventos_user"
 DB_PASSWORD = "miseventos_2024"
@@ -22,9 +28,13 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Las pruebas fallan si un endpoint depende de cargas perezosas (consultas N+1)
+install_lazy_load_guard(TestingSessionLocal)
+# Las métricas de SQL por petición también cuentan las consultas del engine de pruebas
+instrument_sql(engine)
 
 TABLE_NAMES = [
-    "registros_eventos", 
+    "registro_eventos", 
     "sesiones",          
     "eventos",           
     "users",            
@@ -58,7 +68,7 @@ def db_session_fixture():
             nombre="User Test",
             email="user@test.com",
             password=get_password_hash("testpassword"),
-            role="USER",
+            role="ASISTENTE",
             is_active=True
         )
         db.add(regular_user)
@@ -68,3 +78,40 @@ def db_session_fixture():
         yield db
     finally:
         db.close()
+
+
+@pytest.fixture(name="client")
+def client_fixture(db_session):
+    """
+    Cliente de pruebas que usa la misma sesión de base de datos que la prueba.
+    """
+    def override_get_db():
+        yield ThreadedSession(db_session)
+
+    app.dependency_overrides[get_db] = override_get_db
+    # Los ids se reinician en cada prueba: no se reutilizan usuarios en caché
+    asyncio.run(principal_cache.clear())
+    asyncio.run(estadisticas_cache.clear())
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.fixture(name="async_client")
+def async_client_fixture(db_session, monkeypatch):
+    """
+    Cliente de pruebas sobre la ruta DB_ASYNC: sin reemplazar get_db, las peticiones
+    usan AsyncSession y el engine asyncpg apuntando a la base de datos de pruebas.
+    Los datos creados con db_session deben confirmarse (commit) para ser visibles.
+    """
+    monkeypatch.setattr(settings, "DB_ASYNC", True)
+    monkeypatch.setattr(settings, "ASYNC_DATABASE_URL", _async_url(SQLALCHEMY_DATABASE_URL))
+    # El engine se crea dentro del loop del cliente y el lifespan lo cierra al salir
+    monkeypatch.setattr(database, "_async_engine", None)
+    app.dependency_overrides.clear()
+    asyncio.run(principal_cache.clear())
+    asyncio.run(estadisticas_cache.clear())
+    with TestClient(app) as client:
+        yield client
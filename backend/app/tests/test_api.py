@@ -1,9 +1,21 @@
-from fastapi import status
-from app.models.event import Evento, RegistroEvento, EstadosEvento
+import asyncio
+import json
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException, status
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import InvalidRequestError
+from app.models.event import Evento, RegistroEvento, EstadosEvento, Sesion
 from app.models.user import User
-from app.core.security import create_access_token
-from datetime import timedelta
+from app.core.security import create_access_token, pwd_context, hashing_pool
+from datetime import datetime, timedelta
 from app.core.config import settings
+from app.database import ThreadedSession
+from app import main
+from app.core.profiling import ProfilingMiddleware
+from app.services.registros import reservar_cupo
+from app.services.estadisticas import estadisticas_cache, CLAVE_GENERACION
 
 # Fixture para obtener un token de acceso para un usuario de prueba
 def get_test_token(email: str):
@@ -210,3 +222,824 @@ def test_register_for_event_full_capacity(client, db_session):
     )
     assert response.status_code == status.HTTP_400_BAD_REQUEST
     assert response.json()["detail"] == "El evento ha alcanzado su capacidad máxima"
+
+def test_get_events_cursor_pagination(client, db_session):
+    """Prueba la paginación por cursor del listado de eventos."""
+    admin = db_session.query(User).filter(User.email == "admin@test.com").first()
+    for dia in range(1, 6):
+        db_session.add(Evento(
+            titulo=f"Evento {dia}",
+            descripcion="Evento para probar la paginación.",
+            fecha_inicio=datetime(2025, 12, dia, 9, 0),
+            fecha_fin=datetime(2025, 12, dia, 18, 0),
+            creador_id=admin.id
+        ))
+    db_session.commit()
+    db_session.expunge_all()
+
+    response = client.get("/api/events/", params={"limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert [e["titulo"] for e in response.json()] == ["Evento 1", "Evento 2"]
+    cursor = response.headers["X-Next-Cursor"]
+
+    titulos = []
+    while cursor:
+        response = client.get("/api/events/", params={"limit": 2, "cursor": cursor})
+        assert response.status_code == status.HTTP_200_OK
+        titulos += [e["titulo"] for e in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+    assert titulos == ["Evento 3", "Evento 4", "Evento 5"]
+
+    # El cursor no se acepta con otros filtros ni con otro orden
+    cursor = client.get("/api/events/", params={"limit": 2}).headers["X-Next-Cursor"]
+    for params in ({"lugar": "Online"}, {"has_capacity": "true"}, {"search": "Evento"}, {"sort": "creado"}):
+        response = client.get("/api/events/", params={"limit": 2, "cursor": cursor, **params})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # La paginación por offset sigue funcionando para los clientes antiguos
+    response = client.get("/api/events/", params={"skip": 4, "limit": 2})
+    assert [e["titulo"] for e in response.json()] == ["Evento 5"]
+    assert "X-Next-Cursor" not in response.headers
+
+def test_get_events_invalid_cursor(client):
+    """Prueba que un cursor mal formado se rechaza."""
+    response = client.get("/api/events/", params={"cursor": "no-es-un-cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "Cursor inválido"
+
+def test_search_events_full_text(client, db_session):
+    """Prueba la búsqueda de texto completo con lematización, prefijos y relevancia."""
+    admin = db_session.query(User).filter(User.email == "admin@test.com").first()
+    for titulo, descripcion in [
+        ("Taller de cocina", "Incluye una conferencia sobre recetas."),
+        ("Conferencias de Python", "Charlas sobre el lenguaje."),
+        ("Concierto", "Música en vivo."),
+    ]:
+        db_session.add(Evento(
+            titulo=titulo,
+            descripcion=descripcion,
+            fecha_inicio=datetime(2025, 12, 1, 9, 0),
+            fecha_fin=datetime(2025, 12, 1, 18, 0),
+            creador_id=admin.id
+        ))
+    db_session.commit()
+    db_session.expunge_all()
+
+    # "conferencia" coincide con "Conferencias" por lematización; el título pesa más
+    response = client.get("/api/events/", params={"search": "conferencia"})
+    assert response.status_code == status.HTTP_200_OK
+    assert [e["titulo"] for e in response.json()] == ["Conferencias de Python", "Taller de cocina"]
+
+    # El último término admite prefijos
+    response = client.get("/api/events/", params={"search": "pyth"})
+    assert [e["titulo"] for e in response.json()] == ["Conferencias de Python"]
+
+    # Los caracteres especiales no rompen la consulta
+    response = client.get("/api/events/", params={"search": "!&|"})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 3
+
+def create_test_event(db_session, titulo="Evento de prueba", capacidad=100):
+    """Crea un evento del usuario administrador directamente en la base de datos."""
+    admin = db_session.query(User).filter(User.email == "admin@test.com").first()
+    evento = Evento(
+        titulo=titulo,
+        descripcion="Evento creado por las pruebas.",
+        fecha_inicio=datetime(2025, 12, 1, 9, 0),
+        fecha_fin=datetime(2025, 12, 1, 18, 0),
+        capacidad=capacidad,
+        creador_id=admin.id
+    )
+    db_session.add(evento)
+    db_session.commit()
+    db_session.refresh(evento)
+    return evento
+
+def test_lazy_load_guard(db_session):
+    """Prueba que las cargas perezosas no declaradas fallan en las pruebas."""
+    create_test_event(db_session)
+    db_session.expunge_all()
+    evento = db_session.query(Evento).first()
+    with pytest.raises(InvalidRequestError):
+        evento.sesiones
+
+def test_get_event_detail_with_sessions(client, db_session):
+    """Prueba el detalle de un evento con creador y sesiones cargados explícitamente."""
+    evento_id = create_test_event(db_session).id
+    db_session.add(Sesion(
+        titulo="Apertura",
+        fecha_inicio=datetime(2025, 12, 1, 9, 0),
+        fecha_fin=datetime(2025, 12, 1, 10, 0),
+        nombre_orador="Ana",
+        evento_id=evento_id
+    ))
+    db_session.commit()
+    db_session.expunge_all()
+
+    response = client.get(f"/api/events/{evento_id}")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["creador"]["nombre"] == "Admin Test"
+    assert [s["titulo"] for s in data["sesiones"]] == ["Apertura"]
+
+def test_my_events_and_registrations(client, db_session):
+    """Prueba el registro en un evento y los listados del usuario autenticado."""
+    evento = create_test_event(db_session, titulo="Evento con asistentes")
+    db_session.expunge_all()
+    headers = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+
+    response = client.post(f"/api/events/registro/evento/{evento.id}/", headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["user"]["nombre"] == "User Test"
+    db_session.expunge_all()
+
+    response = client.get("/api/events/mis/eventos", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert [e["titulo"] for e in response.json()] == ["Evento con asistentes"]
+    assert response.json()[0]["creador"]["nombre"] == "Admin Test"
+    db_session.expunge_all()
+
+    response = client.get("/api/events/mis/registros", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data[0]["user"]["nombre"] == "User Test"
+    assert data[0]["evento"]["titulo"] == "Evento con asistentes"
+
+def test_pool_health(client):
+    """Prueba el reporte del estado del pool de conexiones."""
+    response = client.get("/health/pool")
+    assert response.status_code == status.HTTP_200_OK
+    pool = response.json()["pool"]
+    assert pool["size"] == settings.DB_POOL_SIZE
+    assert pool["max_overflow"] == settings.DB_MAX_OVERFLOW
+    for campo in ("checked_out", "idle", "overflow", "checkout_wait_avg_ms", "checkout_timeouts"):
+        assert campo in pool
+
+def test_concurrent_registrations_do_not_oversell(db_session):
+    """Prueba que registros concurrentes respetan la capacidad y rechazan duplicados."""
+    evento_id = create_test_event(db_session, titulo="Evento popular", capacidad=3).id
+    usuarios = [
+        User(nombre=f"Asistente {i}", email=f"asistente{i}@test.com", password="hash")
+        for i in range(10)
+    ]
+    db_session.add_all(usuarios)
+    db_session.commit()
+    # El mismo usuario intenta registrarse dos veces a la vez
+    datos = [SimpleNamespace(id=u.id, nombre=u.nombre) for u in usuarios] + [
+        SimpleNamespace(id=usuarios[0].id, nombre=usuarios[0].nombre)
+    ]
+    SesionConcurrente = sessionmaker(bind=db_session.get_bind())
+
+    async def registrar(usuario):
+        sesion = ThreadedSession(SesionConcurrente())
+        try:
+            await reservar_cupo(sesion, evento_id, usuario)
+            return status.HTTP_201_CREATED
+        except HTTPException as e:
+            return e.status_code
+        finally:
+            await sesion.close()
+
+    async def registrar_todos():
+        return await asyncio.gather(*(registrar(u) for u in datos))
+
+    resultados = asyncio.run(registrar_todos())
+    assert resultados.count(status.HTTP_201_CREATED) == 3
+    assert set(resultados) <= {status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST, status.HTTP_409_CONFLICT}
+
+    db_session.expire_all()
+    evento = db_session.get(Evento, evento_id)
+    assert evento.registrado == 3
+    assert db_session.query(RegistroEvento).filter(RegistroEvento.evento_id == evento_id).count() == 3
+
+def test_deactivated_user_is_locked_out(client, db_session):
+    """Prueba que desactivar un usuario invalida su entrada en la caché de autenticación."""
+    headers = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+    response = client.get("/api/events/mis/eventos", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    user_id = db_session.query(User).filter(User.email == "user@test.com").first().id
+    response = client.put(f"/api/auth/actualizar/{user_id}", json={"is_active": False})
+    assert response.status_code == status.HTTP_200_OK
+
+    response = client.get("/api/events/mis/eventos", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+def test_login_rehashes_password_with_new_cost(client, db_session):
+    """Prueba que el login recalcula los hashes creados con otro costo de bcrypt."""
+    user = db_session.query(User).filter(User.email == "user@test.com").first()
+    user.password = pwd_context.copy(bcrypt__rounds=4, bcrypt__min_rounds=4).hash("testpassword")
+    db_session.commit()
+
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "user@test.com", "password": "testpassword"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    db_session.refresh(user)
+    assert pwd_context.verify("testpassword", user.password)
+    assert not pwd_context.needs_update(user.password)
+
+def test_login_rejected_when_hashing_queue_is_full(client, monkeypatch):
+    """Prueba que el login responde 503 cuando la cola de hash está llena."""
+    monkeypatch.setattr(hashing_pool, "max_queue", 0)
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "user@test.com", "password": "testpassword"}
+    )
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+
+def test_event_detail_conditional_get(client, db_session):
+    """Prueba que el detalle responde 304 con el ETag vigente y 200 tras un cambio."""
+    evento_id = create_test_event(db_session).id
+    response = client.get(f"/api/events/{evento_id}")
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["ETag"]
+    assert "must-revalidate" in response.headers["Cache-Control"]
+
+    response = client.get(f"/api/events/{evento_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+    response = client.get(
+        f"/api/events/{evento_id}",
+        headers={"If-Modified-Since": response.headers["Last-Modified"]}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    headers = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+    response = client.post(f"/api/events/registro/evento/{evento_id}/", headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    response = client.get(f"/api/events/{evento_id}", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+def test_event_list_conditional_get(client, db_session):
+    """Prueba que la lista responde 304 mientras la página no cambie."""
+    create_test_event(db_session)
+    response = client.get("/api/events/")
+    etag = response.headers["ETag"]
+    response = client.get("/api/events/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    create_test_event(db_session, titulo="Otro evento")
+    response = client.get("/api/events/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+
+def test_bulk_create_events_with_sessions(client, db_session):
+    """Prueba la creación de eventos con sus sesiones en un solo lote."""
+    headers = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+    sesiones = [{
+        "titulo": f"Charla {i}",
+        "fecha_inicio": f"2030-06-01T{9 + i:02d}:00:00",
+        "fecha_fin": f"2030-06-01T{9 + i:02d}:45:00",
+        "nombre_orador": f"Orador {i}"
+    } for i in range(5)]
+    lote = {"eventos": [
+        {"titulo": "Congreso", "descripcion": "Agenda completa",
+         "fecha_inicio": "2030-06-01T08:00:00", "fecha_fin": "2030-06-01T18:00:00",
+         "sesiones": sesiones},
+        {"titulo": "Taller", "descripcion": "Sin sesiones",
+         "fecha_inicio": "2030-06-02T08:00:00", "fecha_fin": "2030-06-02T12:00:00"},
+    ]}
+    response = client.post("/api/events/registrar/lote", json=lote, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    data = response.json()
+    assert [e["titulo"] for e in data] == ["Congreso", "Taller"]
+    assert [s["titulo"] for s in data[0]["sesiones"]] == [f"Charla {i}" for i in range(5)]
+    assert data[1]["sesiones"] == []
+    assert data[0]["creador"]["nombre"] == "User Test"
+    assert db_session.query(Sesion).filter(Sesion.evento_id == data[0]["id"]).count() == 5
+
+def test_bulk_create_reports_errors_per_item(client, db_session):
+    """Prueba que un lote con errores no crea nada y reporta cada elemento inválido."""
+    headers = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+    lote = {"eventos": [
+        {"titulo": "Válido", "descripcion": "Ok",
+         "fecha_inicio": "2030-06-01T08:00:00", "fecha_fin": "2030-06-01T18:00:00",
+         "sesiones": [{"titulo": "Fuera de rango", "nombre_orador": "Ana",
+                       "fecha_inicio": "2030-06-02T09:00:00", "fecha_fin": "2030-06-02T10:00:00"}]},
+        {"titulo": "Fechas invertidas", "descripcion": "Error",
+         "fecha_inicio": "2030-06-02T12:00:00", "fecha_fin": "2030-06-02T08:00:00"},
+    ]}
+    response = client.post("/api/events/registrar/lote", json=lote, headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert [e["loc"] for e in response.json()["detail"]] == [
+        ["body", "eventos", 0, "sesiones", 0], ["body", "eventos", 1]
+    ]
+    assert db_session.query(Evento).count() == 0
+
+def test_import_attendees_from_csv(client, db_session, monkeypatch):
+    """Prueba la importación de asistentes con duplicados, cupo agotado y filas inválidas."""
+    monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+    db_session.add_all([
+        User(nombre=f"Invitado {i}", email=f"invitado{i}@test.com", password="hash")
+        for i in range(3)
+    ])
+    db_session.commit()
+    evento_id = create_test_event(db_session, capacidad=3).id
+    headers = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+    response = client.post(f"/api/events/registro/evento/{evento_id}/", headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    archivo = "\n".join([
+        "nombre,email",
+        "Usuario,user@test.com",
+        "Invitado,invitado0@test.com",
+        "Invitado,invitado0@test.com",
+        "Invitado,invitado1@test.com",
+        "Invitado,invitado2@test.com",
+        "Nadie,nadie@test.com",
+        "Sin correo,",
+    ])
+    admin = {"Authorization": f"Bearer {get_test_token('admin@test.com')}", "Content-Type": "text/csv"}
+    response = client.post(f"/api/events/{evento_id}/registros/importar", content=archivo, headers=admin)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "procesadas": 7, "aceptadas": 2, "duplicadas": 2, "sin_cupo": 1,
+        "no_encontradas": 1, "invalidas": 1
+    }
+    db_session.expire_all()
+    assert db_session.get(Evento, evento_id).registrado == 3
+    assert db_session.query(RegistroEvento).filter(RegistroEvento.evento_id == evento_id).count() == 3
+
+    response = client.post(f"/api/events/{evento_id}/registros/importar", content=archivo,
+                           headers={**headers, "Content-Type": "text/csv"})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+def test_export_event_registrations_streams_csv(client, db_session, monkeypatch):
+    """Prueba la exportación en streaming de los registros de un evento."""
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 1)
+    evento_id = create_test_event(db_session).id
+    for email in ("user@test.com", "admin@test.com"):
+        headers = {"Authorization": f"Bearer {get_test_token(email)}"}
+        client.post(f"/api/events/registro/evento/{evento_id}/", headers=headers)
+
+    admin = {"Authorization": f"Bearer {get_test_token('admin@test.com')}"}
+    response = client.get(f"/api/events/{evento_id}/registros/exportar?formato=csv", headers=admin)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    lineas = response.text.strip().splitlines()
+    assert lineas[0] == "id,registrado_en,confirmado,user_id,nombre,email"
+    assert [linea.split(",")[-1] for linea in lineas[1:]] == ["user@test.com", "admin@test.com"]
+
+    user = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+    response = client.get(f"/api/events/{evento_id}/registros/exportar", headers=user)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+def test_export_events_and_users_ndjson(client, db_session):
+    """Prueba la exportación NDJSON del catálogo de eventos y de usuarios."""
+    create_test_event(db_session, titulo="Primero")
+    create_test_event(db_session, titulo="Segundo")
+    response = client.get("/api/events/exportar/eventos")
+    assert response.status_code == status.HTTP_200_OK
+    eventos = [json.loads(linea) for linea in response.text.splitlines()]
+    assert [e["titulo"] for e in eventos] == ["Primero", "Segundo"]
+    assert eventos[0]["estado"] == "Pendiente"
+
+    admin = {"Authorization": f"Bearer {get_test_token('admin@test.com')}"}
+    response = client.get("/api/auth/users/exportar", headers=admin)
+    usuarios = [json.loads(linea) for linea in response.text.splitlines()]
+    assert {u["email"] for u in usuarios} == {"admin@test.com", "user@test.com"}
+    assert all("password" not in u for u in usuarios)
+
+def test_event_list_filters_and_sort(client, db_session):
+    """Prueba los filtros de cupo, estado y lugar y la paginación con orden descendente."""
+    lleno = create_test_event(db_session, titulo="Lleno", capacidad=1)
+    lleno.registrado = 1
+    lleno.lugar = "Medellín"
+    abierto = create_test_event(db_session, titulo="Abierto")
+    abierto.estado = EstadosEvento.EN_CURSO
+    abierto.fecha_inicio = datetime(2025, 12, 5, 9, 0)
+    db_session.commit()
+
+    response = client.get("/api/events/?has_capacity=true")
+    assert [e["titulo"] for e in response.json()] == ["Abierto"]
+    response = client.get("/api/events/?estado=En curso")
+    assert [e["titulo"] for e in response.json()] == ["Abierto"]
+    response = client.get("/api/events/?lugar=medellín")
+    assert [e["titulo"] for e in response.json()] == ["Lleno"]
+    response = client.get("/api/events/?fecha_inicio_desde=2025-12-02T00:00:00")
+    assert [e["titulo"] for e in response.json()] == ["Abierto"]
+
+    response = client.get("/api/events/?sort=-fecha_inicio&limit=1")
+    assert [e["titulo"] for e in response.json()] == ["Abierto"]
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f"/api/events/?sort=-fecha_inicio&limit=1&cursor={cursor}")
+    assert [e["titulo"] for e in response.json()] == ["Lleno"]
+    # Un cursor solo es válido con el orden que lo generó
+    response = client.get(f"/api/events/?sort=creado&cursor={cursor}")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_event_statistics(client, db_session):
+    """Prueba las estadísticas agregadas y su invalidación tras un registro."""
+    evento_id = create_test_event(db_session, titulo="Pequeño", capacidad=4).id
+    create_test_event(db_session, titulo="Grande", capacidad=16)
+    response = client.get("/api/events/estadisticas")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total"] == {"eventos": 2, "capacidad": 20, "registrado": 0, "ocupacion": 0.0}
+    assert data["por_estado"] == [
+        {"estado": "Pendiente", "eventos": 2, "capacidad": 20, "registrado": 0, "ocupacion": 0.0}
+    ]
+    assert data["por_organizador"][0]["creador"]["nombre"] == "Admin Test"
+
+    headers = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+    client.post(f"/api/events/registro/evento/{evento_id}/", headers=headers)
+    # La invalidación solo avanza la generación: no recorre ni borra las entradas
+    assert asyncio.run(estadisticas_cache.get(CLAVE_GENERACION)) == 1
+    data = client.get("/api/events/estadisticas").json()
+    assert data["total"]["registrado"] == 1
+    assert data["total"]["ocupacion"] == 0.05
+    assert [e["titulo"] for e in data["top_eventos"]] == ["Pequeño", "Grande"]
+    assert data["top_eventos"][0]["ocupacion"] == 0.25
+
+def test_user_directory_pagination_and_filters(client, db_session):
+    """Prueba la paginación por cursor, la búsqueda por prefijo y el total del directorio."""
+    response = client.get("/api/auth/users/?limit=1")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 1
+    assert response.headers["X-Total-Count"] == "2"
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f"/api/auth/users/?limit=1&cursor={cursor}")
+    assert len(response.json()) == 1
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/api/auth/users/?q=ADMIN&include_total=false")
+    assert [u["email"] for u in response.json()] == ["admin@test.com"]
+    assert "X-Total-Count" not in response.headers
+    response = client.get("/api/auth/users/?q=user_")
+    assert response.json() == []
+    response = client.get("/api/auth/users/?role=Asistente&is_active=true")
+    assert [u["email"] for u in response.json()] == ["user@test.com"]
+
+def test_my_events_and_registrations_paginated_by_period(client, db_session):
+    """Prueba la paginación y el filtro de próximos/pasados en mis eventos y mis registros."""
+    pasado = create_test_event(db_session, titulo="Pasado")
+    futuro = create_test_event(db_session, titulo="Futuro")
+    futuro.fecha_inicio = datetime.now() + timedelta(days=30)
+    futuro.fecha_fin = futuro.fecha_inicio + timedelta(hours=8)
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+    for evento_id in (pasado.id, futuro.id):
+        client.post(f"/api/events/registro/evento/{evento_id}/", headers=headers)
+
+    response = client.get("/api/events/mis/eventos?limit=1", headers=headers)
+    assert [e["titulo"] for e in response.json()] == ["Pasado"]
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f"/api/events/mis/eventos?limit=1&cursor={cursor}", headers=headers)
+    assert [e["titulo"] for e in response.json()] == ["Futuro"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/api/events/mis/registros?periodo=proximos", headers=headers)
+    assert [r["evento"]["titulo"] for r in response.json()] == ["Futuro"]
+    response = client.get("/api/events/mis/registros?periodo=pasados", headers=headers)
+    assert [r["evento"]["titulo"] for r in response.json()] == ["Pasado"]
+    response = client.get(f"/api/events/mis/registros?periodo=pasados&cursor={cursor}", headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_fast_json_matches_default_serialization(client, db_session, monkeypatch):
+    """Prueba que FAST_JSON produce el mismo cuerpo y las mismas cabeceras que la ruta normal."""
+    for titulo in ("Uno", "Dos", "Tres"):
+        create_test_event(db_session, titulo=titulo)
+    headers = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+    client.post(f"/api/events/registro/evento/{db_session.query(Evento).first().id}/", headers=headers)
+
+    normal = client.get("/api/events/?limit=2")
+    mis_eventos = client.get("/api/events/mis/eventos", headers=headers)
+    monkeypatch.setattr(settings, "FAST_JSON", True)
+    rapida = client.get("/api/events/?limit=2")
+    assert rapida.status_code == status.HTTP_200_OK
+    assert rapida.json() == normal.json()
+    for cabecera in ("Cache-Control", "X-Next-Cursor", "Content-Type"):
+        assert rapida.headers[cabecera] == normal.headers[cabecera]
+    # Los bytes pueden diferir (formato de fechas), así que el ETag depende de la representación
+    assert rapida.headers["ETag"] != normal.headers["ETag"]
+    assert client.get("/api/events/mis/eventos", headers=headers).json() == mis_eventos.json()
+
+def test_sparse_fieldsets(client, db_session, monkeypatch):
+    """Prueba que fields limita los campos del listado y del detalle."""
+    evento = create_test_event(db_session, titulo="Uno")
+    create_test_event(db_session, titulo="Dos")
+
+    response = client.get("/api/events/?limit=1&fields=titulo, registrado")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [{"titulo": "Uno", "registrado": 0}]
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f"/api/events/?limit=1&fields=titulo&cursor={cursor}")
+    assert response.json() == [{"titulo": "Dos"}]
+    assert response.headers["ETag"] != client.get(f"/api/events/?limit=1&cursor={cursor}").headers["ETag"]
+
+    monkeypatch.setattr(settings, "FAST_JSON", True)
+    response = client.get("/api/events/?limit=1&fields=titulo,creador")
+    assert response.json() == [{"titulo": "Uno", "creador": {"id": evento.creador_id, "nombre": "Admin Test"}}]
+    assert "X-Next-Cursor" in response.headers
+
+    response = client.get(f"/api/events/{evento.id}?fields=titulo,sesiones")
+    assert response.json() == {"titulo": "Uno", "sesiones": []}
+    response = client.get(f"/api/events/{evento.id}?fields=titulo,clave")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/api/events/?fields=,").status_code == status.HTTP_400_BAD_REQUEST
+
+def test_readiness_reports_warm_pool(client, monkeypatch):
+    """Prueba que /ready responde 503 hasta que el pool de conexiones está caliente."""
+    response = client.get("/ready")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "ready"
+    assert response.json()["pool"]["idle"] >= min(settings.DB_POOL_WARMUP, settings.DB_POOL_SIZE)
+
+    async def base_no_disponible(conexiones):
+        raise ConnectionError("sin base de datos")
+
+    monkeypatch.setattr(main, "warm_up_pool", base_no_disponible)
+    main.app.state.listo = False
+    response = client.get("/ready")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["status"] == "starting"
+    monkeypatch.undo()
+    assert client.get("/ready").status_code == status.HTTP_200_OK
+
+def test_metrics_by_route_template(client, db_session):
+    """Prueba las métricas de latencia y de SQL por plantilla de ruta en /metrics."""
+    from prometheus_client import REGISTRY
+    evento = create_test_event(db_session)
+    etiquetas = {"method": "GET", "route": "/api/events/{evento_id}", "status": "200"}
+    antes = REGISTRY.get_sample_value("http_request_duration_seconds_count", etiquetas) or 0
+    sql_antes = REGISTRY.get_sample_value("http_request_sql_statements_sum", {"route": etiquetas["route"]}) or 0
+    for _ in range(2):
+        client.get(f"/api/events/{evento.id}")
+    assert REGISTRY.get_sample_value("http_request_duration_seconds_count", etiquetas) == antes + 2
+    assert REGISTRY.get_sample_value("http_request_sql_statements_sum", {"route": etiquetas["route"]}) >= sql_antes + 4
+
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert 'route="/api/events/{evento_id}"' in response.text
+    for nombre in ("http_requests_in_progress", "threadpool_threads_in_use", "bcrypt_pending_operations"):
+        assert nombre in response.text
+
+def test_slow_query_log_with_explain(client, db_session, monkeypatch, caplog):
+    """Prueba el registro de consultas lentas con la ruta de origen y EXPLAIN ANALYZE."""
+    from app.core.slow_queries import SlowQueryLog
+    engine = db_session.get_bind()
+    evento = create_test_event(db_session, capacidad=5)
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.0)
+    registro = SlowQueryLog()
+    registro.install(engine)
+    try:
+        with caplog.at_level("WARNING", logger="app.slow_queries"):
+            response = client.get(f"/api/events/{evento.id}")
+            assert response.json()["titulo"] == "Evento de prueba"
+            headers = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+            response = client.post(f"/api/events/registro/evento/{evento.id}/", headers=headers)
+            assert response.status_code == status.HTTP_201_CREATED
+    finally:
+        registro.uninstall(engine)
+    mensajes = [r.getMessage() for r in caplog.records]
+    assert any("/api/events/{evento_id}" in m and "Execution Time" in m for m in mensajes)
+    # EXPLAIN ANALYZE de las escrituras se revierte: el registro no se duplica
+    db_session.expire_all()
+    assert db_session.get(Evento, evento.id).registrado == 1
+    assert db_session.query(RegistroEvento).count() == 1
+
+def test_profiling_token_returns_report(client, db_session, tmp_path, monkeypatch):
+    """Prueba el perfilado bajo demanda: solo con un token firmado y emitido a un administrador."""
+    evento = create_test_event(db_session)
+    headers = {"Authorization": f"Bearer {get_test_token('admin@test.com')}"}
+    # Desactivado por defecto: no se emiten tokens
+    assert client.post("/api/auth/profiling/token", headers=headers).status_code == status.HTTP_404_NOT_FOUND
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    user = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+    assert client.post("/api/auth/profiling/token", headers=user).status_code == status.HTTP_403_FORBIDDEN
+    token = client.post("/api/auth/profiling/token", headers=headers).json()["token"]
+    # El middleware se instala al importar la aplicación solo con PROFILING_ENABLED
+    perfilado = TestClient(ProfilingMiddleware(main.app))
+
+    # Sin token o con una firma alterada la respuesta es la normal
+    assert perfilado.get(f"/api/events/{evento.id}").json()["titulo"] == "Evento de prueba"
+    alterado = token[:-1] + ("0" if token[-1] != "0" else "1")
+    response = perfilado.get(f"/api/events/{evento.id}", headers={"X-Profile": alterado})
+    assert response.json()["titulo"] == "Evento de prueba"
+
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    response = perfilado.get(f"/api/events/{evento.id}", headers={"X-Profile": token})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["X-Profiled-Status"] == "200"
+    assert "Tiempo por componente:" in response.text
+    assert response.headers["X-Profile"] == "pyinstrument"
+    # Una petición sin muestras (más corta que el intervalo) también devuelve su informe
+    monkeypatch.setattr(settings, "PROFILING_INTERVAL_MS", 60_000)
+    response = perfilado.get("/", headers={"X-Profile": token})
+    assert response.headers["X-Profiled-Status"] == "200"
+    assert "Tiempo por componente:" in response.text
+    # En la URL el token no se acepta: quedaría en los logs de acceso
+    response = perfilado.get(f"/api/events/{evento.id}?profile={token}")
+    assert "X-Profiled-Status" not in response.headers
+    assert response.json()["titulo"] == "Evento de prueba"
+    assert len(list(tmp_path.iterdir())) == 2
+
+def test_admission_queue_batches_registrations(db_session, monkeypatch):
+    """Prueba que la cola de admisión registra por lotes sin sobrevender y rechaza sin bloquear el evento."""
+    from contextlib import asynccontextmanager
+    from sqlalchemy import event
+    import time
+    from app.services.admision import AdmisionRegistros, ColaAdmision
+    monkeypatch.setattr(settings, "REGISTRATION_BATCH_WINDOW_MS", 50)
+    monkeypatch.setattr(settings, "REGISTRATION_CAPACITY_TTL", 0.2)
+    evento_id = create_test_event(db_session, titulo="Evento popular", capacidad=4).id
+    usuarios = [
+        User(nombre=f"Asistente {i}", email=f"asistente{i}@test.com", password="hash")
+        for i in range(10)
+    ]
+    db_session.add_all(usuarios)
+    db_session.commit()
+    datos = [SimpleNamespace(id=u.id, nombre=u.nombre) for u in usuarios] + [
+        SimpleNamespace(id=usuarios[0].id, nombre=usuarios[0].nombre)
+    ]
+    engine = db_session.get_bind()
+    SesionLote = sessionmaker(bind=engine)
+
+    @asynccontextmanager
+    async def abrir_sesion():
+        sesion = ThreadedSession(SesionLote())
+        try:
+            yield sesion
+        finally:
+            await sesion.close()
+
+    admision = AdmisionRegistros(abrir_sesion)
+    sentencias = []
+
+    async def registrar(usuario):
+        try:
+            registro = await admision.reservar(evento_id, usuario)
+            assert registro["usuario"]["id"] == usuario.id
+            return status.HTTP_201_CREATED
+        except HTTPException as e:
+            return e.status_code
+
+    async def escenario():
+        resultados = await asyncio.gather(*(registrar(u) for u in datos))
+        lote = list(sentencias)
+        # Evento lleno: el rechazo solo busca al usuario entre los registros (409 si ya está inscrito)
+        assert await registrar(datos[9]) == status.HTTP_400_BAD_REQUEST
+        assert await registrar(datos[0]) == status.HTTP_409_CONFLICT
+        rechazos = sentencias[len(lote):]
+        assert evento_id in admision.colas
+        await asyncio.sleep(0.3)
+        assert evento_id not in admision.colas
+        return resultados, lote, rechazos
+
+    def contar(conn, cursor, statement, *args):
+        sentencias.append(statement)
+
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        resultados, lote, rechazos = asyncio.run(escenario())
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+
+    assert resultados.count(status.HTTP_201_CREATED) == 4
+    assert resultados.count(status.HTTP_409_CONFLICT) == 1
+    assert resultados.count(status.HTTP_400_BAD_REQUEST) == 6
+    # Un solo lote: bloqueo del evento, duplicados, INSERT de varias filas y descuento del cupo
+    assert sum(s.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE")) for s in lote) == 4
+    consultas = [s for s in rechazos if s.lstrip().upper().startswith("SELECT")]
+    assert len(consultas) == 2
+    assert all("registro_eventos" in s and "FOR UPDATE" not in s.upper() for s in consultas)
+    db_session.expire_all()
+    assert db_session.get(Evento, evento_id).registrado == 4
+    assert db_session.query(RegistroEvento).filter(RegistroEvento.evento_id == evento_id).count() == 4
+
+    # Las solicitudes de un lote en curso cuentan como cupos ocupados
+    cola = ColaAdmision(evento_id, abrir_sesion)
+    cola.libres, cola.vigencia, cola.en_curso = 2, time.monotonic() + 60, 2
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(cola.reservar(datos[9]))
+    assert error.value.status_code == status.HTTP_400_BAD_REQUEST
+
+def test_get_events_rejects_invalid_limit(client, db_session):
+    """Prueba que el listado valida limit y skip en vez de fallar con 500."""
+    create_test_event(db_session)
+    for params in ({"limit": 0}, {"limit": -1}, {"limit": 201}, {"skip": -1}):
+        assert client.get("/api/events/", params=params).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert client.get("/api/events/", params={"limit": 1}).status_code == status.HTTP_200_OK
+
+def test_events_etag_tracks_creator_name_and_representation(client, db_session, monkeypatch):
+    """Prueba que ETag y Last-Modified cambian si el creador cambia de nombre, y el ETag si cambia la serialización (FAST_JSON)."""
+    evento = create_test_event(db_session)
+    etag = client.get("/api/events/").headers["ETag"]
+    etag_detalle = client.get(f"/api/events/{evento.id}").headers["ETag"]
+
+    admin = db_session.query(User).filter(User.email == "admin@test.com").first()
+    admin.nombre = "Admin Renombrado"
+    db_session.commit()
+    response = client.get("/api/events/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["creador"]["nombre"] == "Admin Renombrado"
+    response = client.get(f"/api/events/{evento.id}", headers={"If-None-Match": etag_detalle})
+    assert response.status_code == status.HTTP_200_OK
+
+    # Last-Modified también refleja la edición del creador
+    hace_una_hora = datetime.now() - timedelta(hours=1)
+    db_session.query(Evento).update({Evento.modificado: hace_una_hora})
+    db_session.query(User).update({User.modificado: hace_una_hora})
+    db_session.commit()
+    ultima_modificacion = client.get(f"/api/events/{evento.id}").headers["Last-Modified"]
+    admin.nombre = "Admin Renombrado otra vez"
+    db_session.commit()
+    response = client.get(f"/api/events/{evento.id}", headers={"If-Modified-Since": ultima_modificacion})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["creador"]["nombre"] == "Admin Renombrado otra vez"
+    assert response.headers["Last-Modified"] != ultima_modificacion
+
+    etag = client.get("/api/events/").headers["ETag"]
+    monkeypatch.setattr(settings, "FAST_JSON", True)
+    response = client.get("/api/events/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["ETag"] != etag
+
+def test_sql_timing_survives_failed_statements(db_session):
+    """Prueba que las sentencias que fallan no dejan tiempos de inicio acumulados en la conexión."""
+    from sqlalchemy import text
+    from sqlalchemy.exc import ProgrammingError
+    from app.core.metrics import _sql_peticion
+    engine = db_session.get_bind()
+    acumulado = [0, 0.0, "/prueba"]
+    token = _sql_peticion.set(acumulado)
+    try:
+        with engine.connect() as conn:
+            for _ in range(3):
+                with pytest.raises(ProgrammingError):
+                    conn.execute(text("SELECT * FROM tabla_inexistente"))
+                conn.rollback()
+            conn.execute(text("SELECT 1"))
+            assert not [clave for clave in conn.info if "inicio" in clave]
+    finally:
+        _sql_peticion.reset(token)
+    assert acumulado[0] == 1 and acumulado[1] > 0
+
+def test_async_db_path_smoke(async_client, db_session):
+    """Prueba el listado, el detalle y la inscripción con DB_ASYNC (AsyncSession y asyncpg)."""
+    evento = create_test_event(db_session, titulo="Evento asíncrono", capacidad=1)
+    db_session.add(Sesion(
+        titulo="Apertura",
+        fecha_inicio=datetime(2025, 12, 1, 9, 0),
+        fecha_fin=datetime(2025, 12, 1, 10, 0),
+        nombre_orador="Ana",
+        evento_id=evento.id
+    ))
+    db_session.commit()
+    evento_id = evento.id
+    db_session.expunge_all()
+
+    response = async_client.get("/health/pool")
+    assert response.json()["driver"] == "asyncpg"
+
+    response = async_client.get("/api/events/")
+    assert response.status_code == status.HTTP_200_OK
+    assert [e["titulo"] for e in response.json()] == ["Evento asíncrono"]
+    assert response.json()[0]["creador"]["nombre"] == "Admin Test"
+
+    response = async_client.get(f"/api/events/{evento_id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert [s["titulo"] for s in response.json()["sesiones"]] == ["Apertura"]
+
+    user = {"Authorization": f"Bearer {get_test_token('user@test.com')}"}
+    response = async_client.post(f"/api/events/registro/evento/{evento_id}/", headers=user)
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["user"]["nombre"] == "User Test"
+    assert response.json()["evento"]["titulo"] == "Evento asíncrono"
+
+    response = async_client.post(f"/api/events/registro/evento/{evento_id}/", headers=user)
+    assert response.status_code == status.HTTP_409_CONFLICT
+    admin = {"Authorization": f"Bearer {get_test_token('admin@test.com')}"}
+    response = async_client.post(f"/api/events/registro/evento/{evento_id}/", headers=admin)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    db_session.expire_all()
+    assert db_session.get(Evento, evento_id).registrado == 1
+    assert db_session.query(RegistroEvento).filter(RegistroEvento.evento_id == evento_id).count() == 1
+
+def test_if_modified_since_accepts_asctime_dates(client, db_session):
+    """Prueba If-Modified-Since con fechas sin zona horaria (asctime y -0000)."""
+    evento_id = create_test_event(db_session).id
+    for fecha, esperado in (
+        ("Sun Nov  6 08:49:37 1994", status.HTTP_200_OK),
+        ("Sun, 06 Nov 1994 08:49:37 -0000", status.HTTP_200_OK),
+        ("Fri Dec 31 23:59:59 9999", status.HTTP_304_NOT_MODIFIED),
+    ):
+        response = client.get(f"/api/events/{evento_id}", headers={"If-Modified-Since": fecha})
+        assert response.status_code == esperado
+
+def test_incomplete_cache_backend_cannot_be_instantiated():
+    """Prueba que un backend de caché sin todos los métodos falla al crearse, no en el primer uso."""
+    from app.core.cache import CacheBackend, MemoryCache
+
+    class SoloLectura(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        SoloLectura()
+    assert isinstance(MemoryCache(), CacheBackend)
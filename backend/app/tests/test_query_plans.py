@@ -0,0 +1,135 @@
+import re
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select, text
+from app.models.event import Evento, RegistroEvento, Sesion, EstadosEvento
+from app.models.user import User
+from app.services.busqueda import build_search_query
+from app.services import consultas
+
+# Pruebas de regresión de planes de ejecución.
+# Se ejecuta EXPLAIN sobre las consultas de las rutas más usadas con una base de
+# datos sembrada y con enable_seqscan desactivado: si alguna tabla se sigue
+# recorriendo de forma secuencial es porque ningún índice sirve para la consulta.
+# También se desactivan los merge/hash joins, que con pocas filas leen un índice
+# completo aunque exista uno adecuado; así cada join debe resolverse por índice.
+
+N_USUARIOS = 50
+N_EVENTOS = 200
+
+@pytest.fixture(name="seeded")
+def seeded_fixture(db_session):
+    """Siembra usuarios, eventos, sesiones y registros y actualiza las estadísticas."""
+    inicio = datetime(2030, 1, 1, 9, 0)
+    db_session.execute(insert(User), [
+        {"email": f"plan{i}@test.com", "password": "hash", "nombre": f"Plan {i}"}
+        for i in range(N_USUARIOS)
+    ])
+    user_ids = db_session.scalars(select(User.id).order_by(User.id)).all()
+    db_session.execute(insert(Evento), [{
+        "titulo": f"Conferencia {i}", "descripcion": "Charlas de tecnología",
+        "fecha_inicio": inicio + timedelta(days=i), "fecha_fin": inicio + timedelta(days=i, hours=8),
+        "creador_id": user_ids[i % N_USUARIOS], "capacidad": 100,
+    } for i in range(N_EVENTOS)])
+    evento_ids = db_session.scalars(select(Evento.id).order_by(Evento.id)).all()
+    db_session.execute(insert(Sesion), [{
+        "titulo": f"Sesión {j}", "nombre_orador": "Orador", "evento_id": evento_id,
+        "fecha_inicio": inicio, "fecha_fin": inicio + timedelta(hours=1),
+    } for evento_id in evento_ids for j in range(3)])
+    db_session.execute(insert(RegistroEvento), [
+        {"user_id": user_id, "evento_id": evento_id, "confirmado": True}
+        for user_id in user_ids for evento_id in evento_ids[:20]
+    ])
+    db_session.commit()
+    db_session.execute(text("ANALYZE"))
+    return {"user_id": user_ids[0], "evento_id": evento_ids[0], "inicio": inicio}
+
+def explain(db_session, statement) -> dict:
+    """Plan en JSON de la sentencia, tal como la compila SQLAlchemy"""
+    compiled = statement.compile(
+        dialect=db_session.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    for parametro in ("enable_seqscan", "enable_mergejoin", "enable_hashjoin"):
+        db_session.execute(text(f"SET LOCAL {parametro} = off"))
+    plan = db_session.connection().exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + str(compiled).replace("%", "%%")
+    ).scalar()
+    db_session.rollback()
+    return plan[0]["Plan"]
+
+def nodos(plan: dict):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from nodos(hijo)
+
+ESCANEOS_DE_INDICE = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+def columna_inicial(db_session, indice: str) -> str:
+    """Primera clave del índice: nombre de columna o expresión (p. ej. lower(lugar))"""
+    return db_session.execute(text("""
+        SELECT pg_get_indexdef(c.oid, 1, true) FROM pg_class c WHERE c.relname = :indice
+    """), {"indice": indice}).scalar()
+
+def columna_base(clave: str) -> str:
+    """Columna referenciada por una clave de índice: lower(lugar::text) -> lugar"""
+    return re.findall(r"\b[a-z_]+\b(?!\()", clave.replace("::text", ""))[0]
+
+def recorridos_completos(db_session, plan: dict, bajo_limit: bool = False) -> set:
+    """
+    Tablas o índices leídos completos: Seq Scan, o un escaneo de índice cuya condición
+    no usa la primera columna del índice (con enable_seqscan desactivado el
+    planificador lo usa en lugar del Seq Scan). Un índice sin condición directamente
+    bajo un LIMIT se acepta: solo se leen las primeras filas en el orden del índice.
+    """
+    if plan["Node Type"] == "Limit":
+        bajo_limit = True
+    elif plan["Node Type"] == "Sort":
+        bajo_limit = False
+    encontrados = set()
+    if plan["Node Type"] == "Seq Scan":
+        encontrados.add(plan["Relation Name"])
+    elif plan["Node Type"] in ESCANEOS_DE_INDICE:
+        condicion = plan.get("Index Cond")
+        columna = columna_inicial(db_session, plan["Index Name"])
+        if condicion is None and not bajo_limit:
+            encontrados.add(plan["Index Name"])
+        elif condicion is not None and not re.search(rf"\b{re.escape(columna_base(columna))}\b", condicion):
+            encontrados.add(plan["Index Name"])
+    for hijo in plan.get("Plans", []):
+        encontrados |= recorridos_completos(db_session, hijo, bajo_limit)
+    return encontrados
+
+CONSULTAS = {
+    "listado_eventos": lambda d: consultas.consulta_eventos(10),
+    "listado_eventos_cursor": lambda d: consultas.consulta_eventos(10, despues_de=(d["inicio"], d["evento_id"])),
+    "busqueda_eventos": lambda d: consultas.consulta_eventos(10, tsquery=build_search_query("conferencia")),
+    "listado_por_estado": lambda d: consultas.consulta_eventos(10, estado=EstadosEvento.PENDIENTE),
+    "listado_por_lugar": lambda d: consultas.consulta_eventos(10, lugar="Bogotá"),
+    "listado_por_creador": lambda d: consultas.consulta_eventos(10, creador_id=d["user_id"]),
+    "listado_rango_fechas": lambda d: consultas.consulta_eventos(
+        10, fecha_inicio_desde=d["inicio"], fecha_inicio_hasta=d["inicio"] + timedelta(days=7)),
+    "listado_recientes_cursor": lambda d: consultas.consulta_eventos(
+        10, despues_de=(d["inicio"], d["evento_id"]), orden="-creado"),
+    "mis_eventos": lambda d: consultas.consulta_mis_eventos(d["user_id"]),
+    "mis_registros": lambda d: consultas.consulta_mis_registros(d["user_id"]),
+    "sesiones_evento": lambda d: consultas.consulta_sesiones_evento(d["evento_id"]),
+    "registro_duplicado": lambda d: consultas.consulta_motivo_rechazo(d["evento_id"], d["user_id"]),
+    "registros_evento": lambda d: consultas.consulta_registros_evento(d["evento_id"]),
+    "usuarios_por_email": lambda d: consultas.consulta_usuarios_por_email(["plan1@test.com", "plan2@test.com"]),
+    "directorio_usuarios": lambda d: consultas.consulta_usuarios(50, despues_de=d["user_id"]),
+    "directorio_usuarios_prefijo": lambda d: consultas.consulta_usuarios(50, q="plan1"),
+    "ya_registrados": lambda d: consultas.consulta_ya_registrados(d["evento_id"], [d["user_id"]]),
+}
+
+@pytest.mark.parametrize("nombre", list(CONSULTAS))
+def test_hot_query_uses_indexes(db_session, seeded, nombre):
+    """Prueba que las consultas de las rutas más usadas no recorren tablas completas."""
+    plan = explain(db_session, CONSULTAS[nombre](seeded))
+    completos = recorridos_completos(db_session, plan)
+    assert completos == set(), f"{nombre} recorre completos: {sorted(completos)}"
+
+def test_open_events_use_partial_index(db_session, seeded):
+    """Prueba que el filtro has_capacity usa el índice parcial de eventos con cupo."""
+    plan = explain(db_session, consultas.consulta_eventos(10, has_capacity=True))
+    indices = {n.get("Index Name") for n in nodos(plan)}
+    assert "ix_eventos_con_cupo_fecha_inicio" in indices
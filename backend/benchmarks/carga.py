@@ -0,0 +1,216 @@
+"""
+Prueba de carga de la API con clientes concurrentes.
+
+    python -m benchmarks.carga [--url http://localhost:8000] [--clientes 50] [--duracion 30]
+                               [--escenarios catalogo,busqueda,login,flash]
+
+Requiere la API en marcha (con varios workers si se quiere medir producción) sobre
+una base de datos sembrada con benchmarks.sembrar. El script usa la misma
+configuración (DATABASE_URL, SECRET_KEY) para leer los usuarios de prueba, firmar
+sus tokens y crear el evento del escenario flash.
+
+Escenarios:
+- catalogo: primera página del listado, dos páginas más con el cursor y el detalle
+  de un evento de la página.
+- busqueda: listado con search= sobre términos presentes en los títulos.
+- login: inicios de sesión de usuarios distintos (bcrypt en el servidor).
+- flash: muchos usuarios se inscriben a la vez en un evento nuevo con poco cupo;
+  se comprueba que no se vendan más cupos de los disponibles.
+
+Se informa el throughput y los percentiles p50/p95/p99 por endpoint, y el resultado
+se guarda en benchmarks/resultados/ para compararlo con benchmarks.resultados.
+Los clientes corren en un solo proceso: si su CPU se satura, la medida la limita
+el generador de carga y no la API.
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+import httpx
+from sqlalchemy import text
+from app.core.security import create_access_token
+from app.database import get_engine
+from benchmarks.resultados import guardar, resumen_latencias
+from benchmarks.sembrar import CIUDADES, PASSWORD, PATRON_EMAIL, TEMAS
+
+ESCENARIOS = ("catalogo", "busqueda", "login", "flash")
+
+class Registro:
+    """Latencias y códigos de estado por endpoint de un escenario"""
+
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.estados = defaultdict(Counter)
+
+    async def pedir(self, cliente: httpx.AsyncClient, endpoint: str, metodo: str, url: str, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            respuesta = await cliente.request(metodo, url, **kwargs)
+        except httpx.HTTPError as error:
+            self.estados[endpoint][type(error).__name__] += 1
+            return None
+        self.latencias[endpoint].append(time.perf_counter() - inicio)
+        self.estados[endpoint][str(respuesta.status_code)] += 1
+        return respuesta
+
+    def resumen(self, duracion: float) -> dict:
+        endpoints = {}
+        for endpoint, estados in self.estados.items():
+            datos = resumen_latencias(self.latencias[endpoint], duracion)
+            datos["estados"] = dict(estados)
+            datos["errores"] = sum(n for estado, n in estados.items() if not estado.isdigit() or int(estado) >= 500)
+            endpoints[endpoint] = datos
+        return endpoints
+
+async def catalogo(cliente, registro, contexto):
+    pagina = await registro.pedir(cliente, "GET /api/events/", "GET", "/api/events/", params={"limit": 20})
+    for _ in range(2):
+        if pagina is None or "X-Next-Cursor" not in pagina.headers:
+            break
+        pagina = await registro.pedir(cliente, "GET /api/events/ (cursor)", "GET", "/api/events/",
+                                      params={"limit": 20, "cursor": pagina.headers["X-Next-Cursor"]})
+    if pagina is not None and pagina.status_code == 200 and pagina.json():
+        evento = random.choice(pagina.json())
+        await registro.pedir(cliente, "GET /api/events/{evento_id}", "GET", f"/api/events/{evento['id']}")
+
+async def busqueda(cliente, registro, contexto):
+    termino = random.choice(contexto["terminos"])
+    await registro.pedir(cliente, "GET /api/events/?search", "GET", "/api/events/",
+                         params={"search": termino, "limit": 20})
+
+async def login(cliente, registro, contexto):
+    email = f"bench{random.randint(1, contexto['usuarios'])}@example.com"
+    await registro.pedir(cliente, "POST /api/auth/login", "POST", "/api/auth/login",
+                         data={"username": email, "password": PASSWORD})
+
+async def repetir(escenario, cliente, registro, contexto, hasta: float):
+    while time.perf_counter() < hasta:
+        await escenario(cliente, registro, contexto)
+
+def crear_evento_flash(cupo: int) -> int:
+    with get_engine().begin() as conn:
+        creador = conn.execute(text(
+            "SELECT id FROM users WHERE email LIKE :patron AND role = 'ORGANIZADOR' LIMIT 1"
+        ), {"patron": PATRON_EMAIL}).scalar_one()
+        inicio = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=30)
+        return conn.execute(text("""
+            INSERT INTO eventos (titulo, descripcion, fecha_inicio, fecha_fin, lugar, capacidad, registrado, estado, creador_id)
+            VALUES ('Venta flash', 'Evento del escenario flash de la prueba de carga', :inicio, :fin,
+                    'Bogotá', :cupo, 0, 'PENDIENTE', :creador)
+            RETURNING id
+        """), {"inicio": inicio, "fin": inicio + timedelta(hours=4), "cupo": cupo, "creador": creador}).scalar_one()
+
+def cerrar_evento_flash(evento_id: int) -> dict:
+    """Cupos vendidos según el evento y según los registros; luego borra el evento"""
+    with get_engine().begin() as conn:
+        registrado = conn.execute(text("SELECT registrado FROM eventos WHERE id = :id"), {"id": evento_id}).scalar_one()
+        registros = conn.execute(text(
+            "SELECT count(*) FROM registro_eventos WHERE evento_id = :id"
+        ), {"id": evento_id}).scalar_one()
+        conn.execute(text("DELETE FROM registro_eventos WHERE evento_id = :id"), {"id": evento_id})
+        conn.execute(text("DELETE FROM eventos WHERE id = :id"), {"id": evento_id})
+    return {"registrado": registrado, "registros": registros}
+
+async def flash(cliente, registro, contexto, args) -> dict:
+    """Cada cliente toma usuarios de una cola y los inscribe en el mismo evento"""
+    evento_id = crear_evento_flash(args.flash_cupo)
+    cantidad = min(args.flash_usuarios, contexto["usuarios"])
+    cola = asyncio.Queue()
+    for n in random.sample(range(1, contexto["usuarios"] + 1), cantidad):
+        cola.put_nowait(create_access_token({"sub": f"bench{n}@example.com"}))
+    url = f"/api/events/registro/evento/{evento_id}/"
+
+    async def inscribir():
+        while not cola.empty():
+            token = cola.get_nowait()
+            await registro.pedir(cliente, "POST /api/events/registro/evento/{event_id}/", "POST", url,
+                                 headers={"Authorization": f"Bearer {token}"})
+
+    inicio = time.perf_counter()
+    try:
+        await asyncio.gather(*(inscribir() for _ in range(args.clientes)))
+    finally:
+        duracion = time.perf_counter() - inicio
+        vendidos = cerrar_evento_flash(evento_id)
+    aceptados = sum(registro.estados.values(), Counter())["201"]
+    return {
+        "duracion_s": round(duracion, 2),
+        "cupo": args.flash_cupo,
+        "usuarios": cantidad,
+        "aceptados": aceptados,
+        **vendidos,
+        "sobreventa": max(vendidos["registrado"], vendidos["registros"]) > args.flash_cupo,
+    }
+
+async def ejecutar(nombre: str, args, contexto) -> dict:
+    limites = httpx.Limits(max_connections=args.clientes, max_keepalive_connections=args.clientes)
+    async with httpx.AsyncClient(base_url=args.url, limits=limites, timeout=args.timeout) as cliente:
+        if nombre == "flash":
+            registro = Registro()
+            datos = await flash(cliente, registro, contexto, args)
+            datos["endpoints"] = registro.resumen(datos["duracion_s"])
+            return datos
+        escenario = globals()[nombre]
+        if args.calentamiento:
+            hasta = time.perf_counter() + args.calentamiento
+            await asyncio.gather(*(repetir(escenario, cliente, Registro(), contexto, hasta) for _ in range(args.clientes)))
+        registro = Registro()
+        inicio = time.perf_counter()
+        hasta = inicio + args.duracion
+        await asyncio.gather(*(repetir(escenario, cliente, registro, contexto, hasta) for _ in range(args.clientes)))
+        duracion = time.perf_counter() - inicio
+        return {"duracion_s": round(duracion, 2), "endpoints": registro.resumen(duracion)}
+
+def imprimir(nombre: str, datos: dict):
+    print(f"\n{nombre} ({datos['duracion_s']} s)")
+    print(f"  {'endpoint':<48}{'peticiones':>11}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  estados")
+    for endpoint, valores in datos["endpoints"].items():
+        print(f"  {endpoint:<48}{valores['peticiones']:>11}{valores['rps']:>9}{valores['p50_ms']:>9}"
+              f"{valores['p95_ms']:>9}{valores['p99_ms']:>9}  {valores['estados']}")
+    if nombre == "flash":
+        print(f"  cupo {datos['cupo']}, aceptados {datos['aceptados']}, registrado {datos['registrado']}, "
+              f"registros {datos['registros']}{'  ¡SOBREVENTA!' if datos['sobreventa'] else ''}")
+
+async def principal(args):
+    with get_engine().connect() as conn:
+        usuarios = conn.execute(text("SELECT count(*) FROM users WHERE email LIKE :patron"),
+                                {"patron": PATRON_EMAIL}).scalar_one()
+    if not usuarios:
+        raise SystemExit("No hay usuarios de prueba: ejecute antes python -m benchmarks.sembrar")
+    contexto = {"usuarios": usuarios, "terminos": [t.split()[0] for t in TEMAS] + CIUDADES}
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as cliente:
+        servidor = (await cliente.get("/health/pool")).json()
+
+    escenarios = {}
+    for nombre in args.escenarios:
+        escenarios[nombre] = await ejecutar(nombre, args, contexto)
+        imprimir(nombre, escenarios[nombre])
+    archivo = guardar("carga", {
+        "url": args.url,
+        "servidor": servidor,
+        "parametros": {clave: valor for clave, valor in vars(args).items() if clave != "url"},
+        "escenarios": escenarios,
+    })
+    print(f"\nResultados guardados en {archivo}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clientes", type=int, default=50, help="clientes concurrentes por escenario")
+    parser.add_argument("--duracion", type=float, default=30, help="segundos medidos por escenario")
+    parser.add_argument("--calentamiento", type=float, default=3, help="segundos sin medir antes de cada escenario")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--escenarios", default=",".join(ESCENARIOS),
+                        type=lambda valor: [e for e in valor.split(",") if e])
+    parser.add_argument("--flash-cupo", type=int, default=100)
+    parser.add_argument("--flash-usuarios", type=int, default=2000)
+    args = parser.parse_args()
+    desconocidos = set(args.escenarios) - set(ESCENARIOS)
+    if desconocidos:
+        parser.error(f"escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+    asyncio.run(principal(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Micro-benchmarks de serialización y verificación de tokens.
+
+    python -m benchmarks.micro [--items 20] [--repeticiones 2000] [--sin-bcrypt]
+
+No usan la base de datos. Miden el costo por operación de:
+- serializar una página de eventos (ver benchmarks.serializacion);
+- crear y verificar un JWT, y resolver get_current_user con el usuario en caché,
+  que es lo que paga cada petición autenticada;
+- verificar una contraseña con bcrypt (BCRYPT_ROUNDS), en el proceso actual.
+El resultado se guarda en benchmarks/resultados/ para compararlo con benchmarks.resultados.
+"""
+import argparse
+import asyncio
+import time
+import timeit
+from datetime import datetime, timezone
+from app.core.cache import principal_cache
+from app.core.config import settings
+from app.models.user import Roles
+from app.core.security import create_access_token, get_password_hash, verify_password, verify_token
+from app.routers.auth import get_current_user
+from app.schemas.user import UserResponse
+from benchmarks.resultados import guardar
+from benchmarks.serializacion import datos_sinteticos, ruta_actual, ruta_dump_json, ruta_rapida
+
+def medir(nombre: str, funcion, repeticiones: int, resultados: dict):
+    total = min(timeit.repeat(funcion, number=repeticiones, repeat=3))
+    registrar(nombre, total / repeticiones, repeticiones, resultados)
+
+def registrar(nombre: str, segundos: float, repeticiones: int, resultados: dict):
+    resultados[nombre] = {
+        "us_por_operacion": round(segundos * 1e6, 2),
+        "operaciones_por_segundo": round(1 / segundos, 1),
+        "repeticiones": repeticiones,
+    }
+    print(f"{nombre:<40} {segundos * 1e6:12.1f} µs/op")
+
+async def medir_get_current_user(repeticiones: int, resultados: dict):
+    """get_current_user con el usuario ya en caché: no toca la base de datos"""
+    email = "micro@example.com"
+    token = create_access_token({"sub": email})
+    usuario = UserResponse(id=1, email=email, nombre="Micro", role=Roles.ASISTENTE, is_active=True,
+                           creado=datetime.now(timezone.utc))
+    await principal_cache.set(email, usuario.model_dump(mode="json"), 3600)
+    mejor = float("inf")
+    for _ in range(3):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            await get_current_user(token, db=None)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    await principal_cache.delete(email)
+    registrar("token: get_current_user (caché)", mejor / repeticiones, repeticiones, resultados)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=20, help="eventos por página serializada")
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    parser.add_argument("--sin-bcrypt", action="store_true", help="omitir la verificación de contraseñas")
+    args = parser.parse_args()
+    resultados = {}
+
+    eventos, filas = datos_sinteticos(args.items)
+    medir(f"serializacion: orm+response_model ({args.items})", lambda: ruta_actual(eventos), args.repeticiones, resultados)
+    medir(f"serializacion: orm+dump_json ({args.items})", lambda: ruta_dump_json(eventos), args.repeticiones, resultados)
+    medir(f"serializacion: filas+fast_json ({args.items})", lambda: ruta_rapida(filas), args.repeticiones, resultados)
+
+    token = create_access_token({"sub": "micro@example.com"})
+    medir("token: create_access_token", lambda: create_access_token({"sub": "micro@example.com"}),
+          args.repeticiones, resultados)
+    medir("token: verify_token", lambda: verify_token(token), args.repeticiones, resultados)
+    asyncio.run(medir_get_current_user(args.repeticiones, resultados))
+
+    if not args.sin_bcrypt:
+        hash_password = get_password_hash("benchmark")
+        medir(f"bcrypt: verify_password ({settings.BCRYPT_ROUNDS} rondas)",
+              lambda: verify_password("benchmark", hash_password), 3, resultados)
+
+    archivo = guardar("micro", {
+        "parametros": {**vars(args), "bcrypt_rounds": settings.BCRYPT_ROUNDS},
+        "benchmarks": resultados,
+    })
+    print(f"\nResultados guardados en {archivo}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Guardar y comparar resultados de benchmarks.
+
+    python -m benchmarks.resultados ANTERIOR.json ACTUAL.json
+
+Cada ejecución de benchmarks.carga o benchmarks.micro se guarda como JSON en
+benchmarks/resultados/ con el commit y la fecha. Este módulo compara dos archivos
+del mismo tipo y muestra la variación de cada métrica.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+
+DIRECTORIO = Path(__file__).parent / "resultados"
+
+# Métricas en las que un valor mayor es mejor (en el resto, menor es mejor)
+MAYOR_ES_MEJOR = ("rps", "operaciones_por_segundo")
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True, cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def resumen_latencias(segundos: list, duracion: float) -> dict:
+    """Throughput y percentiles (en ms) de una lista de latencias en segundos"""
+    ordenadas = sorted(segundos)
+    if len(ordenadas) > 1:
+        cortes = statistics.quantiles(ordenadas, n=100, method="inclusive")
+        p50, p95, p99 = cortes[49], cortes[94], cortes[98]
+    else:
+        p50 = p95 = p99 = ordenadas[0] if ordenadas else 0.0
+    return {
+        "peticiones": len(ordenadas),
+        "rps": round(len(ordenadas) / duracion, 1) if duracion else 0.0,
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+        "max_ms": round(ordenadas[-1] * 1000, 2) if ordenadas else 0.0,
+    }
+
+def guardar(tipo: str, datos: dict, directorio: Path = DIRECTORIO) -> Path:
+    """Guardar los resultados con el commit actual; devuelve la ruta del archivo"""
+    fecha = datetime.now(timezone.utc)
+    commit = _git("rev-parse", "--short", "HEAD") or "sin-git"
+    documento = {
+        "tipo": tipo,
+        "fecha": fecha.isoformat(timespec="seconds"),
+        "commit": commit,
+        "cambios_sin_commit": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        **datos,
+    }
+    directorio.mkdir(parents=True, exist_ok=True)
+    archivo = directorio / f"{tipo}-{fecha:%Y%m%dT%H%M%S}-{commit}.json"
+    archivo.write_text(json.dumps(documento, indent=2, ensure_ascii=False))
+    return archivo
+
+def _metricas(documento: dict) -> dict:
+    """Aplanar un resultado a {(grupo, nombre, métrica): valor}"""
+    planas = {}
+    if documento["tipo"] == "carga":
+        for escenario, datos in documento["escenarios"].items():
+            for endpoint, valores in datos["endpoints"].items():
+                for metrica in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+                    planas[(escenario, endpoint, metrica)] = valores[metrica]
+    else:
+        for nombre, valores in documento["benchmarks"].items():
+            planas[("micro", nombre, "us_por_operacion")] = valores["us_por_operacion"]
+    return planas
+
+def comparar(anterior: dict, actual: dict) -> list:
+    """Filas (grupo, nombre, métrica, anterior, actual, variación %, mejora)"""
+    if anterior["tipo"] != actual["tipo"]:
+        raise ValueError(f"No se pueden comparar resultados de {anterior['tipo']} y {actual['tipo']}")
+    antes, despues = _metricas(anterior), _metricas(actual)
+    filas = []
+    for clave in sorted(antes.keys() & despues.keys()):
+        previo, nuevo = antes[clave], despues[clave]
+        variacion = (nuevo - previo) / previo * 100 if previo else 0.0
+        mejora = variacion > 0 if clave[2] in MAYOR_ES_MEJOR else variacion < 0
+        filas.append((*clave, previo, nuevo, variacion, mejora))
+    return filas
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("anterior", type=Path)
+    parser.add_argument("actual", type=Path)
+    parser.add_argument("--umbral", type=float, default=5.0, help="variación en %% a partir de la cual se marca")
+    args = parser.parse_args()
+
+    anterior, actual = json.loads(args.anterior.read_text()), json.loads(args.actual.read_text())
+    print(f"{anterior['commit']} ({anterior['fecha']}) -> {actual['commit']} ({actual['fecha']})")
+    for grupo, nombre, metrica, previo, nuevo, variacion, mejora in comparar(anterior, actual):
+        marca = ""
+        if abs(variacion) >= args.umbral:
+            marca = "  mejor" if mejora else "  PEOR"
+        print(f"{grupo:<12} {nombre:<40} {metrica:<17} {previo:>10} {nuevo:>10} {variacion:+7.1f} %{marca}")
+
+if __name__ == "__main__":
+    main()
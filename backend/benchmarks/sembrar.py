@@ -0,0 +1,130 @@
+"""
+Cargar volúmenes realistas en la base de datos local para las pruebas de carga.
+
+    python -m benchmarks.sembrar [--usuarios 10000] [--eventos 100000] [--registros 1000000] [--limpiar]
+
+Usa la DATABASE_URL configurada, con el esquema ya migrado (alembic upgrade head).
+Los datos se generan en el servidor con generate_series, en pocos minutos:
+- usuarios bench<n>@example.com con contraseña PASSWORD (un solo hash de bcrypt);
+  uno de cada 20 es organizador.
+- eventos repartidos entre hace un año y dentro de un año, con títulos y lugares
+  combinados de listas fijas para que la búsqueda tenga coincidencias variadas.
+- registros con una distribución sesgada: pocos eventos concentran muchos
+  inscritos. registrado y capacidad se ajustan a los registros creados.
+setseed hace que dos ejecuciones sobre una base vacía generen los mismos datos.
+"""
+import argparse
+import time
+from sqlalchemy import text
+from app.core.security import get_password_hash
+from app.database import get_engine
+
+PASSWORD = "benchmark"
+PATRON_EMAIL = "bench%@example.com"
+
+TIPOS = ["Congreso", "Taller", "Seminario", "Conferencia", "Festival", "Meetup", "Curso", "Foro", "Hackatón", "Feria"]
+TEMAS = ["inteligencia artificial", "música", "fotografía", "emprendimiento", "salud", "ciencia de datos",
+         "gastronomía", "cine", "robótica", "literatura", "finanzas", "diseño"]
+CIUDADES = ["Bogotá", "Medellín", "Cali", "Barranquilla", "Cartagena", "Bucaramanga", "Pereira", "Manizales"]
+
+# Filas de registro_eventos por sentencia
+LOTE_REGISTROS = 200_000
+
+def sembrar_usuarios(conn, cantidad: int) -> list:
+    hash_password = get_password_hash(PASSWORD)
+    conn.execute(text("""
+        INSERT INTO users (email, password, nombre, role, is_active)
+        SELECT 'bench' || n || '@example.com', :hash, 'Usuario de prueba ' || n,
+               CAST(CASE WHEN n % 20 = 0 THEN 'ORGANIZADOR' ELSE 'ASISTENTE' END AS roles), true
+        FROM generate_series(1, :cantidad) AS n
+        ON CONFLICT (email) DO NOTHING
+    """), {"hash": hash_password, "cantidad": cantidad})
+    return conn.execute(text(
+        "SELECT id FROM users WHERE email LIKE :patron AND role = 'ORGANIZADOR' ORDER BY id"
+    ), {"patron": PATRON_EMAIL}).scalars().all()
+
+def sembrar_eventos(conn, cantidad: int, organizadores: list) -> list:
+    return conn.execute(text("""
+        INSERT INTO eventos (titulo, descripcion, fecha_inicio, fecha_fin, lugar, capacidad, registrado, estado, creador_id)
+        SELECT titulo, descripcion, inicio, inicio + (1 + n % 3) * interval '4 hours', ciudad,
+               50 + (n * 37) % 451, 0,
+               CAST(CASE WHEN n % 50 = 0 THEN 'CANCELADO'
+                         WHEN inicio < now() THEN 'FINALIZADO'
+                         ELSE 'PENDIENTE' END AS estadosevento),
+               (CAST(:organizadores AS int[]))[1 + n % cardinality(CAST(:organizadores AS int[]))]
+        FROM (
+            SELECT n,
+                   tipo || ' de ' || tema || ' ' || n AS titulo,
+                   'Un ' || lower(tipo) || ' sobre ' || tema || ' en ' || ciudad || '. '
+                       || repeat('Agenda, ponentes invitados y actividades prácticas. ', 3) AS descripcion,
+                   ciudad,
+                   date_trunc('hour', CAST(now() AS timestamp)) - interval '365 days'
+                       + (n * 730.0 / :cantidad) * interval '1 day' AS inicio
+            FROM (
+                SELECT n,
+                       (CAST(:tipos AS text[]))[1 + n % cardinality(CAST(:tipos AS text[]))] AS tipo,
+                       (CAST(:temas AS text[]))[1 + (n / 7) % cardinality(CAST(:temas AS text[]))] AS tema,
+                       (CAST(:ciudades AS text[]))[1 + (n / 3) % cardinality(CAST(:ciudades AS text[]))] AS ciudad
+                FROM generate_series(1, :cantidad) AS n
+            ) AS base
+        ) AS evento
+        RETURNING id
+    """), {"cantidad": cantidad, "organizadores": organizadores,
+           "tipos": TIPOS, "temas": TEMAS, "ciudades": CIUDADES}).scalars().all()
+
+def sembrar_registros(conn, cantidad: int, eventos: list) -> int:
+    """Registros únicos por (usuario, evento); el evento se elige con sesgo (random()^3)"""
+    usuarios = conn.execute(text(
+        "SELECT id FROM users WHERE email LIKE :patron ORDER BY id"
+    ), {"patron": PATRON_EMAIL}).scalars().all()
+    creados = 0
+    while creados < cantidad:
+        lote = min(LOTE_REGISTROS, cantidad - creados)
+        resultado = conn.execute(text("""
+            INSERT INTO registro_eventos (user_id, evento_id, confirmado, registrado_en)
+            SELECT (CAST(:usuarios AS int[]))[1 + floor(random() * cardinality(CAST(:usuarios AS int[])))::int],
+                   (CAST(:eventos AS int[]))[1 + floor(power(random(), 3) * cardinality(CAST(:eventos AS int[])))::int],
+                   random() < 0.7,
+                   now() - random() * interval '365 days'
+            FROM generate_series(1, :lote)
+            ON CONFLICT ON CONSTRAINT uq_registro_eventos_user_evento DO NOTHING
+        """), {"usuarios": usuarios, "eventos": eventos, "lote": lote})
+        creados += resultado.rowcount
+        print(f"  {creados:,} registros")
+    conn.execute(text("""
+        UPDATE eventos AS e SET registrado = c.total, capacidad = GREATEST(e.capacidad, c.total)
+        FROM (
+            SELECT evento_id, count(*) AS total FROM registro_eventos
+            WHERE evento_id = ANY(CAST(:eventos AS int[])) GROUP BY evento_id
+        ) AS c
+        WHERE e.id = c.evento_id
+    """), {"eventos": eventos})
+    return creados
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--usuarios", type=int, default=10_000)
+    parser.add_argument("--eventos", type=int, default=100_000)
+    parser.add_argument("--registros", type=int, default=1_000_000)
+    parser.add_argument("--limpiar", action="store_true",
+                        help="vaciar usuarios, eventos, sesiones y registros antes de sembrar (¡borra todos los datos!)")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    print(f"Sembrando en {engine.url.render_as_string(hide_password=True)}")
+    inicio = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text("SELECT setseed(0.42)"))
+        if args.limpiar:
+            conn.execute(text("TRUNCATE registro_eventos, sesiones, eventos, users RESTART IDENTITY CASCADE"))
+        organizadores = sembrar_usuarios(conn, args.usuarios)
+        print(f"{args.usuarios:,} usuarios ({len(organizadores):,} organizadores)")
+        eventos = sembrar_eventos(conn, args.eventos, organizadores)
+        print(f"{len(eventos):,} eventos")
+        sembrar_registros(conn, args.registros, eventos)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE users, eventos, registro_eventos"))
+    print(f"Listo en {time.perf_counter() - inicio:.0f} s")
+
+if __name__ == "__main__":
+    main()
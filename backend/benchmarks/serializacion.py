@@ -0,0 +1,99 @@
+"""
+Comparación de la serialización de una página de eventos.
+
+    python -m benchmarks.serializacion [--items 100] [--repeticiones 2000] [--db]
+
+- orm+response_model: la ruta actual de FastAPI. Instancias ORM validadas con
+  EventoResponse (from_attributes), volcadas a tipos JSON y serializadas con json.dumps.
+- orm+dump_json: las mismas instancias con TypeAdapter.dump_json de pydantic-core.
+- filas+fast_json: filas de columnas (proyectar_eventos) convertidas con evento_a_dict
+  y serializadas con app.services.json_rapido.dumps (orjson o pydantic-core).
+
+Con --db también se mide la consulta a la base de datos configurada: hidratar
+instancias ORM con joinedload frente a seleccionar solo las columnas.
+"""
+import argparse
+import json
+import timeit
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import List
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from app.models.event import Evento, EstadosEvento
+from app.models.user import User
+from app.schemas.event import EventoResponse
+from app.services.json_rapido import COLUMNAS_EVENTO, dumps, evento_a_dict, proyectar_eventos
+
+adaptador = TypeAdapter(List[EventoResponse])
+
+Fila = namedtuple("Fila", [c.key for c in COLUMNAS_EVENTO] + ["creador_id", "creador_nombre"])
+
+def datos_sinteticos(items: int):
+    """Misma página de eventos como instancias ORM y como filas de columnas"""
+    creador = User(id=1, nombre="Organizador de prueba", email="org@example.com")
+    inicio = datetime(2026, 1, 1, 9, 0)
+    eventos = [
+        Evento(
+            id=i, titulo=f"Evento {i}", descripcion="Descripción del evento " * 8,
+            fecha_inicio=inicio + timedelta(days=i), fecha_fin=inicio + timedelta(days=i, hours=8),
+            lugar="Bogotá", capacidad=100, estado=EstadosEvento.PENDIENTE, registrado=i % 100,
+            creado=inicio, modificado=inicio, creador_id=creador.id, creador=creador,
+        )
+        for i in range(1, items + 1)
+    ]
+    filas = [
+        Fila(*(getattr(e, c.key) for c in COLUMNAS_EVENTO), creador.id, creador.nombre)
+        for e in eventos
+    ]
+    return eventos, filas
+
+def ruta_actual(eventos) -> bytes:
+    modelos = adaptador.validate_python(eventos, from_attributes=True)
+    return json.dumps(adaptador.dump_python(modelos, mode="json")).encode()
+
+def ruta_dump_json(eventos) -> bytes:
+    return adaptador.dump_json(adaptador.validate_python(eventos, from_attributes=True))
+
+def ruta_rapida(filas) -> bytes:
+    return dumps([evento_a_dict(f) for f in filas])
+
+def medir(nombre: str, funcion, repeticiones: int, base=None) -> float:
+    total = min(timeit.repeat(funcion, number=repeticiones, repeat=3))
+    por_llamada = total / repeticiones * 1e6
+    relativo = f"  x{base / por_llamada:.1f}" if base else ""
+    print(f"{nombre:<22} {por_llamada:10.1f} µs/página{relativo}")
+    return por_llamada
+
+def medir_db(items: int, repeticiones: int):
+    from app.database import new_session
+    query = select(Evento).order_by(Evento.fecha_inicio, Evento.id).limit(items)
+    with new_session() as db:
+        def orm():
+            db.expunge_all()
+            return db.scalars(query.options(joinedload(Evento.creador))).all()
+        def filas():
+            return db.execute(proyectar_eventos(query)).all()
+        print(f"\nConsulta + serialización ({len(filas())} eventos de la base de datos)")
+        base = medir("orm+response_model", lambda: ruta_actual(orm()), repeticiones)
+        medir("filas+fast_json", lambda: ruta_rapida(filas()), repeticiones, base)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    parser.add_argument("--db", action="store_true", help="medir también contra la base de datos")
+    args = parser.parse_args()
+
+    eventos, filas = datos_sinteticos(args.items)
+    assert json.loads(ruta_actual(eventos)) == json.loads(ruta_rapida(filas))
+    print(f"Serialización de {args.items} eventos")
+    base = medir("orm+response_model", lambda: ruta_actual(eventos), args.repeticiones)
+    medir("orm+dump_json", lambda: ruta_dump_json(eventos), args.repeticiones, base)
+    medir("filas+fast_json", lambda: ruta_rapida(filas), args.repeticiones, base)
+    if args.db:
+        medir_db(args.items, max(args.repeticiones // 10, 1))
+
+if __name__ == "__main__":
+    main()